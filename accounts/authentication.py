@@ -0,0 +1,178 @@
+"""
+JWT authentication without a user query per request.
+
+Tokens issued at login and refresh carry the user's ``username`` and a
+``ver`` claim: a digest of the fields authentication depends on (password
+hash, username, active/staff/superuser flags). The current digest of every
+user is kept in a shared cache and replaced whenever a user is saved, so a
+token whose ``ver`` matches it describes the user as they are now and the
+request is served by a principal built without touching the database: a
+real ``User`` instance with only those fields loaded (the rest load on
+access), taken from a bounded per-process LRU of recently seen users or
+from the token's claims.
+
+Tokens without the claims, with a stale ``ver`` or for a user the cache does
+not know take the regular path (load the row, check it is active) and
+refill the cache and LRU. Project memberships are not put in the token;
+they change far more often and ``projects.access`` caches them already.
+
+A deactivated or deleted user is only turned away if every process sees the
+change, so the fast path needs ``AUTH_USER_CACHE`` to be shared between
+processes. On a per-process backend (the default local-memory cache) it is
+off unless ``AUTH_USER_FAST_PATH`` forces it, which the ``accounts.E001``
+check rejects.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+USERNAME_CLAIM = "username"
+VERSION_CLAIM = "ver"
+VERSION_KEY = "user-version:{user_id}"
+VERSIONED_FIELDS = ("password", "username", "is_active", "is_staff", "is_superuser")
+
+
+def _in_field_order(*names):
+    # the order Model.from_db expects values in
+    return tuple(f.attname for f in User._meta.concrete_fields if f.attname in names)
+
+
+PRINCIPAL_FIELDS = _in_field_order("id", "username", "is_active", "is_staff", "is_superuser")
+CLAIM_FIELDS = _in_field_order("id", "username")
+
+
+# cache backends whose entries live in one process
+PROCESS_LOCAL_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def _cache_alias():
+    return getattr(settings, "AUTH_USER_CACHE", "default")
+
+
+def _cache():
+    return caches[_cache_alias()]
+
+
+def cache_is_process_local():
+    backend = settings.CACHES.get(_cache_alias(), {}).get("BACKEND")
+    return backend is None or backend in PROCESS_LOCAL_BACKENDS
+
+
+def fast_path_enabled():
+    """``AUTH_USER_FAST_PATH``, or by default whether ``AUTH_USER_CACHE`` is shared between processes."""
+    enabled = getattr(settings, "AUTH_USER_FAST_PATH", None)
+    return not cache_is_process_local() if enabled is None else enabled
+
+
+def _cache_timeout():
+    return getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 3600)
+
+
+def user_version(user):
+    parts = "\x1f".join(str(getattr(user, name)) for name in VERSIONED_FIELDS)
+    return hashlib.sha1(parts.encode()).hexdigest()[:16]
+
+
+class PrincipalLRU:
+    """``user id -> (version, principal field values)`` for the most recently seen users."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id, version, values):
+        with self._lock:
+            self._entries[user_id] = (version, values)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def discard(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principals = PrincipalLRU(getattr(settings, "AUTH_USER_LRU_SIZE", 10000))
+
+
+def remember_user(user):
+    """Publish ``user``'s current version and keep its principal fields in this process."""
+    version = user_version(user)
+    _cache().set(VERSION_KEY.format(user_id=user.pk), version, _cache_timeout())
+    principals.put(user.pk, version, tuple(getattr(user, name) for name in PRINCIPAL_FIELDS))
+    return version
+
+
+def _forget(user_id):
+    _cache().delete(VERSION_KEY.format(user_id=user_id))
+    principals.discard(user_id)
+
+
+def forget_user(user_id):
+    """Send ``user_id``'s next request down the regular path (called when the user changes)."""
+    _forget(user_id)
+    # again after commit, so a row read before the change is not remembered
+    transaction.on_commit(lambda: _forget(user_id))
+
+
+def add_principal_claims(token, user):
+    token[USERNAME_CLAIM] = user.username
+    token[VERSION_CLAIM] = remember_user(user)
+    return token
+
+
+def access_token_for(user):
+    return add_principal_claims(AccessToken.for_user(user), user)
+
+
+def _principal(field_names, values):
+    return User.from_db(DEFAULT_DB_ALIAS, field_names, values)
+
+
+class PrincipalJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        version = validated_token.get(VERSION_CLAIM)
+        username = validated_token.get(USERNAME_CLAIM)
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, TypeError, ValueError):
+            user_id = None
+        if not fast_path_enabled() or version is None or username is None or user_id is None:
+            return super().get_user(validated_token)
+
+        if _cache().get(VERSION_KEY.format(user_id=user_id)) == version:
+            values = principals.get(user_id, version)
+            if values is not None:
+                return _principal(PRINCIPAL_FIELDS, values)
+            claims = {"id": user_id, "username": username}
+            return _principal(CLAIM_FIELDS, tuple(claims[name] for name in CLAIM_FIELDS))
+
+        user = super().get_user(validated_token)
+        remember_user(user)
+        return user
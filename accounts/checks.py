@@ -0,0 +1,16 @@
+from django.conf import settings
+from django.core.checks import Error, register
+
+from .authentication import cache_is_process_local
+
+
+@register()
+def check_auth_user_cache(app_configs, **kwargs):
+    if getattr(settings, "AUTH_USER_FAST_PATH", None) and cache_is_process_local():
+        return [Error(
+            "AUTH_USER_FAST_PATH is on but AUTH_USER_CACHE is a per-process cache.",
+            hint="Deactivated or deleted users would stay authenticated in the other processes; "
+                 "point AUTH_USER_CACHE at a shared cache (e.g. Redis) or leave AUTH_USER_FAST_PATH unset.",
+            id="accounts.E001",
+        )]
+    return []
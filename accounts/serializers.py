@@ -1,5 +1,9 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .authentication import add_principal_claims
 
 User = get_user_model()
 
@@ -22,4 +26,23 @@ class RegisterSerializer(serializers.ModelSerializer):
             email=validated_data.get("email"),
             password=validated_data["password"],
         )
-        return user
\ No newline at end of file
+        return user
+
+class PrincipalTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Login tokens carrying the claims ``PrincipalJWTAuthentication`` authenticates from."""
+
+    @classmethod
+    def get_token(cls, user):
+        return add_principal_claims(super().get_token(user), user)
+
+
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refreshed access tokens get the user's current claims, so they take the fast path again."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = self.token_class(data.get("refresh", attrs["refresh"]))
+        user = User.objects.filter(pk=refresh.payload.get(api_settings.USER_ID_CLAIM)).first()
+        if user is not None:
+            data["access"] = str(add_principal_claims(refresh.access_token, user))
+        return data
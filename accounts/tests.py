@@ -1,3 +1,109 @@
-from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from projects.models import Project
+from .authentication import VERSION_CLAIM, access_token_for, principals
+from .checks import check_auth_user_cache
+
+User = get_user_model()
+
+
+@override_settings(AUTH_USER_FAST_PATH=True)
+class PrincipalAuthenticationTests(TestCase):
+    def setUp(self):
+        principals.clear()
+        self.user = User.objects.create_user(username="ali", email="ali@example.com", password="secret-pw")
+        self.client = APIClient()
+
+    def login(self):
+        response = self.client.post("/api/auth/login/", {"username": "ali", "password": "secret-pw"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def use(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def assert_auth_queries(self, count, url="/api/projects/"):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            len([q for q in queries.captured_queries if 'FROM "accounts_user"' in q["sql"]]), count, url
+        )
+        return response
+
+    def test_current_token_needs_no_user_query(self):
+        self.use(self.login()["access"])
+        self.assert_auth_queries(0)
+
+        # another process: nothing in the LRU, the principal comes from the claims
+        principals.clear()
+        self.assert_auth_queries(0)
+        response = self.assert_auth_queries(1, "/api/auth/me/")
+        self.assertEqual(response.data["email"], "ali@example.com")
+
+    def test_principal_works_as_the_user(self):
+        self.use(self.login()["access"])
+        response = self.client.post("/api/projects/", {"name": "P"}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Project.objects.get(name="P").owner, self.user)
+
+    def test_changed_user_takes_the_regular_path(self):
+        self.use(self.login()["access"])
+        self.user.is_staff = True
+        self.user.save()
+        self.assert_auth_queries(1)
+        # the reload refreshed the cache; the token version is stale but the row is valid
+        self.assert_auth_queries(1)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/projects/").status_code, 401)
+
+    def test_refresh_restores_the_fast_path(self):
+        tokens = self.login()
+        self.user.first_name = "Ali"
+        self.user.set_password("new-secret")
+        self.user.save()
+        response = self.client.post("/api/auth/refresh/", {"refresh": tokens["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(AccessToken(response.data["access"])[VERSION_CLAIM], AccessToken(tokens["access"])[VERSION_CLAIM])
+
+        self.use(response.data["access"])
+        self.assert_auth_queries(0)
+
+    def test_tokens_without_claims_still_work(self):
+        self.use(AccessToken.for_user(self.user))
+        self.assert_auth_queries(1)
+        self.use(access_token_for(self.user))
+        self.assert_auth_queries(0)
+
+    def test_lru_is_bounded(self):
+        original = principals.size
+        principals.size = 2
+        self.addCleanup(setattr, principals, "size", original)
+        for user_id in range(5):
+            principals.put(user_id, "v", (user_id,))
+        self.assertIsNone(principals.get(0, "v"))
+        self.assertEqual(principals.get(4, "v"), (4,))
+        self.assertIsNone(principals.get(4, "other version"))
+
+    @override_settings(AUTH_USER_FAST_PATH=None)
+    def test_process_local_cache_keeps_the_regular_path(self):
+        self.use(self.login()["access"])
+        self.assert_auth_queries(1)
+        # another worker deactivates the user: this process never hears of it
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.client.get("/api/projects/").status_code, 401)
+
+    def test_fast_path_on_a_process_local_cache_is_an_error(self):
+        self.assertEqual([e.id for e in check_auth_user_cache(None)], ["accounts.E001"])
+        shared = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://"}}
+        with override_settings(CACHES=shared):
+            self.assertEqual(check_auth_user_cache(None), [])
+        with override_settings(AUTH_USER_FAST_PATH=None):
+            self.assertEqual(check_auth_user_cache(None), [])
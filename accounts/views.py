@@ -17,5 +17,6 @@ class RegisterView(generics.CreateAPIView):
 class MeView(APIView):
     """return data for logged user"""
     def get(self, request):
-        serializer = UserSerializer(request.user)
+        # request.user may be a token principal with most fields not loaded
+        serializer = UserSerializer(User.objects.get(pk=request.user.pk))
         return Response(serializer.data)
\ No newline at end of file
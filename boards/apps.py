@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BoardsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'boards'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from taskflow import sqlite  # noqa: F401  (connection_created hook)
@@ -0,0 +1,75 @@
+"""Async GET of the hot board read endpoints; see ``taskflow.async_views``."""
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from rest_framework.response import Response
+
+from taskflow.async_views import AsyncReadView
+from taskflow.conditional import aqueryset_version
+from taskflow.response_cache import cache_response_data, cached_response_data
+from .serializers import TASK_ROW_VALUES, serialize_task_rows, task_label_pairs
+from .views import BoardSnapshotView, LabelListCreateView, TaskCommentListCreateView, TaskListCreateView
+
+
+class AsyncTaskListView(AsyncReadView):
+    sync_view = TaskListCreateView
+
+    async def get_validators(self):
+        return await aqueryset_version(self.queryset), None
+
+    async def get(self):
+        paginator = self.view.paginator
+        page = paginator.get_page_queryset(self.queryset.values(*TASK_ROW_VALUES), self.request)
+        rows = paginator.get_page([row async for row in page])
+        label_pairs = [pair async for pair in task_label_pairs([row["id"] for row in rows])] if rows else None
+        return paginator.get_paginated_response(serialize_task_rows(rows, label_pairs))
+
+
+class AsyncBoardSnapshotView(AsyncReadView):
+    sync_view = BoardSnapshotView
+
+    def prepare(self):
+        super().prepare()
+        self.version_queryset = self.view.get_board_version_queryset()
+
+    async def get_validators(self):
+        board = await aget_object_or_404(self.version_queryset, pk=self.kwargs["pk"])
+        columns, labels, tasks, comments = self.view.get_version_querysets(board[1])
+        return self.view.snapshot_validators(
+            board,
+            [row async for row in columns],
+            [row async for row in labels],
+            await aqueryset_version(tasks),
+            await aqueryset_version(comments),
+        )
+
+    async def get(self):
+        board = await aget_object_or_404(self.queryset, pk=self.kwargs["pk"])
+        self.view.check_object_permissions(self.request, board)
+        return Response(self.view.get_serializer(board).data)
+
+
+class AsyncTaskCommentListView(AsyncReadView):
+    sync_view = TaskCommentListCreateView
+
+    async def get_validators(self):
+        return await aqueryset_version(self.queryset), None
+
+    async def get(self):
+        comments = [comment async for comment in self.queryset]
+        return Response(self.view.get_serializer(comments, many=True).data)
+
+
+class AsyncLabelListView(AsyncReadView):
+    sync_view = LabelListCreateView
+
+    def prepare(self):
+        super().prepare()
+        self.cache_projects = self.view.get_cache_projects()
+
+    async def get(self):
+        key, data = await sync_to_async(cached_response_data)(self.request, self.cache_projects)
+        if data is None:
+            labels = [label async for label in self.queryset]
+            data = list(self.view.get_serializer(labels, many=True).data)
+            await sync_to_async(cache_response_data)(key, data)
+        return Response(data)
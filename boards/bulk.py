@@ -0,0 +1,189 @@
+"""
+Batched create/update/delete of tasks for ``POST /api/tasks/bulk/``.
+
+Every referenced column, task, assignee and label is loaded with one query
+per kind, all rows are validated against the caller's project access before
+anything is written, and the writes go through bulk_create/bulk_update in a
+single transaction. Those bypass model signals, so counters, the task history,
+the change log, the search index and the board feed are updated here explicitly.
+"""
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from projects.access import get_project_access
+from . import counters, history, search
+from .models import ChangeLog, Column, Label, Task
+from .ordering import ORDER_GAP
+from .realtime import publish_board_event
+
+User = get_user_model()
+
+MAX_OPERATIONS = 500
+PLAIN_FIELDS = ("title", "description", "priority", "due_date", "is_complete", "order")
+
+
+class BulkTaskOperations:
+    def __init__(self, user, operations):
+        """``operations`` are validated ``BulkTaskOperationSerializer`` rows."""
+        self.user = user
+        self.operations = operations
+        self.access = get_project_access(user)
+        self.errors = {}
+
+    def _error(self, index, field, message):
+        self.errors.setdefault(index, {})[field] = [message]
+
+    def _load(self):
+        rows = [op.get("data", {}) for op in self.operations]
+        task_ids = {op["id"] for op in self.operations if "id" in op}
+        self.tasks = {
+            t.id: t for t in Task.objects.filter(id__in=task_ids, column__board_id__in=self.access.project_ids)
+        }
+        column_ids = {row["column"] for row in rows if "column" in row}
+        column_ids |= {t.column_id for t in self.tasks.values()}
+        self.columns = Column.objects.in_bulk(column_ids)
+        usernames = {row["assignee"] for row in rows if row.get("assignee")}
+        self.users = {u.username: u for u in User.objects.filter(username__in=usernames)}
+        label_ids = {pk for row in rows for pk in row.get("labels", ())}
+        self.labels = Label.objects.in_bulk(label_ids)
+
+    def validate(self):
+        self._load()
+        seen = set()
+        for index, op in enumerate(self.operations):
+            data = op.get("data", {})
+            task = None
+            if op["op"] != "create":
+                # every op is applied to the same loaded instance, so a task may appear only once
+                if op["id"] in seen:
+                    self._error(index, "id", "هر تسک فقط یک بار در یک درخواست می‌تواند بیاید.")
+                    continue
+                seen.add(op["id"])
+                task = self.tasks.get(op["id"])
+                if task is None:
+                    self._error(index, "id", "تسک یافت نشد یا به آن دسترسی ندارید.")
+                    continue
+
+            column = self.columns.get(data["column"]) if "column" in data else None
+            if "column" in data and (column is None or not self.access.can_access(column.board_id)):
+                self._error(index, "column", "شما به این ستون/برد دسترسی ندارید")
+                continue
+            if task is not None and column is not None and column.board_id != self.columns[task.column_id].board_id:
+                self._error(index, "column", "ستون مقصد باید در همین پروژه باشد.")
+                continue
+
+            if data.get("assignee") and data["assignee"] not in self.users:
+                self._error(index, "assignee", "کاربری با این نام پیدا نشد.")
+
+            if column is None and task is not None:
+                column = self.columns[task.column_id]
+            project_id = column.board_id if column is not None else None
+            for label_id in data.get("labels", ()):
+                label = self.labels.get(label_id)
+                if label is None or label.project_id != project_id:
+                    self._error(index, "labels", f"لیبل {label_id} متعلق به این پروژه نیست.")
+                    break
+        return not self.errors
+
+    def _assign(self, task, data):
+        for field in PLAIN_FIELDS:
+            if field in data:
+                setattr(task, field, data[field])
+        if "column" in data:
+            task.column_id = data["column"]
+        if "assignee" in data:
+            task.assignee = self.users.get(data["assignee"]) if data["assignee"] else None
+
+    def save(self):
+        creates, updates, deletes = [], [], []
+        for index, op in enumerate(self.operations):
+            if op["op"] == "create":
+                task = Task(created_by=self.user)
+                self._assign(task, op["data"])
+                creates.append((index, task))
+            elif op["op"] == "update":
+                task = self.tasks[op["id"]]
+                task._previous_state = counters.task_state(task)
+                task._previous_history = history.task_state(task)
+                self._assign(task, op["data"])
+                updates.append((index, task))
+            else:
+                deletes.append((index, self.tasks[op["id"]]))
+
+        self._append_orders([task for index, task in creates if "order" not in self.operations[index]["data"]])
+
+        with transaction.atomic():
+            now = timezone.now()
+            for _, task in creates + updates:
+                task.mark_completion(now)
+            created = Task.objects.bulk_create([task for _, task in creates])
+            updated = [task for _, task in updates]
+            if updated:
+                for task in updated:
+                    task.updated_at = now
+                Task.objects.bulk_update(updated, [*PLAIN_FIELDS, "column", "assignee", "completed_at", "updated_at"])
+            self._write_labels(creates + updates)
+            if deletes:
+                # a regular delete: counters, change log and feed follow through the post_delete signal
+                Task.objects.filter(id__in=[task.id for _, task in deletes]).delete()
+
+            counters.apply_task_changes(
+                removed=[task._previous_state for task in updated],
+                added=[counters.task_state(task) for task in created + updated],
+            )
+            events = []
+            boards = {column_id: column.board_id for column_id, column in self.columns.items()}
+            for task in created + updated:
+                previous = getattr(task, "_previous_history", None)
+                events += history.task_events(task, previous, boards[task.column_id], now, boards)
+            history.record(events)
+            search.index_tasks(created + updated)
+            self._announce(created, ChangeLog.Action.CREATED)
+            self._announce(updated, ChangeLog.Action.UPDATED)
+
+        return [
+            {"index": index, "op": op["op"], "id": task.id, "status": "ok"}
+            for index, (op, task) in sorted(
+                (index, (self.operations[index], task)) for index, task in creates + updates + deletes
+            )
+        ]
+
+    def _append_orders(self, tasks):
+        """New tasks without an explicit order go to the end of their column, ORDER_GAP apart."""
+        if not tasks:
+            return
+        last = dict(
+            Task.objects.filter(column_id__in={t.column_id for t in tasks})
+            .order_by()
+            .values("column_id")
+            .annotate(last=Max("order"))
+            .values_list("column_id", "last")
+        )
+        for task in tasks:
+            last[task.column_id] = (last.get(task.column_id) or 0) + ORDER_GAP
+            task.order = last[task.column_id]
+
+    def _write_labels(self, items):
+        Through = Task.labels.through
+        replaced = [task.id for index, task in items if "labels" in self.operations[index]["data"]]
+        if not replaced:
+            return
+        Through.objects.filter(task_id__in=replaced).delete()
+        Through.objects.bulk_create(
+            Through(task_id=task.id, label_id=label_id)
+            for index, task in items
+            for label_id in dict.fromkeys(self.operations[index]["data"].get("labels", ()))
+        )
+
+    def _announce(self, tasks, action):
+        by_project = {}
+        for task in tasks:
+            by_project.setdefault(self.columns[task.column_id].board_id, []).append(task)
+        for project_id, project_tasks in by_project.items():
+            ChangeLog.record(project_id, ChangeLog.Entity.TASK, action, [t.id for t in project_tasks])
+            for task in project_tasks:
+                publish_board_event(
+                    project_id, f"task.{action.label}", id=task.id, column=task.column_id, order=task.order
+                )
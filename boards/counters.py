@@ -0,0 +1,188 @@
+"""
+Denormalized task counters on ``Column``, ``Project`` and ``AssignmentSummary``.
+
+Each task contributes to ``task_count``, ``completed_task_count`` and, while
+open, to the ``open_<priority>_count`` of its column and of the column's
+project; an assigned task also counts in the summary row of its assignee and
+project. Writes are applied as ``F()`` increments in the same transaction as
+the task change; ``manage.py recount_tasks`` rebuilds them from scratch.
+Overdue counts depend on the clock rather than on writes, so they are not
+stored here.
+"""
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from taskflow.saving import COUNTER_FIELDS
+PRIORITIES = ("low", "medium", "high")
+ASSIGNMENT_FIELDS = ("task_count", "completed_task_count")
+TRACKED_FIELDS = ("column_id", "is_complete", "priority", "assignee_id")
+
+
+def task_state(task):
+    return task.column_id, task.is_complete, task.priority, task.assignee_id
+
+
+def _contribution(state):
+    column_id, is_complete, priority, assignee_id = state
+    if is_complete:
+        return {"task_count": 1, "completed_task_count": 1}
+    if priority not in PRIORITIES:
+        return {"task_count": 1}
+    return {"task_count": 1, f"open_{priority}_count": 1}
+
+
+def increment(model, keys, amounts):
+    """Add ``amounts`` to the row ``keys``, creating it on its first write."""
+    rows = model.objects.filter(**keys)
+    changes = {field: F(field) + n for field, n in amounts.items()}
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**keys, **amounts)
+    except IntegrityError:
+        # another writer created the row first
+        rows.update(**changes)
+
+
+def apply_task_changes(removed=(), added=()):
+    """
+    Update counters for tasks that left (``removed``) and entered (``added``)
+    a state. Both are iterables of ``task_state`` tuples.
+    """
+    from projects.models import Project
+    from .models import AssignmentSummary, Column
+
+    by_column = defaultdict(Counter)
+    by_assignee = defaultdict(Counter)
+    for sign, states in ((-1, removed), (1, added)):
+        for state in states:
+            column_id, is_complete, priority, assignee_id = state
+            for field, n in _contribution(state).items():
+                by_column[column_id][field] += sign * n
+            if assignee_id is not None:
+                by_assignee[assignee_id, column_id]["task_count"] += sign
+                by_assignee[assignee_id, column_id]["completed_task_count"] += sign * is_complete
+
+    by_column = {cid: deltas for cid, deltas in by_column.items() if any(deltas.values())}
+    by_assignee = {key: deltas for key, deltas in by_assignee.items() if any(deltas.values())}
+    if not by_column and not by_assignee:
+        return
+
+    column_ids = {*by_column, *(column_id for _, column_id in by_assignee)}
+    board_of = dict(Column.objects.filter(id__in=column_ids).values_list("id", "board_id"))
+    by_project = defaultdict(Counter)
+    for column_id, deltas in by_column.items():
+        if column_id in board_of:
+            by_project[board_of[column_id]].update(deltas)
+
+    for model, targets in ((Column, by_column), (Project, by_project)):
+        for pk, deltas in targets.items():
+            changes = {field: F(field) + n for field, n in deltas.items() if n}
+            if changes:
+                model.objects.filter(pk=pk).update(**changes)
+
+    by_summary = defaultdict(Counter)
+    for (assignee_id, column_id), deltas in by_assignee.items():
+        if column_id in board_of:
+            by_summary[assignee_id, board_of[column_id]].update(deltas)
+    for (user_id, project_id), deltas in by_summary.items():
+        if any(deltas.values()):
+            increment(
+                AssignmentSummary,
+                {"user_id": user_id, "project_id": project_id},
+                {field: deltas[field] for field in ASSIGNMENT_FIELDS},
+            )
+
+
+def recount(column_model, project_model, task_model, batch_size=500):
+    """Recompute every counter in batches; returns the number of rows that were wrong."""
+    repaired = 0
+    open_priority = {
+        f"open_{priority}_count": Count("id", filter=Q(is_complete=False, priority=priority))
+        for priority in PRIORITIES
+    }
+
+    column_ids = list(column_model.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(column_ids), batch_size):
+        batch = column_ids[start:start + batch_size]
+        counts = {
+            row.pop("column_id"): row
+            for row in task_model.objects.filter(column_id__in=batch)
+            .order_by()
+            .values("column_id")
+            .annotate(
+                task_count=Count("id"),
+                completed_task_count=Count("id", filter=Q(is_complete=True)),
+                **open_priority,
+            )
+        }
+        repaired += _store(column_model, batch, counts)
+
+    project_ids = list(project_model.objects.order_by("id").values_list("id", flat=True))
+    for start in range(0, len(project_ids), batch_size):
+        batch = project_ids[start:start + batch_size]
+        counts = {
+            row.pop("board_id"): row
+            for row in column_model.objects.filter(board_id__in=batch)
+            .order_by()
+            .values("board_id")
+            .annotate(**{field: Sum(field) for field in COUNTER_FIELDS})
+        }
+        repaired += _store(project_model, batch, counts)
+    return repaired
+
+
+def _store(model, ids, counts):
+    stale = []
+    for obj in model.objects.filter(id__in=ids).only("id", *COUNTER_FIELDS):
+        expected = counts.get(obj.id, {})
+        values = {field: expected.get(field) or 0 for field in COUNTER_FIELDS}
+        if any(getattr(obj, field) != value for field, value in values.items()):
+            for field, value in values.items():
+                setattr(obj, field, value)
+            stale.append(obj)
+    model.objects.bulk_update(stale, COUNTER_FIELDS)
+    return len(stale)
+
+
+def recount_assignments(summary_model, task_model, user_ids=None, batch_size=500):
+    """
+    Recompute the ``AssignmentSummary`` rows of ``user_ids`` (default: every
+    user) in batches; returns the number of rows that were wrong.
+    """
+    repaired = 0
+    if user_ids is None:
+        user_ids = set(
+            task_model.objects.filter(assignee__isnull=False).order_by().values_list("assignee_id", flat=True).distinct()
+        ) | set(summary_model.objects.order_by().values_list("user_id", flat=True).distinct())
+    user_ids = sorted(user_ids)
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        counts = {
+            (row.pop("assignee_id"), row.pop("column__board_id")): row
+            for row in task_model.objects.filter(assignee_id__in=batch)
+            .order_by()
+            .values("assignee_id", "column__board_id")
+            .annotate(task_count=Count("id"), completed_task_count=Count("id", filter=Q(is_complete=True)))
+        }
+        stale, seen = [], set()
+        for row in summary_model.objects.filter(user_id__in=batch):
+            key = (row.user_id, row.project_id)
+            seen.add(key)
+            values = counts.get(key, {})
+            if any(getattr(row, field) != values.get(field, 0) for field in ASSIGNMENT_FIELDS):
+                for field in ASSIGNMENT_FIELDS:
+                    setattr(row, field, values.get(field, 0))
+                stale.append(row)
+        summary_model.objects.bulk_update(stale, ASSIGNMENT_FIELDS)
+        missing = [
+            summary_model(user_id=user_id, project_id=project_id, **values)
+            for (user_id, project_id), values in counts.items()
+            if (user_id, project_id) not in seen
+        ]
+        summary_model.objects.bulk_create(missing)
+        repaired += len(stale) + len(missing)
+    return repaired
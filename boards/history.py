@@ -0,0 +1,371 @@
+"""
+Task history for flow metrics.
+
+``TaskEvent`` is an append-only log of what the metrics need: creation,
+moves between columns, completion and reopening, assignment, reorders
+within a column and deletion, as small integer-coded rows. The rollups are
+updated with it, in the same transaction, so no metric replays the log:
+
+* ``FlowDay``: tasks that entered and left each column per day. The
+  cumulative flow of any range is a running sum over those rows.
+* ``TaskCycle``: per task, creation, first move (work started) and last
+  completion, with lead time (created -> completed) and cycle time
+  (started -> completed, or the lead time when it never moved before
+  completing) in seconds.
+* ``CycleDay``: tasks completed per day in each duration bucket
+  (``BUCKET_EDGES``, 25% apart), with the sums of their times. Means are
+  exact; percentiles are interpolated within a bucket. A year is at most a
+  few thousand rows however many tasks were completed.
+
+A move into another project's column is logged as ``MOVED_OUT`` in the old
+project and ``MOVED_IN`` in the new one, so each project's flow books its
+own side of it; the task's ``TaskCycle`` follows it to the new project.
+
+``Task.save`` and the ``post_delete`` signal record their own events; bulk
+writes, imports and reorders call ``record``. Respacing the neighbours of a
+moved card keeps their relative order and is not logged.
+``manage.py rebuild_task_history`` recomputes the rollups from the log.
+"""
+from bisect import bisect_right
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Min, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import counters
+
+TRACKED_FIELDS = ("column_id", "is_complete", "assignee_id", "order")
+CYCLE_FIELDS = ("project", "started_at", "completed_at", "lead_seconds", "cycle_seconds")
+# upper bounds (seconds) of the duration buckets, a minute to about four years; the last bucket is open
+BUCKET_EDGES = tuple(round(60 * 1.25 ** n) for n in range(65))
+
+
+def bucket_of(seconds):
+    return bisect_right(BUCKET_EDGES, seconds)
+
+
+def bucket_bounds(bucket):
+    lower = BUCKET_EDGES[bucket - 1] if bucket else 0
+    return lower, BUCKET_EDGES[bucket] if bucket < len(BUCKET_EDGES) else lower
+
+
+def _kinds():
+    from .models import TaskEvent
+    return TaskEvent.Kind
+
+
+def task_state(task):
+    return task.column_id, task.is_complete, task.assignee_id, task.order
+
+
+def project_of(task):
+    from .models import Column, Task
+    if Task.column.is_cached(task):
+        return task.column.board_id
+    return Column.objects.filter(pk=task.column_id).values_list("board_id", flat=True).first()
+
+
+def _boards_of(*column_ids):
+    from .models import Column
+    return dict(Column.objects.filter(pk__in=column_ids).values_list("id", "board_id"))
+
+
+def task_events(task, previous, project_id=None, now=None, boards=None):
+    """
+    Unsaved events taking ``task`` from ``previous`` (a ``task_state``, or
+    ``None`` for a new task) to its current state. ``boards`` maps column ids
+    to their project where the caller has them at hand.
+    """
+    from .models import TaskEvent
+    Kind = TaskEvent.Kind
+    now = now or timezone.now()
+    column_id, is_complete, assignee_id, order = task_state(task)
+    changes = []
+    left = None
+    if previous is None:
+        was_complete = False
+        changes.append((Kind.CREATED, None, task.created_at or now))
+        if assignee_id is not None:
+            changes.append((Kind.ASSIGNED, assignee_id, task.created_at or now))
+    else:
+        old_column, was_complete, old_assignee, old_order = previous
+        if column_id != old_column:
+            boards = boards or {}
+            if old_column not in boards or (project_id is None and column_id not in boards):
+                boards = {**boards, **_boards_of(old_column, column_id)}
+            project_id = project_id or boards.get(column_id)
+            old_project_id = boards.get(old_column)
+            if old_project_id is not None and old_project_id != project_id:
+                left = TaskEvent(
+                    project_id=old_project_id, task_id=task.pk, kind=Kind.MOVED_OUT,
+                    column_id=old_column, value=column_id, created_at=now,
+                )
+                changes.append((Kind.MOVED_IN, old_column, now))
+            else:
+                changes.append((Kind.MOVED, old_column, now))
+        elif order != old_order:
+            changes.append((Kind.REORDERED, order, now))
+        if assignee_id != old_assignee:
+            changes.append((Kind.ASSIGNED, assignee_id, now))
+    if is_complete and not was_complete:
+        changes.append((Kind.COMPLETED, None, task.completed_at or now))
+    elif was_complete and not is_complete:
+        changes.append((Kind.REOPENED, None, now))
+
+    if not changes:
+        return []
+    if project_id is None:
+        project_id = project_of(task)
+    events = [
+        TaskEvent(project_id=project_id, task_id=task.pk, kind=kind, column_id=column_id, value=value, created_at=at)
+        for kind, value, at in changes
+    ]
+    return events if left is None else [left, *events]
+
+
+def deleted_event(task, project_id):
+    from .models import TaskEvent
+    return TaskEvent(project_id=project_id, task_id=task.pk, kind=TaskEvent.Kind.DELETED, column_id=task.column_id)
+
+
+def reordered_events(tasks, column, now=None):
+    from .models import TaskEvent
+    now = now or timezone.now()
+    return [
+        TaskEvent(
+            project_id=column.board_id, task_id=task.pk, kind=TaskEvent.Kind.REORDERED,
+            column_id=column.id, value=task.order, created_at=now,
+        )
+        for task in tasks
+    ]
+
+
+def record(events):
+    """Append ``events`` (unsaved ``TaskEvent`` rows, oldest first) and update both rollups."""
+    from .models import TaskEvent
+    events = [event for event in events if event.project_id is not None]
+    if not events:
+        return
+    TaskEvent.objects.bulk_create(events)
+    _apply_flow(events)
+    _apply_cycles(events)
+
+
+def _flow_deltas(events):
+    Kind = _kinds()
+    deltas = defaultdict(lambda: [0, 0])
+    for event in events:
+        day = timezone.localdate(event.created_at)
+        if event.kind in (Kind.CREATED, Kind.MOVED, Kind.MOVED_IN):
+            deltas[event.project_id, event.column_id, day][0] += 1
+        if event.kind == Kind.MOVED:
+            deltas[event.project_id, event.value, day][1] += 1
+        elif event.kind in (Kind.DELETED, Kind.MOVED_OUT):
+            deltas[event.project_id, event.column_id, day][1] += 1
+    return deltas
+
+
+def _apply_flow(events):
+    from .models import FlowDay
+    for (project_id, column_id, day), (arrivals, departures) in _flow_deltas(events).items():
+        counters.increment(
+            FlowDay,
+            {"project_id": project_id, "column_id": column_id, "day": day},
+            {"arrivals": arrivals, "departures": departures},
+        )
+
+
+def _seconds(delta):
+    return max(0, int(delta.total_seconds()))
+
+
+def _complete(cycle, at):
+    started = cycle.started_at if cycle.started_at and cycle.started_at < at else cycle.created_at
+    cycle.completed_at = at
+    cycle.lead_seconds = _seconds(at - cycle.created_at)
+    cycle.cycle_seconds = _seconds(at - started)
+
+
+def _count_completion(deltas, cycle, sign):
+    """Add (``sign=1``) or remove (``-1``) the completion of ``cycle`` in ``CycleDay`` deltas."""
+    if cycle.completed_at is None:
+        return
+    day = timezone.localdate(cycle.completed_at)
+    for prefix, seconds in (("lead", cycle.lead_seconds), ("cycle", cycle.cycle_seconds)):
+        row = deltas[cycle.project_id, day, bucket_of(seconds)]
+        row[f"{prefix}_tasks"] += sign
+        row[f"{prefix}_seconds"] += sign * seconds
+
+
+def _apply_cycles(events):
+    from .models import CycleDay, TaskCycle
+    Kind = _kinds()
+    events = [e for e in events if e.kind in (Kind.CREATED, Kind.MOVED, Kind.MOVED_IN, Kind.COMPLETED, Kind.REOPENED)]
+    existing = {e.task_id for e in events if e.kind != Kind.CREATED}
+    cycles = TaskCycle.objects.in_bulk(existing) if existing else {}
+    created, changed = {}, {}
+    completions = defaultdict(Counter)
+    for event in events:
+        cycle = cycles.get(event.task_id)
+        if event.kind == Kind.CREATED:
+            cycles[event.task_id] = created[event.task_id] = TaskCycle(
+                task_id=event.task_id, project_id=event.project_id, created_at=event.created_at
+            )
+            continue
+        if cycle is None:
+            continue
+        if event.kind in (Kind.MOVED, Kind.MOVED_IN):
+            if event.project_id != cycle.project_id:
+                # the completion is counted where the task is now
+                _count_completion(completions, cycle, -1)
+                cycle.project_id = event.project_id
+                _count_completion(completions, cycle, 1)
+            elif cycle.started_at is not None:
+                continue
+            if cycle.started_at is None:
+                cycle.started_at = event.created_at
+        else:
+            _count_completion(completions, cycle, -1)
+            if event.kind == Kind.COMPLETED:
+                _complete(cycle, event.created_at)
+                _count_completion(completions, cycle, 1)
+            else:
+                cycle.completed_at = cycle.lead_seconds = cycle.cycle_seconds = None
+        if event.task_id not in created:
+            changed[event.task_id] = cycle
+    TaskCycle.objects.bulk_create(created.values())
+    TaskCycle.objects.bulk_update(changed.values(), CYCLE_FIELDS)
+    for (project_id, day, bucket), amounts in completions.items():
+        amounts = {field: n for field, n in amounts.items() if n}
+        if amounts:
+            counters.increment(CycleDay, {"project_id": project_id, "day": day, "bucket": bucket}, amounts)
+
+
+def backfill(event_model, tasks, batch_size=1000):
+    """Log creation (and completion) of the ``tasks`` rows as they are now, for tasks from before the history."""
+    Kind = _kinds()
+    rows = tasks.values_list("id", "column_id", "column__board_id", "created_at", "completed_at")
+    batch, written = [], 0
+    for task_id, column_id, project_id, created_at, completed_at in rows.order_by("id").iterator(chunk_size=batch_size):
+        common = {"project_id": project_id, "task_id": task_id, "column_id": column_id}
+        batch.append(event_model(kind=Kind.CREATED, created_at=created_at, **common))
+        if completed_at is not None:
+            batch.append(event_model(kind=Kind.COMPLETED, created_at=max(completed_at, created_at), **common))
+        if len(batch) >= batch_size:
+            written += len(event_model.objects.bulk_create(batch))
+            batch = []
+    written += len(event_model.objects.bulk_create(batch))
+    return written
+
+
+def rebuild(event_model, flow_model, cycle_model, cycle_day_model, project_ids=None, batch_size=1000):
+    """Recompute the rollups from the log, for every project or only ``project_ids``; returns the rows written."""
+    return (
+        rebuild_flow(event_model, flow_model, project_ids, batch_size)
+        + rebuild_cycles(event_model, cycle_model, project_ids, batch_size)
+        + rebuild_cycle_days(cycle_model, cycle_day_model, project_ids, batch_size)
+    )
+
+
+def _scoped(model, project_ids):
+    rows = model.objects.all()
+    return rows if project_ids is None else rows.filter(project_id__in=project_ids)
+
+
+def rebuild_flow(event_model, flow_model, project_ids=None, batch_size=1000):
+    Kind = _kinds()
+    events = _scoped(event_model, project_ids).order_by()
+    deltas = defaultdict(lambda: [0, 0])
+    grouped = (
+        (0, events.filter(kind__in=[Kind.CREATED, Kind.MOVED, Kind.MOVED_IN]).values("project_id", column=F("column_id"))),
+        (1, events.filter(kind=Kind.MOVED).values("project_id", column=F("value"))),
+        (1, events.filter(kind__in=[Kind.DELETED, Kind.MOVED_OUT]).values("project_id", column=F("column_id"))),
+    )
+    for side, rows in grouped:
+        for row in rows.annotate(day=TruncDate("created_at")).values("project_id", "column", "day").annotate(n=Count("id")):
+            deltas[row["project_id"], row["column"], row["day"]][side] += row["n"]
+
+    with transaction.atomic():
+        _scoped(flow_model, project_ids).delete()
+        flow_model.objects.bulk_create(
+            (
+                flow_model(project_id=project_id, column_id=column_id, day=day, arrivals=arrivals, departures=departures)
+                for (project_id, column_id, day), (arrivals, departures) in deltas.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(deltas)
+
+
+def rebuild_cycles(event_model, cycle_model, project_ids=None, batch_size=1000):
+    Kind = _kinds()
+    events = event_model.objects.all()
+    if project_ids is not None:
+        # every event of the tasks seen in these projects: tasks that moved in started elsewhere
+        events = events.filter(task_id__in=_scoped(event_model, project_ids).values("task_id"))
+    rows = (
+        events.values("task_id")
+        .annotate(
+            arrived=Max("id", filter=Q(kind__in=[Kind.CREATED, Kind.MOVED_IN])),
+            created=Min("created_at", filter=Q(kind=Kind.CREATED)),
+            started=Min("created_at", filter=Q(kind__in=[Kind.MOVED, Kind.MOVED_IN])),
+            completed=Max("created_at", filter=Q(kind=Kind.COMPLETED)),
+            last_completed=Max("id", filter=Q(kind=Kind.COMPLETED)),
+            last_reopened=Max("id", filter=Q(kind=Kind.REOPENED)),
+        )
+        .filter(created__isnull=False)
+        .order_by()
+    )
+
+    def write(batch):
+        # the task's project is the one of its last arrival
+        projects = dict(event_model.objects.filter(id__in=[row["arrived"] for row in batch]).values_list("id", "project_id"))
+        cycles = []
+        for row in batch:
+            project_id = projects[row["arrived"]]
+            if project_ids is not None and project_id not in project_ids:
+                continue
+            cycle = cycle_model(
+                task_id=row["task_id"], project_id=project_id, created_at=row["created"], started_at=row["started"]
+            )
+            if row["last_completed"] and row["last_completed"] > (row["last_reopened"] or 0):
+                _complete(cycle, row["completed"])
+            cycles.append(cycle)
+        cycle_model.objects.filter(task_id__in=[cycle.task_id for cycle in cycles]).delete()
+        return len(cycle_model.objects.bulk_create(cycles))
+
+    written = 0
+    with transaction.atomic():
+        _scoped(cycle_model, project_ids).delete()
+        batch = []
+        for row in rows.iterator(chunk_size=batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                written += write(batch)
+                batch = []
+        written += write(batch)
+    return written
+
+
+def rebuild_cycle_days(cycle_model, cycle_day_model, project_ids=None, batch_size=1000):
+    deltas = defaultdict(Counter)
+    rows = (
+        _scoped(cycle_model, project_ids)
+        .filter(completed_at__isnull=False)
+        .only("project_id", "completed_at", "lead_seconds", "cycle_seconds")
+        .order_by()
+    )
+    for cycle in rows.iterator(chunk_size=batch_size):
+        _count_completion(deltas, cycle, 1)
+    with transaction.atomic():
+        _scoped(cycle_day_model, project_ids).delete()
+        cycle_day_model.objects.bulk_create(
+            (
+                cycle_day_model(project_id=project_id, day=day, bucket=bucket, **amounts)
+                for (project_id, day, bucket), amounts in deltas.items()
+            ),
+            batch_size=batch_size,
+        )
+    return len(deltas)
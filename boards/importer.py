@@ -0,0 +1,270 @@
+"""
+Import of a project exported by ``boards.export`` (NDJSON or CSV).
+
+Records are read as a stream and written in chunks: each chunk is one
+transaction holding the ``bulk_create`` of its rows, the new ids the
+following records refer to (``ImportedRow``), the counter deltas, the task
+history, the search index rows and the job's ``rows_done``. A failed run
+keeps everything committed before the failing chunk and ``resume`` carries
+on from there with the same file.
+
+The importing user owns the new project; users named in the file are
+matched by username and left empty (authors: the importing user) when
+they do not exist here. Creation times are those of the import.
+"""
+import codecs
+import csv
+import json
+import time
+from itertools import groupby, islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from projects.models import Project, ProjectsMember
+from taskflow.response_cache import bump_project_generation
+from . import counters, history, search
+from .models import Board, Column, ImportedRow, Label, ProjectImport, Task, TaskComment
+
+User = get_user_model()
+TaskLabel = Task.labels.through
+
+CHUNK_SIZE = 1000
+FORMATS = ("ndjson", "csv")
+# sections whose ids later records refer to
+MAPPED_SECTIONS = ("project", "column", "label", "task")
+
+
+class ImportFailed(Exception):
+    pass
+
+
+def _lines(stream):
+    """Text lines of a file opened in either mode (uploads are binary)."""
+    stream = iter(stream)
+    first = next(stream, None)
+    if first is None:
+        return
+    if isinstance(first, bytes):
+        decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        yield decoder.decode(first)
+        for line in stream:
+            yield decoder.decode(line)
+    else:
+        yield first.lstrip("﻿")
+        yield from stream
+
+
+def read_ndjson(stream):
+    for number, line in enumerate(_lines(stream), 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            section = record.pop("type")
+        except (ValueError, KeyError, AttributeError):
+            raise ImportFailed(f"line {number}: not an export record")
+        yield section, record
+
+
+def read_csv(stream):
+    fields = None
+    for number, row in enumerate(csv.reader(_lines(stream)), 1):
+        if not row:
+            continue
+        if row[0].startswith("#"):
+            fields = row[1:]
+            continue
+        if fields is None or len(row) != len(fields) + 1:
+            raise ImportFailed(f"row {number}: does not match its section header")
+        yield row[0], {name: value if value != "" else None for name, value in zip(fields, row[1:])}
+
+
+READERS = {"ndjson": read_ndjson, "csv": read_csv}
+
+
+def format_for(filename, default="ndjson"):
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    return extension if extension in FORMATS else default
+
+
+class ProjectImporter:
+    def __init__(self, job, user, chunk_size=None, progress=None):
+        self.job = job
+        self.user = user
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        # called with (rows_done, rows per second) after every committed chunk
+        self.progress = progress
+        self.ids = {section: {} for section in MAPPED_SECTIONS}
+        self.users = {}
+        for section, source_id, target_id in job.id_map.values_list("section", "source_id", "target_id"):
+            self.ids[section][source_id] = target_id
+
+    @classmethod
+    def start(cls, user, source, fmt, **kwargs):
+        job = ProjectImport.objects.create(created_by=user, source=source[:255], format=fmt)
+        return cls(job, user, **kwargs)
+
+    def run(self, stream):
+        """Import ``stream`` (an iterable of lines); returns ``(rows imported, rows per second)``."""
+        records = READERS[self.job.format](stream)
+        skipped = self.job.rows_done
+        records = islice(records, skipped, None)
+
+        started = time.monotonic()
+        try:
+            while True:
+                chunk = list(islice(records, self.chunk_size))
+                if not chunk:
+                    break
+                with transaction.atomic():
+                    self._write(chunk, self.job.rows_done)
+                    self.job.rows_done += len(chunk)
+                    self.job.save(update_fields=["rows_done", "project", "updated_at"])
+                if self.progress:
+                    self.progress(self.job.rows_done, self._rate(self.job.rows_done - skipped, started))
+        except (ImportFailed, ValidationError, ValueError, IntegrityError) as exc:
+            self.job.status = ProjectImport.Status.FAILED
+            self.job.error = "; ".join(exc.messages) if isinstance(exc, ValidationError) else str(exc)
+            self.job.save(update_fields=["status", "error", "updated_at"])
+            raise ImportFailed(self.job.error) from exc
+
+        self.job.status = ProjectImport.Status.DONE
+        self.job.error = ""
+        self.job.save(update_fields=["status", "error", "updated_at"])
+        self.job.id_map.all().delete()
+        imported = self.job.rows_done - skipped
+        return imported, self._rate(imported, started)
+
+    @staticmethod
+    def _rate(rows, started):
+        elapsed = time.monotonic() - started
+        return round(rows / elapsed) if elapsed > 0 else rows
+
+    def _write(self, chunk, offset):
+        self._load_users(chunk)
+        mapped, added = [], []
+        for section, group in groupby(enumerate(chunk, offset + 1), key=lambda item: item[1][0]):
+            build = getattr(self, f"_build_{section}", None)
+            if build is None:
+                raise ImportFailed(f"record {next(group)[0]}: unknown section {section!r}")
+            rows, objects = [], []
+            for number, (_, row) in group:
+                try:
+                    if section in MAPPED_SECTIONS:
+                        row["id"] = int(row["id"])
+                    objects.append(build(row))
+                except (ImportFailed, ValidationError, KeyError, TypeError, ValueError) as exc:
+                    if isinstance(exc, ValidationError):
+                        reason = "; ".join(exc.messages)
+                    else:
+                        reason = f"missing field {exc}" if isinstance(exc, KeyError) else str(exc)
+                    raise ImportFailed(f"record {number} ({section}): {reason}")
+                rows.append(row)
+
+            if section == "project":
+                created = [self._create_project(obj) for obj in objects]
+            else:
+                created = type(objects[0]).objects.bulk_create(objects)
+            if section == "task":
+                added += [counters.task_state(task) for task in created]
+                history.record(
+                    event for task in created for event in history.task_events(task, None, self.job.project_id)
+                )
+                search.index_tasks(created, self.job.project_id)
+            elif section == "comment":
+                search.index_comments(created, self.job.project_id)
+            elif section == "label":
+                search.index_labels(created)
+            if section in MAPPED_SECTIONS:
+                for row, obj in zip(rows, created):
+                    self.ids[section][row["id"]] = obj.id
+                    mapped.append(ImportedRow(job=self.job, section=section, source_id=row["id"], target_id=obj.id))
+
+        ImportedRow.objects.bulk_create(mapped)
+        counters.apply_task_changes(added=added)
+        bump_project_generation(self.job.project_id)
+
+    def _load_users(self, chunk):
+        names = {
+            row[key]
+            for _, row in chunk
+            for key in ("created_by__username", "assignee__username", "author__username")
+            if row.get(key) and row[key] not in self.users
+        }
+        if names:
+            found = dict(User.objects.filter(username__in=names).values_list("username", "id"))
+            self.users.update({name: found.get(name) for name in names})
+
+    def _ref(self, section, source_id):
+        if source_id is None:
+            raise ImportFailed(f"missing {section} reference")
+        try:
+            return self.ids[section][int(source_id)]
+        except (KeyError, ValueError):
+            raise ImportFailed(f"unknown {section} {source_id}")
+
+    @staticmethod
+    def _clean(model, row, *names):
+        values = {}
+        for name in names:
+            field = model._meta.get_field(name)
+            value = row.get(name) if name in row else field.get_default()
+            if value is None and field.empty_strings_allowed and not field.null:
+                value = ""
+            value = field.to_python(value)
+            # no blank check: exported rows may hold values the API forms would not accept
+            if value is None and not field.null:
+                raise ValidationError(f"{name} is required")
+            if field.choices and value not in dict(field.flatchoices):
+                raise ValidationError(f"{name}: invalid choice {value!r}")
+            field.run_validators(value)
+            values[name] = value
+        return values
+
+    def _create_project(self, project):
+        if self.job.project_id:
+            raise ImportFailed("more than one project in the file")
+        project.save()
+        ProjectsMember.objects.create(project=project, user=self.user, role=ProjectsMember.Role.OWNER)
+        self.job.project = project
+        return project
+
+    def _project_id(self):
+        if not self.job.project_id:
+            raise ImportFailed("the project record must come first")
+        return self.job.project_id
+
+    def _build_project(self, row):
+        return Project(owner=self.user, **self._clean(Project, row, "name", "description", "is_archived"))
+
+    def _build_board(self, row):
+        return Board(project_id=self._project_id(), **self._clean(Board, row, "name", "description", "is_default"))
+
+    def _build_column(self, row):
+        return Column(board_id=self._project_id(), **self._clean(Column, row, "name", "order"))
+
+    def _build_label(self, row):
+        return Label(project_id=self._project_id(), **self._clean(Label, row, "name", "color"))
+
+    def _build_task(self, row):
+        task = Task(
+            column_id=self._ref("column", row.get("column_id")),
+            created_by_id=self.users.get(row.get("created_by__username")),
+            assignee_id=self.users.get(row.get("assignee__username")),
+            **self._clean(Task, row, "title", "description", "priority", "due_date", "is_complete", "completed_at", "order"),
+        )
+        # exports from before completed_at existed, or with values that contradict is_complete
+        task.mark_completion()
+        return task
+
+    def _build_task_label(self, row):
+        return TaskLabel(task_id=self._ref("task", row.get("task_id")), label_id=self._ref("label", row.get("label_id")))
+
+    def _build_comment(self, row):
+        return TaskComment(
+            task_id=self._ref("task", row.get("task_id")),
+            author_id=self.users.get(row.get("author__username")) or self.user.id,
+            **self._clean(TaskComment, row, "content"),
+        )
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from taskflow import benchmark
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed synthetic data and report p50/p95 latency and queries per request for every API URL "
+        "as JSON. Everything it writes is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmark.DEFAULT_SCALE.items():
+            parser.add_argument(f"--{name}", type=int, default=default, help=f"Scale: {name} (default {default}).")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed requests per endpoint.")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per endpoint.")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic data.")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+        parser.add_argument("--compare", help="A previous report to print p50/p95 changes against.")
+
+    def handle(self, *args, **options):
+        scale = {name: options[name] for name in benchmark.DEFAULT_SCALE}
+        if scale["users"] < 2 or scale["projects"] < 2 or scale["columns"] < 2 or scale["labels"] < 2 or scale["tasks"] < 1:
+            raise CommandError("At least 2 users, projects, columns and labels and 1 task are needed.")
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be positive.")
+
+        try:
+            with transaction.atomic():
+                data = benchmark.seed(options["seed"], **scale)
+                endpoints = benchmark.run(data, options["iterations"], options["warmup"])
+                raise Rollback
+        except Rollback:
+            pass
+
+        result = benchmark.report(endpoints, scale, options["iterations"], options["seed"])
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(benchmark.dumps(result))
+            self.stderr.write(f"Report written to {options['output']}.")
+        else:
+            self.stdout.write(benchmark.dumps(result), ending="")
+
+        if options["compare"]:
+            with open(options["compare"]) as fh:
+                baseline = json.load(fh)
+            self.stderr.write(f"{'endpoint':<60} {'p50 before':>10} {'p50 after':>10} {'change':>8}")
+            for key, before, after, change in benchmark.compare(baseline, result):
+                self.stderr.write(f"{key:<60} {before:>10.2f} {after:>10.2f} {change:>+7.1f}%")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from taskflow import benchmark
+
+MODES = ("sync", "async")
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the task list, board snapshot, comment list and label list through the ASGI handler from many "
+        "concurrent connections, served by the DRF views and by the async views, and report throughput, "
+        "latency and memory as JSON. The seeded data is committed while it runs and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        for name, default in benchmark.DEFAULT_SCALE.items():
+            parser.add_argument(f"--{name}", type=int, default=default, help=f"Scale: {name} (default {default}).")
+        parser.add_argument("--connections", type=int, default=500, help="Concurrent connections.")
+        parser.add_argument("--requests", type=int, default=5000, help="Requests per mode.")
+        parser.add_argument("--mode", choices=MODES, action="append", help="Only this mode (repeatable).")
+        parser.add_argument("--seed", type=int, default=1, help="Random seed for the synthetic data.")
+        parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+
+    def handle(self, *args, **options):
+        scale = {name: options[name] for name in benchmark.DEFAULT_SCALE}
+        if scale["users"] < 2 or scale["projects"] < 2 or scale["columns"] < 2 or scale["labels"] < 2 or scale["tasks"] < 1:
+            raise CommandError("At least 2 users, projects, columns and labels and 1 task are needed.")
+        if options["connections"] < 1 or options["requests"] < 1:
+            raise CommandError("--connections and --requests must be positive.")
+
+        data = benchmark.seed(options["seed"], **scale)
+        try:
+            modes = {
+                mode: benchmark.run_concurrent(data, mode, options["connections"], options["requests"])
+                for mode in options["mode"] or MODES
+            }
+        finally:
+            benchmark.unseed(data)
+
+        result = {
+            "meta": benchmark.meta(scale, options["seed"], connections=options["connections"], requests=options["requests"]),
+            "modes": modes,
+        }
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(benchmark.dumps(result))
+            self.stderr.write(f"Report written to {options['output']}.")
+        else:
+            self.stdout.write(benchmark.dumps(result), ending="")
+
+        self.stderr.write(f"{'mode':<6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'threads':>8} {'heap KiB':>10}")
+        for mode, stats in modes.items():
+            self.stderr.write(
+                f"{mode:<6} {stats['throughput_rps']:>9.1f} {stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} "
+                f"{stats['p99_ms']:>9.2f} {stats['peak_threads']:>8} {stats['peak_traced_kib']:>10.1f}"
+            )
@@ -0,0 +1,90 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from boards.models import Column, Label, Task
+from boards.serializers import TASK_ROW_VALUES, TaskSerializer, serialize_task_rows
+from projects.models import Project
+from taskflow.renderers import ORJSONRenderer, orjson
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/second of TaskSerializer against the .values() task row path, and of DRF's "
+        "JSON renderer against ORJSONRenderer. Works on throwaway data that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="1000,10000,100000", help="Comma separated task counts.")
+        parser.add_argument("--repeat", type=int, default=3, help="Best of N runs per measurement.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options["sizes"].split(",")]
+        except ValueError:
+            raise CommandError("--sizes must be comma separated integers.")
+        if orjson is None:
+            self.stdout.write(self.style.WARNING("orjson is not installed; ORJSONRenderer falls back to DRF's."))
+
+        self.stdout.write(f"{'tasks':>8} {'step':<26} {'seconds':>9} {'rows/s':>10}")
+        try:
+            with transaction.atomic():
+                self._run(sizes, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, sizes, repeat):
+        user = get_user_model().objects.create(username="bench-serialization")
+        project = Project.objects.create(name="bench", owner=user)
+        column = Column.objects.create(board=project, name="bench")
+        labels = Label.objects.bulk_create(Label(project=project, name=f"bench-{i}") for i in range(5))
+        through = Task.labels.through
+
+        created = 0
+        for size in sorted(sizes):
+            tasks = Task.objects.bulk_create(
+                (
+                    Task(column=column, title=f"Task {i}", description="x" * 80, order=i,
+                         created_by=user, assignee=user if i % 2 else None)
+                    for i in range(created, size)
+                ),
+                batch_size=1000,
+            )
+            through.objects.bulk_create(
+                (through(task_id=task.id, label_id=labels[task.id % len(labels)].id) for task in tasks),
+                batch_size=1000,
+            )
+            created = max(created, size)
+
+            queryset = Task.objects.filter(column=column).order_by("order", "id")[:size]
+            model_data = self._measure(
+                size, "TaskSerializer", repeat,
+                lambda: TaskSerializer(
+                    queryset.select_related("created_by", "assignee").prefetch_related("labels"), many=True
+                ).data,
+            )
+            row_data = self._measure(
+                size, ".values() rows", repeat, lambda: serialize_task_rows(list(queryset.values(*TASK_ROW_VALUES)))
+            )
+            if [{"created_by": None, **row} for row in model_data] != row_data:
+                raise CommandError("The two serialization paths disagree.")
+            self._measure(size, "JSONRenderer", repeat, lambda: JSONRenderer().render(row_data))
+            self._measure(size, "ORJSONRenderer", repeat, lambda: ORJSONRenderer().render(row_data))
+
+    def _measure(self, size, step, repeat, func):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        self.stdout.write(f"{size:>8} {step:<26} {best:>9.3f} {size / best:>10.0f}")
+        return result
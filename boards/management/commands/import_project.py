@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from boards.importer import CHUNK_SIZE, FORMATS, ImportFailed, ProjectImporter, format_for
+from boards.models import ProjectImport
+
+
+class Command(BaseCommand):
+    help = "Import a project from an NDJSON or CSV export; --resume continues a failed import."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--user", help="Username of the new project's owner (required unless resuming).")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension, else ndjson.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+        parser.add_argument("--resume", type=int, metavar="IMPORT_ID")
+
+    def handle(self, *args, **options):
+        try:
+            stream = open(options["path"], "rb")
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with stream:
+            self._import(stream, options)
+
+    def _import(self, stream, options):
+        def progress(rows_done, rate):
+            self.stdout.write(f"{rows_done} rows committed ({rate} rows/s)")
+
+        kwargs = {"chunk_size": options["chunk_size"], "progress": progress}
+        if options["resume"]:
+            job = ProjectImport.objects.select_related("created_by").filter(id=options["resume"]).first()
+            if job is None or job.status != ProjectImport.Status.FAILED:
+                raise CommandError(f"No failed import with id {options['resume']}.")
+            job.status = ProjectImport.Status.RUNNING
+            job.save(update_fields=["status", "updated_at"])
+            importer = ProjectImporter(job, job.created_by, **kwargs)
+        else:
+            if not options["user"]:
+                raise CommandError("--user is required.")
+            user = get_user_model().objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"Unknown user {options['user']!r}.")
+            fmt = options["format"] or format_for(options["path"])
+            importer = ProjectImporter.start(user, options["path"], fmt, **kwargs)
+
+        try:
+            rows, rate = importer.run(stream)
+        except ImportFailed as exc:
+            raise CommandError(
+                f"Import {importer.job.id} failed after {importer.job.rows_done} rows: {exc}\n"
+                f"Fix the file and rerun with --resume {importer.job.id}."
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Imported project {importer.job.project_id}: {rows} rows, {rate} rows/s.")
+        )
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from boards import search
+
+
+class Command(BaseCommand):
+    help = "Recreate the full-text search index from the task, comment and label tables."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.rebuild()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
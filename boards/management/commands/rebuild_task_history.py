@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from boards.history import rebuild
+from boards.models import CycleDay, FlowDay, TaskCycle, TaskEvent
+
+
+class Command(BaseCommand):
+    help = "Recompute the daily column flow and the lead/cycle time rollups from the task event log."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--project", type=int, action="append", help="Only this project (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        written = rebuild(
+            TaskEvent, FlowDay, TaskCycle, CycleDay, options["project"], batch_size=options["batch_size"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"{written} rollup rows written."))
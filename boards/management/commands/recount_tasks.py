@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from projects.models import Project
+from boards.counters import recount, recount_assignments
+from boards.models import AssignmentSummary, Column, Task
+
+
+class Command(BaseCommand):
+    help = "Recompute the denormalized task counters of every column and project and the per-user assignment summaries."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        repaired = recount(Column, Project, Task, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{repaired} column/project rows repaired."))
+        repaired = recount_assignments(AssignmentSummary, Task, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"{repaired} assignment summaries repaired."))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from boards.seeding import CHUNK_SIZE, ScaleSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large deterministic dataset (hot projects, long columns, comment-heavy tasks) "
+        "with bulk inserts; --raw writes tasks, task labels and comments with multi-row INSERTs."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--projects", type=int, default=100)
+        parser.add_argument("--members", type=int, default=20, help="Members per project besides the owner.")
+        parser.add_argument("--columns", type=int, default=6, help="Columns per project.")
+        parser.add_argument("--labels", type=int, default=12, help="Labels per project.")
+        parser.add_argument("--tasks", type=int, default=1_000_000)
+        parser.add_argument("--comments", type=float, default=3.0, help="Average comments per task.")
+        parser.add_argument("--raw", action="store_true", help="Multi-row INSERTs instead of bulk_create.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Tasks per transaction.")
+        parser.add_argument("--no-index", action="store_true", help="Skip rebuilding the search index.")
+
+    def handle(self, *args, **options):
+        for name in ("users", "projects", "columns", "labels"):
+            if options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1.")
+        if options["tasks"] < 0 or options["members"] < 0 or options["comments"] < 0 or options["chunk_size"] < 1:
+            raise CommandError("--tasks, --members and --comments can not be negative, --chunk-size must be positive.")
+
+        def progress(done, total):
+            self.stdout.write(f"{done}/{total} tasks")
+
+        seeder = ScaleSeeder(
+            seed=options["seed"], users=options["users"], projects=options["projects"],
+            members=options["members"], columns=options["columns"], labels=options["labels"],
+            tasks=options["tasks"], comments=options["comments"], raw=options["raw"],
+            chunk_size=options["chunk_size"], progress=progress if options["verbosity"] > 1 else None,
+        )
+        seeder.run(index=not options["no_index"])
+
+        self.stdout.write(f"{'table':<12} {'rows':>10} {'insert s':>9} {'rows/s':>10}")
+        for section in ("tasks", "task labels", "comments", "task events", "task cycles"):
+            rows, seconds = seeder.rows[section], seeder.seconds[section]
+            self.stdout.write(f"{section:<12} {rows:>10} {seconds:>9.2f} {rows / seconds if seconds else 0:>10.0f}")
+        rows, seconds = sum(seeder.rows.values()), seeder.seconds["total"]
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} rows in {seconds:.2f}s including generation: {rows / seconds if seconds else 0:.0f} rows/s."
+        ))
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:03
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+# frozen copy of boards.counters.recount as of this migration
+COUNTER_FIELDS = ('task_count', 'completed_task_count', 'open_low_count', 'open_medium_count', 'open_high_count')
+
+
+def fill_counters(apps, schema_editor):
+    Column = apps.get_model('boards', 'Column')
+    Project = apps.get_model('projects', 'Project')
+    Task = apps.get_model('boards', 'Task')
+
+    column_counts = Task.objects.order_by().values('column_id').annotate(
+        task_count=Count('id'),
+        completed_task_count=Count('id', filter=Q(is_complete=True)),
+        **{
+            f'open_{priority}_count': Count('id', filter=Q(is_complete=False, priority=priority))
+            for priority in ('low', 'medium', 'high')
+        },
+    )
+    for row in column_counts:
+        Column.objects.filter(id=row.pop('column_id')).update(**row)
+
+    project_counts = Column.objects.order_by().values('board_id').annotate(
+        **{field: Sum(field) for field in COUNTER_FIELDS}
+    )
+    for row in project_counts:
+        Project.objects.filter(id=row.pop('board_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0005_hot_path_indexes'),
+        ('projects', '0003_task_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='column',
+            name='completed_task_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='open_high_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='open_low_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='open_medium_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='column',
+            name='task_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0006_task_counters'),
+        ('projects', '0003_task_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.PositiveSmallIntegerField(choices=[(1, 'task'), (2, 'column'), (3, 'label'), (4, 'comment'), (5, 'membership')])),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.PositiveSmallIntegerField(choices=[(1, 'created'), (2, 'updated'), (3, 'deleted')])),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='changes', to='projects.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'id'], name='changelog_project_cursor_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from boards import search
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor in search.BACKENDS:
+        search.rebuild(schema_editor)
+
+
+def drop_index(apps, schema_editor):
+    backend = search.BACKENDS.get(schema_editor.connection.vendor)
+    if backend is not None:
+        for sql in backend.drop_sql:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0008_project_import'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
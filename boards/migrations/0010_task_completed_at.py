@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:40
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_completed_at(apps, schema_editor):
+    # the real completion time was never stored; the last update is the closest
+    Task = apps.get_model('boards', 'Task')
+    Task.objects.filter(is_complete=True).update(completed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0009_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(fill_completed_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:56
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+from boards.history import backfill, rebuild
+
+
+def fill_history(apps, schema_editor):
+    # earlier moves were never recorded: each task starts where it is now
+    TaskEvent = apps.get_model('boards', 'TaskEvent')
+    backfill(TaskEvent, apps.get_model('boards', 'Task').objects.all())
+    rebuild(
+        TaskEvent,
+        apps.get_model('boards', 'FlowDay'),
+        apps.get_model('boards', 'TaskCycle'),
+        apps.get_model('boards', 'CycleDay'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0010_task_completed_at'),
+        ('projects', '0003_task_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCycle',
+            fields=[
+                ('task_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('lead_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('cycle_seconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_cycles', to='projects.project')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='CycleDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('lead_tasks', models.PositiveIntegerField(default=0)),
+                ('lead_seconds', models.PositiveBigIntegerField(default=0)),
+                ('cycle_tasks', models.PositiveIntegerField(default=0)),
+                ('cycle_seconds', models.PositiveBigIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cycle_days', to='projects.project')),
+            ],
+            options={
+                'unique_together': {('project', 'day', 'bucket')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FlowDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('column_id', models.BigIntegerField()),
+                ('day', models.DateField()),
+                ('arrivals', models.PositiveIntegerField(default=0)),
+                ('departures', models.PositiveIntegerField(default=0)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='flow_days', to='projects.project')),
+            ],
+            options={
+                'unique_together': {('project', 'day', 'column_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_id', models.BigIntegerField()),
+                ('kind', models.PositiveSmallIntegerField(choices=[(1, 'created'), (2, 'moved'), (3, 'completed'), (4, 'reopened'), (5, 'assigned'), (6, 'reordered'), (7, 'deleted')])),
+                ('column_id', models.BigIntegerField()),
+                ('value', models.BigIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_events', to='projects.project')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['project', 'id'], name='taskevent_project_idx')],
+            },
+        ),
+        migrations.RunPython(fill_history, migrations.RunPython.noop),
+    ]
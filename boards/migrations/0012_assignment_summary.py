@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from boards.counters import recount_assignments
+
+
+def fill_summaries(apps, schema_editor):
+    recount_assignments(apps.get_model('boards', 'AssignmentSummary'), apps.get_model('boards', 'Task'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0011_task_history'),
+        ('projects', '0003_task_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('task_count', models.IntegerField(default=0, editable=False)),
+                ('completed_task_count', models.IntegerField(default=0, editable=False)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['assignee', 'is_complete', 'due_date', 'id'], name='task_assignee_due_idx'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsummary',
+            name='project',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignment_summaries', to='projects.project'),
+        ),
+        migrations.AddField(
+            model_name='assignmentsummary',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignment_summaries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterUniqueTogether(
+            name='assignmentsummary',
+            unique_together={('user', 'project')},
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
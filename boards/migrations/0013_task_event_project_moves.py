@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('boards', '0012_assignment_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='taskevent',
+            name='kind',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'created'), (2, 'moved'), (3, 'completed'), (4, 'reopened'), (5, 'assigned'), (6, 'reordered'), (7, 'deleted'), (8, 'moved out'), (9, 'moved in')]),
+        ),
+    ]
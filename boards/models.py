@@ -1,7 +1,12 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from projects.models import Project
 from django.conf import settings
+from django.utils import timezone
+
+from taskflow.response_cache import bump_project_generation
+from taskflow.saving import saved_fields
+from . import counters, history
 # Create your models here.
 User = get_user_model()
 
@@ -19,11 +24,26 @@ class Column(models.Model):
     name = models.CharField(max_length=100)
     order = models.PositiveIntegerField(default=0)
 
+    # maintained by boards.counters
+    task_count = models.IntegerField(default=0, editable=False)
+    completed_task_count = models.IntegerField(default=0, editable=False)
+    open_low_count = models.IntegerField(default=0, editable=False)
+    open_medium_count = models.IntegerField(default=0, editable=False)
+    open_high_count = models.IntegerField(default=0, editable=False)
+
     def __str__(self):
         return f"{self.name} ({self.board.name})"
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = saved_fields(self)
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ('order',)
+        indexes = [
+            models.Index(fields=["board", "order", "id"], name="column_board_order_idx"),
+        ]
 
 class Label(models.Model):
     project = models.ForeignKey(
@@ -46,6 +66,10 @@ class Label(models.Model):
         return f"{self.name} ({self.project.name})"
 
 
+# saves touching none of these leave counters and history alone
+WATCHED_FIELDS = {"column", "column_id", "is_complete", "priority", "assignee", "assignee_id", "order"}
+
+
 class Task(models.Model):
     class Priority(models.TextChoices):
         LOW = "low", "Low"
@@ -70,6 +94,8 @@ class Task(models.Model):
     )
     due_date = models.DateTimeField(null=True, blank=True)
     is_complete = models.BooleanField(default=False)
+    # when is_complete last turned true (project stats); see mark_completion
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     order = models.PositiveIntegerField(default=0)
@@ -80,9 +106,94 @@ class Task(models.Model):
         blank=True,
     )
 
+    class Meta:
+        indexes = [
+            # tasks of a column in board order (reorder, snapshot, list filtered by column)
+            models.Index(fields=["column", "order", "id"], name="task_column_order_idx"),
+            # keyset pages of /api/tasks/
+            models.Index(fields=["order", "id"], name="task_order_idx"),
+            models.Index(fields=["updated_at", "id"], name="task_updated_idx"),
+            # open work by deadline; completed tasks are never asked for by due date
+            models.Index(
+                fields=["due_date"],
+                condition=models.Q(is_complete=False),
+                name="task_open_due_idx",
+            ),
+            # /api/me/tasks/: a user's open (or completed) tasks by deadline
+            models.Index(fields=["assignee", "is_complete", "due_date", "id"], name="task_assignee_due_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.column.name})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember what the counters were computed from (unless some fields were deferred)
+        if set(counters.TRACKED_FIELDS) <= instance.__dict__.keys():
+            instance._counter_state = counters.task_state(instance)
+        if set(history.TRACKED_FIELDS) <= instance.__dict__.keys():
+            instance._history_state = history.task_state(instance)
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        # remembered for the values before the reload; save() reads them again
+        self.__dict__.pop("_counter_state", None)
+        self.__dict__.pop("_history_state", None)
+
+    def mark_completion(self, now=None):
+        """Keep ``completed_at`` in step with ``is_complete``; writes that bypass ``save`` call it themselves."""
+        if not self.is_complete:
+            self.completed_at = None
+        elif self.completed_at is None:
+            self.completed_at = now or timezone.now()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and not WATCHED_FIELDS & set(update_fields):
+            return super().save(*args, **kwargs)
+        self.mark_completion()
+        if update_fields is not None and "is_complete" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "completed_at"}
+
+        with transaction.atomic():
+            previous = history_previous = None
+            if not self._state.adding:
+                previous = getattr(self, "_counter_state", None)
+                history_previous = getattr(self, "_history_state", None)
+                if previous is None or history_previous is None:
+                    row = Task.objects.filter(pk=self.pk).values_list(
+                        *counters.TRACKED_FIELDS, *history.TRACKED_FIELDS
+                    ).first()
+                    if row is not None:
+                        size = len(counters.TRACKED_FIELDS)
+                        previous, history_previous = row[:size], row[size:]
+                        # the post_save handlers compare against it too
+                        self._counter_state = previous
+            super().save(*args, **kwargs)
+            current = counters.task_state(self)
+            if previous != current:
+                counters.apply_task_changes(removed=[previous] if previous else [], added=[current])
+            self._counter_state = current
+            history.record(history.task_events(self, history_previous))
+            self._history_state = history.task_state(self)
+
+
+class AssignmentSummary(models.Model):
+    """Tasks assigned to ``user`` in ``project``; kept by ``boards.counters`` like the column counters."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="assignment_summaries")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="assignment_summaries")
+    task_count = models.IntegerField(default=0, editable=False)
+    completed_task_count = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        unique_together = ("user", "project")
+
+    def __str__(self):
+        return f"{self.user_id} @ {self.project_id}: {self.task_count}"
+
+
 class TaskComment(models.Model):
     task = models.ForeignKey(
         Task,
@@ -100,6 +211,165 @@ class TaskComment(models.Model):
 
     class Meta:
         ordering = ("created_at",)
+        indexes = [
+            models.Index(fields=["task", "created_at"], name="comment_task_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Comment by {self.author} on {self.task}"
+
+class ChangeLog(models.Model):
+    """
+    Append-only record of writes to a project's board data; the id is the
+    sync cursor of ``/api/projects/<id>/changes/``. Deletes are kept as
+    tombstones so clients can drop their local copies.
+    """
+    class Entity(models.IntegerChoices):
+        TASK = 1, "task"
+        COLUMN = 2, "column"
+        LABEL = 3, "label"
+        COMMENT = 4, "comment"
+        MEMBERSHIP = 5, "membership"
+
+    class Action(models.IntegerChoices):
+        CREATED = 1, "created"
+        UPDATED = 2, "updated"
+        DELETED = 3, "deleted"
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="changes")
+    entity = models.PositiveSmallIntegerField(choices=Entity.choices)
+    object_id = models.BigIntegerField()
+    action = models.PositiveSmallIntegerField(choices=Action.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "id"], name="changelog_project_cursor_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entity_display()} {self.object_id} {self.get_action_display()}"
+
+    @classmethod
+    def record(cls, project_id, entity, action, object_ids):
+        if project_id is None:
+            return
+        # every logged write also retires the project's cached responses
+        bump_project_generation(project_id)
+        cls.objects.bulk_create(
+            cls(project_id=project_id, entity=entity, object_id=pk, action=action) for pk in object_ids
+        )
+
+
+class TaskEvent(models.Model):
+    """
+    Append-only, compact history of tasks for flow metrics (see
+    ``boards.history``). ``column_id`` is the task's column after the event
+    (the column it left, for ``MOVED_OUT``); ids are plain integers so the
+    history outlives deleted tasks and columns.
+    """
+    class Kind(models.IntegerChoices):
+        CREATED = 1, "created"
+        MOVED = 2, "moved"
+        COMPLETED = 3, "completed"
+        REOPENED = 4, "reopened"
+        ASSIGNED = 5, "assigned"
+        REORDERED = 6, "reordered"
+        DELETED = 7, "deleted"
+        # a move between projects: left the old project's column, entered the new one's
+        MOVED_OUT = 8, "moved out"
+        MOVED_IN = 9, "moved in"
+
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="task_events")
+    task_id = models.BigIntegerField()
+    kind = models.PositiveSmallIntegerField(choices=Kind.choices)
+    column_id = models.BigIntegerField()
+    # previous column (moved, moved in), new column (moved out), new assignee (assigned) or new order (reordered)
+    value = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["project", "id"], name="taskevent_project_idx"),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} {self.get_kind_display()}"
+
+
+class FlowDay(models.Model):
+    """Tasks that entered and left a column on one day; rollup of ``TaskEvent``."""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="flow_days")
+    column_id = models.BigIntegerField()
+    day = models.DateField()
+    arrivals = models.PositiveIntegerField(default=0)
+    departures = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("project", "day", "column_id")
+
+
+class TaskCycle(models.Model):
+    """
+    Creation, first move and last completion of a task, with its lead and
+    cycle time in seconds while it is complete; rollup of ``TaskEvent``.
+    """
+    task_id = models.BigIntegerField(primary_key=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="task_cycles")
+    created_at = models.DateTimeField()
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    lead_seconds = models.PositiveIntegerField(null=True, blank=True)
+    cycle_seconds = models.PositiveIntegerField(null=True, blank=True)
+
+
+class CycleDay(models.Model):
+    """
+    Tasks completed on one day whose lead (cycle) time falls in ``bucket``
+    (see ``boards.history.BUCKET_EDGES``), and the sum of those times.
+    """
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name="cycle_days")
+    day = models.DateField()
+    bucket = models.PositiveSmallIntegerField()
+    lead_tasks = models.PositiveIntegerField(default=0)
+    lead_seconds = models.PositiveBigIntegerField(default=0)
+    cycle_tasks = models.PositiveIntegerField(default=0)
+    cycle_seconds = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("project", "day", "bucket")
+
+
+class ProjectImport(models.Model):
+    """
+    One run of ``boards.importer``. ``rows_done`` counts the source records
+    committed so far, so a failed import is resumed by skipping that many.
+    """
+    class Status(models.TextChoices):
+        RUNNING = "running", "Running"
+        FAILED = "failed", "Failed"
+        DONE = "done", "Done"
+
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, related_name="project_imports")
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, null=True, blank=True, related_name="imports")
+    source = models.CharField(max_length=255)
+    format = models.CharField(max_length=10)
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.RUNNING)
+    rows_done = models.PositiveBigIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
-        return f"Comment by {self.author} on {self.task}"
\ No newline at end of file
+        return f"Import {self.id} of {self.source} ({self.status})"
+
+
+class ImportedRow(models.Model):
+    """Source id -> new id of the rows an import still needs to resolve references to."""
+    job = models.ForeignKey(ProjectImport, on_delete=models.CASCADE, related_name="id_map")
+    section = models.CharField(max_length=16)
+    source_id = models.BigIntegerField()
+    target_id = models.BigIntegerField()
+
+    class Meta:
+        unique_together = ("job", "section", "source_id")
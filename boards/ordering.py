@@ -0,0 +1,39 @@
+"""
+Sparse ``order`` keys for columns and tasks.
+
+Rows are spaced ORDER_GAP apart so a single card can be dropped between two
+neighbours by writing only its own row. When two neighbours end up adjacent
+the whole list is respaced once, which keeps moves O(1) amortized.
+"""
+
+ORDER_GAP = 1024
+
+
+def order_for_position(index):
+    return (index + 1) * ORDER_GAP
+
+
+def rank_between(lower, upper):
+    """
+    An order value strictly between ``lower`` and ``upper`` (``None`` is an open
+    end), or ``None`` when the neighbours leave no room and a rebalance is needed.
+    """
+    if lower is None and upper is None:
+        return ORDER_GAP
+    if upper is None:
+        return lower + ORDER_GAP
+    low = -1 if lower is None else lower
+    if upper - low < 2:
+        return None
+    return (low + upper) // 2
+
+
+def respace(rows):
+    """Give ``rows`` (already in the wanted order) evenly spaced keys; return the rows that changed."""
+    changed = []
+    for index, row in enumerate(rows):
+        order = order_for_position(index)
+        if row.order != order:
+            row.order = order
+            changed.append(row)
+    return changed
@@ -0,0 +1,156 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on ``(field, id)``. Each page is a single indexed range
+    query of page_size + 1 rows, so deep pages cost the same as the first one.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    page_size = 50
+    max_page_size = 200
+
+    # ordering name -> (field, descending)
+    orderings = {
+        "order": ("order", False),
+        "-updated_at": ("updated_at", True),
+    }
+    default_ordering = "order"
+
+    def get_page_size(self, request):
+        page_size = self.page_size
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                page_size = int(raw)
+            except ValueError:
+                raise ValidationError({self.page_size_query_param: "باید عدد صحیح باشد."})
+            if page_size < 1:
+                raise ValidationError({self.page_size_query_param: "باید بزرگ‌تر از صفر باشد."})
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.orderings:
+            raise ValidationError({self.ordering_query_param: f"مقادیر مجاز: {', '.join(self.orderings)}"})
+        return ordering
+
+    def encode_cursor(self, ordering, value, pk):
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        raw = json.dumps([ordering, value, pk], separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, cursor, ordering):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            cursor_ordering, value, pk = json.loads(raw)
+            if cursor_ordering != ordering:
+                raise ValueError
+            return self.parse_cursor_value(self.orderings[ordering][0], value), int(pk)
+        except (ValueError, TypeError, json.JSONDecodeError):
+            raise NotFound("cursor نامعتبر است.")
+
+    def parse_cursor_value(self, field, value):
+        return datetime.fromisoformat(value) if field.endswith("_at") else int(value)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.get_page(list(self.get_page_queryset(queryset, request)))
+
+    def get_page_queryset(self, queryset, request):
+        """The page's range query (page_size + 1 rows); evaluate it and pass the rows to ``get_page``."""
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        field, descending = self.orderings[self.ordering]
+        self.page_size_value = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            value, pk = self.decode_cursor(cursor, self.ordering)
+            op = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field}__{op}": value}) | Q(**{field: value, f"id__{op}": pk})
+            )
+
+        prefix = "-" if descending else ""
+        return queryset.order_by(f"{prefix}{field}", f"{prefix}id")[: self.page_size_value + 1]
+
+    def get_page(self, rows):
+        field = self.orderings[self.ordering][0]
+        page_size = self.page_size_value
+        self.next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            last = rows[-1]
+            # rows are model instances or, on the .values() read path, dicts
+            if isinstance(last, dict):
+                value, pk = last[field], last["id"]
+            else:
+                value, pk = getattr(last, field), last.pk
+            self.next_cursor = self.encode_cursor(self.ordering, value, pk)
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class DueDatePagination(KeysetPagination):
+    """
+    Keyset pages in due date order, tasks without a due date last. The dated
+    and the undated tasks are two ranges of the ``(..., due_date, id)`` index:
+    a page reads the dated range and, when that runs out, the undated one, so
+    it takes at most two range queries wherever it starts.
+    """
+    orderings = {"due_date": ("due_date", False)}
+    default_ordering = "due_date"
+
+    def parse_cursor_value(self, field, value):
+        # null once the pages have reached the undated tasks
+        return None if value is None else datetime.fromisoformat(value)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(request)
+        self.page_size_value = self.get_page_size(request)
+        limit = self.page_size_value + 1
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        value, pk = self.decode_cursor(cursor, self.ordering) if cursor else (None, None)
+        rows = []
+        if not cursor or value is not None:
+            dated = queryset.filter(due_date__isnull=False)
+            if cursor:
+                dated = dated.filter(Q(due_date__gt=value) | Q(due_date=value, id__gt=pk))
+            rows = list(dated.order_by("due_date", "id")[:limit])
+        if len(rows) < limit:
+            undated = queryset.filter(due_date__isnull=True)
+            if cursor and value is None:
+                undated = undated.filter(id__gt=pk)
+            rows += undated.order_by("id")[: limit - len(rows)]
+        return self.get_page(rows)
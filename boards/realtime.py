@@ -0,0 +1,187 @@
+"""
+Board change feed.
+
+Model signals and the reorder/move views publish small events on the
+``board:<project id>`` channel of a broker; ``BoardFeedConsumer`` streams a
+channel to WebSocket clients mounted by ``taskflow.asgi``. The broker is
+pluggable (``REALTIME_BROKER`` setting); ``LocalBroker`` fans out within one
+process and is what tests use.
+"""
+import asyncio
+import json
+import re
+import threading
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import close_old_connections, transaction
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from projects.access import get_project_access
+from .models import Board
+
+# queued in place of the backlog of a subscriber that fell too far behind
+OVERFLOW = object()
+
+
+class Broker:
+    """Interface every broker implements."""
+
+    def publish(self, channel, message):
+        """Deliver ``message`` (a JSON-serializable dict) to the subscribers of ``channel``."""
+        raise NotImplementedError
+
+    def subscribe(self, channel):
+        """Return a ``Subscription`` bound to the running event loop."""
+        raise NotImplementedError
+
+
+class Subscription:
+    def __init__(self, broker, channel, maxsize):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def deliver(self, message):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # a client that cannot keep up is disconnected rather than buffered forever
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(OVERFLOW)
+
+    async def get(self):
+        message = await self.queue.get()
+        if message is OVERFLOW:
+            raise OverflowError(self.channel)
+        return message
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker(Broker):
+    """In-process fan-out; ``publish`` may be called from any thread."""
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # loop already closed
+                self.unsubscribe(subscription)
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel, self.maxsize)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    return import_string(getattr(settings, "REALTIME_BROKER", "boards.realtime.LocalBroker"))()
+
+
+def board_channel(project_id):
+    return f"board:{project_id}"
+
+
+def publish_board_event(project_id, event, **data):
+    """Publish ``event`` to the board of ``project_id`` once the current transaction commits."""
+    message = {"event": event, **data}
+    transaction.on_commit(lambda: get_broker().publish(board_channel(project_id), message))
+
+
+FEED_PATH_RE = re.compile(r"^/ws/boards/(?P<board_id>\d+)/$")
+
+
+def _resolve_feed(board_id, token):
+    """Project id of ``board_id`` if the token's user may read it, else ``None``."""
+    close_old_connections()
+    try:
+        try:
+            user_id = AccessToken(token)[jwt_settings.USER_ID_CLAIM]
+        except (TokenError, KeyError):
+            return None
+        user = get_user_model().objects.filter(pk=user_id, is_active=True).first()
+        project_id = Board.objects.filter(pk=board_id).values_list("project_id", flat=True).first()
+        if user is None or project_id is None or not get_project_access(user).can_access(project_id):
+            return None
+        return project_id
+    finally:
+        close_old_connections()
+
+
+class BoardFeedConsumer:
+    """
+    ASGI WebSocket app for ``/ws/boards/<board id>/?token=<JWT access token>``.
+    Sends one JSON text frame per board event; client frames are ignored.
+    """
+
+    async def __call__(self, scope, receive, send):
+        match = FEED_PATH_RE.match(scope["path"])
+        message = await receive()
+        if message["type"] != "websocket.connect":
+            return
+
+        token = parse_qs(scope.get("query_string", b"").decode()).get("token")
+        project_id = None
+        if match and token:
+            project_id = await sync_to_async(_resolve_feed)(int(match["board_id"]), token[0])
+        if project_id is None:
+            await send({"type": "websocket.close", "code": 4403})
+            return
+
+        subscription = get_broker().subscribe(board_channel(project_id))
+        await send({"type": "websocket.accept"})
+        try:
+            await self._pump(subscription, receive, send)
+        finally:
+            subscription.close()
+
+    async def _pump(self, subscription, receive, send):
+        client = asyncio.ensure_future(receive())
+        while True:
+            event = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait({client, event}, return_when=asyncio.FIRST_COMPLETED)
+            if client in done:
+                event.cancel()
+                if client.result()["type"] == "websocket.disconnect":
+                    return
+                client = asyncio.ensure_future(receive())
+            if event in done:
+                try:
+                    message = event.result()
+                except OverflowError:
+                    client.cancel()
+                    await send({"type": "websocket.close", "code": 4008})
+                    return
+                await send({"type": "websocket.send", "text": json.dumps(message)})
@@ -0,0 +1,240 @@
+"""
+Full-text search over task titles/descriptions, comments and label names.
+
+``search_index`` holds one row per searchable object, keyed by
+``rowid = object_id * 4 + kind`` so a write replaces its row with a single
+keyed statement. On SQLite it is an FTS5 table ranked with ``bm25``; on
+PostgreSQL a plain table with a generated ``tsvector`` column under a GIN
+index, ranked with ``ts_rank``. The signals in ``boards.signals`` and the
+bulk/import paths keep it in step with the models;
+``manage.py rebuild_search_index`` recreates it from scratch.
+
+On other databases there is no index: the writes below do nothing and only
+``search`` (the search endpoint) raises ``ImproperlyConfigured``.
+``search_index`` is not a model table, so ``manage.py flush`` leaves it
+alone; run ``rebuild_search_index`` after a flush.
+"""
+import html
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+
+TASK, COMMENT, LABEL = 1, 2, 3
+KINDS = {TASK: "task", COMMENT: "comment", LABEL: "label"}
+KIND_IDS = {name: kind for kind, name in KINDS.items()}
+
+# wrapped around matches by the database, swapped for <mark> after escaping
+START, STOP = "\x02", "\x03"
+SNIPPET_WORDS = 16
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def row_id(kind, object_id):
+    return object_id * 4 + kind
+
+
+class SQLiteSearch:
+    create_sql = [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+        "kind UNINDEXED, object_id UNINDEXED, project_id UNINDEXED, task_id UNINDEXED, title, body)",
+    ]
+    drop_sql = ["DROP TABLE IF EXISTS search_index"]
+
+    def match_expression(self, tokens):
+        # every word must match; the last one may be unfinished
+        return " ".join(f'"{token}"' for token in tokens) + "*"
+
+    def query(self, tokens, project_ids, kinds, limit):
+        kinds_sql = ", ".join(str(kind) for kind in kinds)
+        sql = f"""
+            SELECT kind, object_id, project_id, task_id,
+                   highlight(search_index, 4, %s, %s),
+                   snippet(search_index, 5, %s, %s, '…', {SNIPPET_WORDS}),
+                   bm25(search_index, 0, 0, 0, 0, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS score
+            FROM search_index
+            WHERE search_index MATCH %s
+              AND project_id IN (SELECT value FROM json_each(%s))
+              AND kind IN ({kinds_sql})
+            ORDER BY score
+            LIMIT %s
+        """
+        params = [START, STOP, START, STOP, self.match_expression(tokens), _json_ids(project_ids), limit]
+        return sql, params
+
+
+class PostgresSearch:
+    create_sql = [
+        "CREATE TABLE IF NOT EXISTS search_index ("
+        "rowid bigint PRIMARY KEY, kind smallint NOT NULL, object_id bigint NOT NULL, "
+        "project_id bigint NOT NULL, task_id bigint, title text NOT NULL DEFAULT '', body text NOT NULL DEFAULT '', "
+        "document tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')) STORED)",
+        "CREATE INDEX IF NOT EXISTS search_index_document_idx ON search_index USING GIN (document)",
+        "CREATE INDEX IF NOT EXISTS search_index_project_idx ON search_index (project_id)",
+    ]
+    drop_sql = ["DROP TABLE IF EXISTS search_index"]
+
+    def query(self, tokens, project_ids, kinds, limit):
+        headline = f"StartSel={START}, StopSel={STOP}, HighlightAll=true"
+        snippet = f"StartSel={START}, StopSel={STOP}, MaxWords={SNIPPET_WORDS}, MinWords=5"
+        sql = """
+            SELECT kind, object_id, project_id, task_id,
+                   ts_headline('simple', title, query, %s),
+                   ts_headline('simple', body, query, %s),
+                   -ts_rank(document, query) AS score
+            FROM search_index, to_tsquery('simple', %s) AS query
+            WHERE document @@ query AND project_id = ANY(%s) AND kind = ANY(%s)
+            ORDER BY score
+            LIMIT %s
+        """
+        expression = " & ".join(f"{token}:*" for token in tokens)
+        return sql, [headline, snippet, expression, list(project_ids), list(kinds), limit]
+
+
+BACKENDS = {"sqlite": SQLiteSearch, "postgresql": PostgresSearch}
+
+
+def available():
+    return connection.vendor in BACKENDS
+
+
+def get_backend(vendor=None):
+    vendor = vendor or connection.vendor
+    try:
+        return BACKENDS[vendor]()
+    except KeyError:
+        raise ImproperlyConfigured(f"Full-text search is not available on {vendor}.")
+
+
+def _json_ids(ids):
+    return "[" + ",".join(str(int(pk)) for pk in ids) + "]"
+
+
+def _highlight(text):
+    text = html.escape(text or "")
+    return text.replace(START, "<mark>").replace(STOP, "</mark>")
+
+
+def search(project_ids, q, kinds=tuple(KINDS), limit=20):
+    """Ranked matches of ``q`` inside ``project_ids``, best first."""
+    backend = get_backend()
+    tokens = TOKEN_RE.findall(q)
+    if not tokens or not project_ids:
+        return []
+    sql, params = backend.query(tokens, project_ids, kinds, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {
+            "type": KINDS[kind],
+            "id": object_id,
+            "project": project_id,
+            "task": task_id,
+            "title": _highlight(title),
+            "snippet": _highlight(snippet),
+        }
+        for kind, object_id, project_id, task_id, title, snippet, _ in rows
+    ]
+
+
+# -- maintenance -----------------------------------------------------------
+
+def _write(rows):
+    """Replace the index rows of ``rows``: ``(kind, object_id, project_id, task_id, title, body)``."""
+    rows = [row for row in rows if row[2] is not None]
+    if not rows or not available():
+        return
+    with connection.cursor() as cursor:
+        _delete(cursor, [row_id(row[0], row[1]) for row in rows])
+        cursor.executemany(
+            "INSERT INTO search_index (rowid, kind, object_id, project_id, task_id, title, body) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [(row_id(row[0], row[1]), *row[:4], row[4] or "", row[5] or "") for row in rows],
+        )
+
+
+def _delete(cursor, rowids):
+    # chunked to stay under SQLite's bound-parameter limit
+    for start in range(0, len(rowids), 500):
+        batch = rowids[start:start + 500]
+        cursor.execute(
+            f"DELETE FROM search_index WHERE rowid IN ({', '.join(['%s'] * len(batch))})", batch
+        )
+
+
+def index_tasks(tasks, project_id=None):
+    """``project_id`` is looked up per column when not given."""
+    tasks = list(tasks)
+    if project_id is None:
+        from .models import Column
+        projects = dict(
+            Column.objects.filter(id__in={t.column_id for t in tasks}).values_list("id", "board_id")
+        )
+    _write(
+        (TASK, t.id, project_id or projects.get(t.column_id), t.id, t.title, t.description)
+        for t in tasks
+    )
+
+
+def index_comments(comments, project_id):
+    _write((COMMENT, c.id, project_id, c.task_id, "", c.content) for c in comments)
+
+
+def index_labels(labels):
+    _write((LABEL, label.id, label.project_id, None, label.name, "") for label in labels)
+
+
+def move_task_comments(task_id, project_id):
+    """Comments follow their task when it changes project."""
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE search_index SET project_id = %s WHERE task_id = %s AND kind = %s AND project_id <> %s",
+            [project_id, task_id, COMMENT, project_id],
+        )
+
+
+def unindex(kind, object_ids):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        _delete(cursor, [row_id(kind, pk) for pk in object_ids])
+
+
+def unindex_project(project_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("DELETE FROM search_index WHERE project_id = %s", [project_id])
+
+
+def rebuild(schema_editor=None):
+    """Drop, recreate and refill the index from the model tables."""
+    conn = schema_editor.connection if schema_editor else connection
+    backend = get_backend(conn.vendor)
+    with conn.cursor() as cursor:
+        for sql in backend.drop_sql + backend.create_sql:
+            cursor.execute(sql)
+        cursor.execute(
+            "INSERT INTO search_index (rowid, kind, object_id, project_id, task_id, title, body) "
+            "SELECT t.id * 4 + %s, %s, t.id, c.board_id, t.id, t.title, COALESCE(t.description, '') "
+            "FROM boards_task t JOIN boards_column c ON c.id = t.column_id",
+            [TASK, TASK],
+        )
+        cursor.execute(
+            "INSERT INTO search_index (rowid, kind, object_id, project_id, task_id, title, body) "
+            "SELECT m.id * 4 + %s, %s, m.id, c.board_id, m.task_id, '', m.content "
+            "FROM boards_taskcomment m JOIN boards_task t ON t.id = m.task_id "
+            "JOIN boards_column c ON c.id = t.column_id",
+            [COMMENT, COMMENT],
+        )
+        cursor.execute(
+            "INSERT INTO search_index (rowid, kind, object_id, project_id, task_id, title, body) "
+            "SELECT l.id * 4 + %s, %s, l.id, l.project_id, NULL, l.name, '' FROM boards_label l",
+            [LABEL, LABEL],
+        )
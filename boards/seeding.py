@@ -0,0 +1,352 @@
+"""
+Synthetic data at production scale for ``manage.py seed_scale``.
+
+Same seed and options on the same database give the same rows. The data is
+skewed the way real boards are: a few hot projects hold most tasks (Zipf
+over projects), the first columns of a board are the long ones, and
+comments follow a Pareto tail so a handful of tasks carry long threads.
+
+Users, projects, boards, members, columns and labels are few and go through
+``bulk_create``. Tasks, task labels and comments get their ids assigned here
+so rows referring to them can be built without reading anything back, and
+are written in chunks together with the task history (creation and
+completion events, lead times), one transaction per chunk, either with
+``bulk_create`` or (``raw=True``) with multi-row ``INSERT`` statements as
+large as the backend accepts. Only the raw path stores the generated
+creation times of tasks and comments; ``bulk_create`` applies
+``auto_now_add``. The history keeps the generated times either way.
+
+On SQLite the secondary indexes of those tables are dropped for the
+load and rebuilt afterwards, so the seeded database should not be serving
+requests meanwhile.
+"""
+import sqlite3
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, time as dtime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.db.models import Max
+
+from projects.access import invalidate_project_access
+from projects.models import Project, ProjectsMember
+from taskflow.response_cache import bump_project_generation
+from . import counters, history, search
+from .models import AssignmentSummary, Board, Column, CycleDay, FlowDay, Label, Task, TaskComment, TaskCycle, TaskEvent
+from .ordering import ORDER_GAP
+
+User = get_user_model()
+TaskLabel = Task.labels.through
+
+PASSWORD = "seed-password"
+CHUNK_SIZE = 20000
+MAX_ROWS_PER_STATEMENT = 2000
+WORDS = (
+    "api", "login", "billing", "report", "export", "search", "mobile", "cache", "invoice", "email",
+    "dashboard", "upload", "payment", "profile", "sync", "timeout", "crash", "layout", "import", "webhook",
+)
+PRIORITIES = ("low", "medium", "high")
+PRIORITY_WEIGHTS = (5, 3, 2)
+LABEL_COUNTS = (0, 1, 2, 3)
+LABEL_COUNT_WEIGHTS = (3, 4, 2, 1)
+# timestamps come in hourly steps: creation within the last year, due dates up to 60 days later
+HISTORY_STEPS = 365 * 24
+DUE_STEPS = 60 * 24
+# completed tasks were completed within two weeks of creation (and not after now)
+COMPLETION_STEPS = 14 * 24
+
+
+def zipf_weights(n, exponent=1.1):
+    return [1 / (rank + 1) ** exponent for rank in range(n)]
+
+
+def _next_id(model):
+    return (model.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+
+
+def _max_params():
+    raw = connection.connection
+    if connection.vendor == "sqlite" and hasattr(raw, "getlimit"):
+        return raw.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+    return connection.features.max_query_params or 65535
+
+
+@contextmanager
+def _deferred_indexes(models):
+    """
+    On SQLite, drop the non-unique indexes of ``models`` and build them again
+    on the way out: one sorted build per index is far cheaper than keeping
+    them up to date row by row. Unique indexes stay, they guard the data.
+    """
+    if connection.vendor != "sqlite":
+        yield
+        return
+    tables = [model._meta.db_table for model in models]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f"AND sql NOT LIKE 'CREATE UNIQUE%%' AND tbl_name IN ({', '.join(['%s'] * len(tables))})",
+            tables,
+        )
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {connection.ops.quote_name(name)}")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+
+
+class RawInserter:
+    """Multi-row ``INSERT`` of plain tuples into one model's table."""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+        opts = model._meta
+        quote = connection.ops.quote_name
+        self.prefix = "INSERT INTO {} ({}) VALUES ".format(
+            quote(opts.db_table), ", ".join(quote(opts.get_field(name).column) for name in fields)
+        )
+        placeholder = "?" if connection.Database.paramstyle == "qmark" else "%s"
+        self.group = "(" + ", ".join([placeholder] * len(fields)) + ")"
+        self.per_statement = max(1, min(MAX_ROWS_PER_STATEMENT, _max_params() // len(fields)))
+        self.statements = {}
+
+    def _statement(self, rows):
+        sql = self.statements.get(rows)
+        if sql is None:
+            sql = self.statements[rows] = self.prefix + ", ".join([self.group] * rows)
+        return sql
+
+    def insert(self, rows):
+        """``rows`` hold database values already (datetimes adapted)."""
+        connection.ensure_connection()
+        # the DB-API cursor: no placeholder rewriting, debug logging or execute wrappers
+        cursor = connection.connection.cursor()
+        try:
+            for start in range(0, len(rows), self.per_statement):
+                batch = rows[start:start + self.per_statement]
+                cursor.execute(self._statement(len(batch)), [value for row in batch for value in row])
+        finally:
+            cursor.close()
+
+
+class BulkInserter:
+    """``bulk_create`` of the same tuples, for comparison and non-raw runs."""
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.fields = fields
+
+    def insert(self, rows):
+        fields = self.fields
+        self.model.objects.bulk_create(
+            (self.model(**dict(zip(fields, row))) for row in rows), batch_size=MAX_ROWS_PER_STATEMENT
+        )
+
+
+TASK_FIELDS = (
+    "id", "column_id", "title", "description", "created_by_id", "assignee_id", "priority",
+    "due_date", "is_complete", "completed_at", "created_at", "updated_at", "order",
+)
+TASK_LABEL_FIELDS = ("task_id", "label_id")
+COMMENT_FIELDS = ("id", "task_id", "author_id", "content", "created_at", "updated_at")
+EVENT_FIELDS = ("project_id", "task_id", "kind", "column_id", "value", "created_at")
+CYCLE_FIELDS = ("task_id", "project_id", "created_at", "started_at", "completed_at", "lead_seconds", "cycle_seconds")
+
+
+class ScaleSeeder:
+    def __init__(self, seed=1, users=1000, projects=100, members=20, columns=6, labels=12, tasks=1_000_000,
+                 comments=3.0, raw=False, chunk_size=None, progress=None):
+        self.rng = Random(seed)
+        self.scale = {"users": users, "projects": projects, "members": members, "columns": columns,
+                      "labels": labels, "tasks": tasks}
+        self.comments = comments
+        self.raw = raw
+        self.chunk_size = chunk_size or CHUNK_SIZE
+        self.progress = progress
+        # timestamps relative to today's midnight: reruns on the same day match
+        self.anchor = datetime.combine(datetime.now(dt_timezone.utc).date(), dtime(), dt_timezone.utc)
+        self.rows = Counter()
+        self.seconds = Counter()
+
+    def _timed(self, section, func, rows):
+        started = time.perf_counter()
+        func(rows)
+        self.seconds[section] += time.perf_counter() - started
+        self.rows[section] += len(rows)
+
+    def run(self, index=True):
+        """Seed everything; ``index=False`` leaves the search index for a later ``rebuild_search_index``."""
+        self._seed_projects()
+        started = time.perf_counter()
+        tables = (Task, TaskLabel, TaskComment, TaskEvent, TaskCycle)
+        with _deferred_indexes(tables):
+            if self.raw:
+                # as loaddata does: no per-row foreign key lookups, one check of the new rows' tables at the end
+                with connection.constraint_checks_disabled():
+                    self._seed_tasks()
+                connection.check_constraints(table_names=[model._meta.db_table for model in tables])
+            else:
+                self._seed_tasks()
+        # generation included
+        self.seconds["total"] = time.perf_counter() - started
+
+        # bulk inserts skip the signals that maintain these
+        # the states leave assignees out; the seeded users' summaries are counted in one pass
+        counters.apply_task_changes(added=self.states.elements())
+        counters.recount_assignments(AssignmentSummary, Task, self.user_ids)
+        history.rebuild_flow(TaskEvent, FlowDay, self.project_ids)
+        history.rebuild_cycle_days(TaskCycle, CycleDay, self.project_ids)
+        if index:
+            search.rebuild()
+        invalidate_project_access(*self.user_ids)
+        bump_project_generation(*self.project_ids)
+
+    def _seed_projects(self):
+        rng, scale = self.rng, self.scale
+        first = _next_id(User)
+        password = make_password(PASSWORD)
+        users = User.objects.bulk_create(
+            (User(username=f"seed{first + i}", email=f"seed{first + i}@example.com", password=password)
+             for i in range(scale["users"])),
+            batch_size=MAX_ROWS_PER_STATEMENT,
+        )
+        self.user_ids = [u.id for u in users]
+
+        owners = rng.choices(self.user_ids, k=scale["projects"])
+        projects = Project.objects.bulk_create(
+            Project(name=f"Project {i}", description=" ".join(rng.choices(WORDS, k=8)), owner_id=owner)
+            for i, owner in enumerate(owners)
+        )
+        self.project_ids = [p.id for p in projects]
+        Board.objects.bulk_create(
+            Board(project_id=p.id, name=p.name, description="", is_default=True) for p in projects
+        )
+
+        members, self.members = [], {}
+        for project, owner in zip(projects, owners):
+            others = [u for u in rng.sample(self.user_ids, min(scale["members"] + 1, len(self.user_ids))) if u != owner]
+            others = others[:scale["members"]]
+            self.members[project.id] = [owner, *others]
+            members.append(ProjectsMember(project_id=project.id, user_id=owner, role=ProjectsMember.Role.OWNER))
+            members += [ProjectsMember(project_id=project.id, user_id=u, role=ProjectsMember.Role.MEMBER) for u in others]
+        ProjectsMember.objects.bulk_create(members, batch_size=MAX_ROWS_PER_STATEMENT)
+
+        columns = Column.objects.bulk_create(
+            Column(board_id=pid, name=name, order=(c + 1) * ORDER_GAP)
+            for pid in self.project_ids
+            for c, name in enumerate(f"Column {c}" for c in range(scale["columns"]))
+        )
+        self.columns = {}
+        for column in columns:
+            self.columns.setdefault(column.board_id, []).append(column.id)
+
+        labels = Label.objects.bulk_create(
+            Label(project_id=pid, name=f"{WORDS[n % len(WORDS)]}-{n}", color=f"#{rng.randrange(0x1000000):06x}")
+            for pid in self.project_ids
+            for n in range(scale["labels"])
+        )
+        self.labels = {}
+        for label in labels:
+            self.labels.setdefault(label.project_id, []).append(label.id)
+
+    def _seed_tasks(self):
+        rng = self.rng
+        rnd = rng.random
+        total = self.scale["tasks"]
+        inserter = RawInserter if self.raw else BulkInserter
+        writers = {
+            "tasks": inserter(Task, TASK_FIELDS),
+            "task labels": inserter(TaskLabel, TASK_LABEL_FIELDS),
+            "comments": inserter(TaskComment, COMMENT_FIELDS),
+            "task events": inserter(TaskEvent, EVENT_FIELDS),
+            "task cycles": inserter(TaskCycle, CYCLE_FIELDS),
+        }
+        created_kind, completed_kind = TaskEvent.Kind.CREATED.value, TaskEvent.Kind.COMPLETED.value
+        stamps = self._timestamps()
+        task_id, comment_id = _next_id(Task), _next_id(TaskComment)
+        project_weights = list(accumulate(zipf_weights(len(self.project_ids))))
+        column_weights = list(accumulate(zipf_weights(self.scale["columns"], exponent=0.8)))
+        priority_weights = list(accumulate(PRIORITY_WEIGHTS))
+        label_count_weights = list(accumulate(LABEL_COUNT_WEIGHTS))
+        ranks = range(self.scale["columns"])
+        words = len(WORDS)
+        next_order = Counter()
+        self.states = Counter()
+
+        done = 0
+        while done < total:
+            size = min(self.chunk_size, total - done)
+            tasks, task_labels, comments, events, cycles = [], [], [], [], []
+            # weighted draws for the whole chunk at once, the rest from random() directly
+            for project_id, rank, priority, label_count in zip(
+                rng.choices(self.project_ids, cum_weights=project_weights, k=size),
+                rng.choices(ranks, cum_weights=column_weights, k=size),
+                rng.choices(PRIORITIES, cum_weights=priority_weights, k=size),
+                rng.choices(LABEL_COUNTS, cum_weights=label_count_weights, k=size),
+            ):
+                column_id = self.columns[project_id][rank]
+                members = self.members[project_id]
+                n = len(members)
+                is_complete = rnd() < 0.3
+                created = int(rnd() * HISTORY_STEPS)
+                created_at = stamps[created]
+                next_order[column_id] += ORDER_GAP
+                # drawn in this order so a seed keeps giving the same rows
+                title = f"{WORDS[int(rnd() * words)]} {WORDS[int(rnd() * words)]} {WORDS[int(rnd() * words)]}"
+                creator = members[int(rnd() * n)]
+                assignee = members[int(rnd() * n)] if rnd() < 0.8 else None
+                due_date = stamps[created + int(rnd() * DUE_STEPS) + 1] if rnd() < 0.5 else None
+                completed = min(created + int(rnd() * COMPLETION_STEPS) + 1, HISTORY_STEPS) if is_complete else None
+                completed_at = stamps[completed] if is_complete else None
+                tasks.append((
+                    task_id, column_id, title, f"Task {task_id}", creator, assignee, priority, due_date,
+                    is_complete, completed_at, created_at, created_at, next_order[column_id],
+                ))
+                self.states[column_id, is_complete, priority, None] += 1
+
+                # seeded tasks start in their column and never move: cycle time is the lead time
+                events.append((project_id, task_id, created_kind, column_id, None, created_at))
+                lead = None
+                if is_complete:
+                    events.append((project_id, task_id, completed_kind, column_id, None, completed_at))
+                    lead = (completed - created) * 3600
+                cycles.append((task_id, project_id, created_at, None, completed_at, lead, lead))
+
+                if label_count:
+                    labels = self.labels[project_id]
+                    task_labels += [(task_id, label_id) for label_id in rng.sample(labels, min(label_count, len(labels)))]
+
+                # Pareto tail: mean ~ self.comments, a few tasks with long threads
+                for _ in range(min(500, int(self.comments * (rng.paretovariate(1.5) - 1) / 2))):
+                    comments.append((comment_id, task_id, members[int(rnd() * n)], "benchmark comment", created_at, created_at))
+                    comment_id += 1
+                task_id += 1
+
+            with transaction.atomic():
+                self._timed("tasks", writers["tasks"].insert, tasks)
+                self._timed("task labels", writers["task labels"].insert, task_labels)
+                self._timed("comments", writers["comments"].insert, comments)
+                self._timed("task events", writers["task events"].insert, events)
+                self._timed("task cycles", writers["task cycles"].insert, cycles)
+            done += size
+            if self.progress:
+                self.progress(done, total)
+
+    def _timestamps(self):
+        """Every timestamp rows can use, oldest first; already adapted for the raw path."""
+        first = self.anchor - timedelta(hours=HISTORY_STEPS)
+        stamps = [first + timedelta(hours=i) for i in range(HISTORY_STEPS + DUE_STEPS + 1)]
+        if self.raw:
+            adapt = connection.ops.adapt_datetimefield_value
+            stamps = [adapt(value) for value in stamps]
+        return stamps
@@ -1,8 +1,10 @@
 from django.template.context_processors import request
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 
 from accounts.serializers import UserSerializer
+from .counters import COUNTER_FIELDS
 from .models import Board, Column, Task, TaskComment, Label
 from projects.models import Project, ProjectsMember
 
@@ -45,6 +47,12 @@ class ColumnSerializer(serializers.ModelSerializer):
         fields = "__all__"
         read_only_fields = ['id']
 
+    def validate_board(self, value):
+        # counters, summaries, search rows and history are all booked per project
+        if self.instance is not None and value.pk != self.instance.board_id:
+            raise serializers.ValidationError("ستون را نمی‌توان به برد دیگری منتقل کرد.")
+        return value
+
 class TaskSerializer(serializers.ModelSerializer):
     created_by = serializers.ReadOnlyField(source='created_by.username')
     assignee = serializers.SlugRelatedField(slug_field='username', queryset=User.objects.all(),
@@ -68,6 +76,114 @@ class TaskSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["id", "created_by", "created_at", "updated_at"]
 
+
+# Read path of the task list: TaskSerializer's output built from .values()
+# rows (no model instances, no per-field walk), labels fetched in one query.
+TASK_ROW_VALUES = (
+    "id", "column_id", "title", "description", "created_by__username", "assignee__username",
+    "priority", "due_date", "is_complete", "order", "created_at", "updated_at",
+)
+
+
+def _iso(value, tz):
+    # same text as serializers.DateTimeField with the default ISO 8601 format
+    if value is None:
+        return None
+    value = value.astimezone(tz).isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def task_label_pairs(task_ids):
+    """``(task_id, label_id)`` of the tasks' labels, in the order TaskSerializer lists them."""
+    return Task.labels.through.objects.filter(task_id__in=task_ids).order_by("id").values_list("task_id", "label_id")
+
+
+def serialize_task_rows(rows, label_pairs=None):
+    """
+    ``rows``: dicts of ``Task.objects.values(*TASK_ROW_VALUES)``;
+    ``label_pairs``: their ``task_label_pairs`` when the caller has fetched them already.
+    """
+    tz = timezone.get_current_timezone()
+    labels = {row["id"]: [] for row in rows}
+    if labels:
+        if label_pairs is None:
+            label_pairs = task_label_pairs(labels)
+        for task_id, label_id in label_pairs:
+            labels[task_id].append(label_id)
+    return [
+        {
+            "id": row["id"],
+            "column": row["column_id"],
+            "title": row["title"],
+            "description": row["description"],
+            "created_by": row["created_by__username"],
+            "assignee": row["assignee__username"],
+            "priority": row["priority"],
+            "due_date": _iso(row["due_date"], tz),
+            "labels": labels[row["id"]],
+            "is_complete": row["is_complete"],
+            "order": row["order"],
+            "created_at": _iso(row["created_at"], tz),
+            "updated_at": _iso(row["updated_at"], tz),
+        }
+        for row in rows
+    ]
+
+
+class BulkTaskFieldsSerializer(serializers.Serializer):
+    """Field shapes of one bulk task row; references (column, assignee, labels) are resolved in batch by boards.bulk."""
+    column = serializers.IntegerField()
+    title = serializers.CharField(max_length=100)
+    description = serializers.CharField(max_length=200, required=False, allow_null=True, allow_blank=True)
+    assignee = serializers.CharField(required=False, allow_null=True)
+    priority = serializers.ChoiceField(choices=Task.Priority.choices, required=False)
+    due_date = serializers.DateTimeField(required=False, allow_null=True)
+    is_complete = serializers.BooleanField(required=False)
+    order = serializers.IntegerField(required=False, min_value=0)
+    labels = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class BulkTaskOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=["create", "update", "delete"])
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        if attrs["op"] in ("update", "delete") and "id" not in attrs:
+            raise serializers.ValidationError({"id": "برای update و delete الزامی است."})
+        if attrs["op"] in ("create", "update"):
+            fields = BulkTaskFieldsSerializer(data=attrs.get("data", {}), partial=attrs["op"] == "update")
+            if not fields.is_valid():
+                raise serializers.ValidationError({"data": fields.errors})
+            attrs["data"] = fields.validated_data
+        return attrs
+
+
+class SnapshotTaskSerializer(TaskSerializer):
+    labels = LabelSerializer(many=True, read_only=True)
+    comment_count = serializers.IntegerField(read_only=True)
+
+    class Meta(TaskSerializer.Meta):
+        fields = TaskSerializer.Meta.fields + ["comment_count"]
+
+
+class SnapshotColumnSerializer(serializers.ModelSerializer):
+    tasks = SnapshotTaskSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Column
+        fields = ["id", "name", "order", *COUNTER_FIELDS, "tasks"]
+
+
+class BoardSnapshotSerializer(BoardSerializer):
+    """Board with its ordered columns, tasks and labels; expects the prefetches of BoardSnapshotView."""
+    columns = SnapshotColumnSerializer(many=True, read_only=True, source="project.columns")
+    labels = LabelSerializer(many=True, read_only=True, source="project.labels")
+
+    class Meta(BoardSerializer.Meta):
+        fields = BoardSerializer.Meta.fields + ["columns", "labels"]
+
+
 class TaskCommentSerializer(serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source="author.username")
 
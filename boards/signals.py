@@ -0,0 +1,180 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from projects.models import Project, ProjectsMember
+from taskflow.response_cache import bump_project_generation
+from . import counters, history, search
+from .models import ChangeLog, Column, Label, Task, TaskComment
+from .realtime import publish_board_event
+
+Entity, Action = ChangeLog.Entity, ChangeLog.Action
+User = get_user_model()
+
+
+def _deleted_with_project(origin):
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return origin_model is Project
+
+
+def _task_project_id(task):
+    if Task.column.is_cached(task):
+        return task.column.board_id
+    if "column_id" in task.get_deferred_fields():
+        return Task.objects.filter(pk=task.pk).values_list("column__board_id", flat=True).first()
+    return Column.objects.filter(pk=task.column_id).values_list("board_id", flat=True).first()
+
+
+def _comment_project_id(comment):
+    return Task.objects.filter(pk=comment.task_id).values_list("column__board_id", flat=True).first()
+
+
+def _saved(entity, project_id, instance, created, publish=True, **data):
+    action = Action.CREATED if created else Action.UPDATED
+    ChangeLog.record(project_id, entity, action, [instance.pk])
+    if publish:
+        publish_board_event(project_id, f"{entity.label}.{action.label}", id=instance.pk, **data)
+
+
+def _deleted(entity, project_id, instance, publish=True, **data):
+    ChangeLog.record(project_id, entity, Action.DELETED, [instance.pk])
+    if publish:
+        publish_board_event(project_id, f"{entity.label}.deleted", id=instance.pk, **data)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    search.unindex_project(instance.pk)
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    # also runs for cascades and queryset.delete(), inside the deletion transaction
+    if _deleted_with_project(origin):
+        # the project and all of its columns are going away with the task
+        return
+    counters.apply_task_changes(removed=[counters.task_state(instance)])
+    search.unindex(search.TASK, [instance.pk])
+    project_id = _task_project_id(instance)
+    history.record([history.deleted_event(instance, project_id)])
+    _deleted(Entity.TASK, project_id, instance, column=instance.column_id)
+
+
+SEARCHED_TASK_FIELDS = {"title", "description", "column", "column_id"}
+
+
+def _left_project_id(instance, project_id, created):
+    """The project ``instance`` was just moved out of, if any (``Task.save`` keeps the previous state)."""
+    previous = getattr(instance, "_counter_state", None)
+    if created or not previous or previous[0] == instance.column_id:
+        return None
+    old_project_id = Column.objects.filter(pk=previous[0]).values_list("board_id", flat=True).first()
+    return old_project_id if old_project_id != project_id else None
+
+
+def _reindex_task(instance, project_id, left_project_id, update_fields):
+    if update_fields is not None and not SEARCHED_TASK_FIELDS & set(update_fields):
+        return
+    search.index_tasks([instance], project_id)
+    if left_project_id is not None:
+        search.move_task_comments(instance.pk, project_id)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, update_fields=None, **kwargs):
+    project_id = _task_project_id(instance)
+    left_project_id = _left_project_id(instance, project_id, created)
+    _reindex_task(instance, project_id, left_project_id, update_fields)
+    if left_project_id is not None:
+        # for the old project the task is gone
+        _deleted(Entity.TASK, left_project_id, instance, column=instance._counter_state[0])
+    _saved(
+        Entity.TASK,
+        project_id,
+        instance,
+        created,
+        column=None if "column_id" in instance.get_deferred_fields() else instance.column_id,
+        order=instance.order,
+    )
+
+
+@receiver(post_save, sender=Column)
+def column_saved(sender, instance, created, **kwargs):
+    _saved(Entity.COLUMN, instance.board_id, instance, created)
+
+
+@receiver(post_delete, sender=Column)
+def column_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_project(origin):
+        _deleted(Entity.COLUMN, instance.board_id, instance)
+
+
+@receiver(post_save, sender=Label)
+def label_saved(sender, instance, created, **kwargs):
+    search.index_labels([instance])
+    _saved(Entity.LABEL, instance.project_id, instance, created)
+
+
+@receiver(pre_delete, sender=Label)
+def label_deleting(sender, instance, origin=None, **kwargs):
+    # the label's task links go with it; the tasks' updated_at has to move for their ETags
+    if _deleted_with_project(origin):
+        return
+    task_ids = list(Task.objects.filter(labels=instance).values_list("id", flat=True))
+    if task_ids:
+        Task.objects.filter(id__in=task_ids).update(updated_at=timezone.now())
+        ChangeLog.record(instance.project_id, Entity.TASK, Action.UPDATED, task_ids)
+
+
+@receiver(post_delete, sender=Label)
+def label_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_project(origin):
+        search.unindex(search.LABEL, [instance.pk])
+        _deleted(Entity.LABEL, instance.project_id, instance)
+
+
+@receiver(post_save, sender=TaskComment)
+def comment_saved(sender, instance, created, **kwargs):
+    project_id = _comment_project_id(instance)
+    search.index_comments([instance], project_id)
+    _saved(Entity.COMMENT, project_id, instance, created, task=instance.task_id)
+
+
+@receiver(post_delete, sender=TaskComment)
+def comment_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_with_project(origin):
+        return
+    search.unindex(search.COMMENT, [instance.pk])
+    # the task (or column) deletion that cascaded here is announced on its own
+    publish = not isinstance(origin, (Task, Column))
+    _deleted(Entity.COMMENT, _comment_project_id(instance), instance, publish=publish, task=instance.task_id)
+
+
+@receiver(post_save, sender=ProjectsMember)
+def membership_saved(sender, instance, created, **kwargs):
+    _saved(Entity.MEMBERSHIP, instance.project_id, instance, created, publish=False)
+
+
+@receiver(post_delete, sender=ProjectsMember)
+def membership_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_project(origin):
+        _deleted(Entity.MEMBERSHIP, instance.project_id, instance, publish=False)
+
+
+@receiver(pre_save, sender=User)
+def user_renaming(sender, instance, update_fields=None, **kwargs):
+    # tasks, comments and projects show usernames, so a rename moves their updated_at
+    if instance.pk is None or (update_fields is not None and "username" not in update_fields):
+        return
+    previous = User.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+    if previous is None or previous == instance.username:
+        return
+    now = timezone.now()
+    Task.objects.filter(Q(assignee_id=instance.pk) | Q(created_by_id=instance.pk)).update(updated_at=now)
+    TaskComment.objects.filter(author_id=instance.pk).update(updated_at=now)
+    projects = Project.objects.filter(Q(owner_id=instance.pk) | Q(membership__user_id=instance.pk))
+    project_ids = set(projects.values_list("id", flat=True))
+    Project.objects.filter(id__in=project_ids).update(updated_at=now)
+    bump_project_generation(*project_ids)
@@ -0,0 +1,224 @@
+"""
+Project dashboard numbers (``GET /api/projects/<id>/stats/``) and flow
+metrics over a date range (``/flow/`` and ``/cycle-time/``).
+
+Every breakdown is one grouped aggregate query; Python only reshapes the
+grouped rows. Flow metrics read the ``boards.history`` rollups, never the
+event log: the cumulative flow is a running sum (a window over the days of
+each column) and lead/cycle times come from per-day duration histograms,
+so a year costs the same few small queries as a week. Results are cached
+per project under its response-cache generation, so any write to the
+project retires them. Overdue counts also move with the clock, so entries
+expire after ``PROJECT_STATS_CACHE_TIMEOUT`` seconds.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from rest_framework.fields import DateTimeField
+
+from taskflow.response_cache import cached_for_project
+from . import history
+from .models import Column, CycleDay, FlowDay, Label, Task
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 365
+# longest /flow/ and /cycle-time/ range
+MAX_RANGE_DAYS = 3 * 366
+PERCENTILES = (50, 85, 95)
+
+
+def _counts(prefix="", now=None):
+    """``total``, ``completed`` and ``overdue`` aggregates over tasks reached through ``prefix``."""
+    completed = Q(**{f"{prefix}is_complete": True})
+    overdue = Q(**{f"{prefix}is_complete": False, f"{prefix}due_date__lt": now})
+    target = f"{prefix}id"
+    return {
+        "total": Count(target),
+        "completed": Count(target, filter=completed),
+        "overdue": Count(target, filter=overdue),
+    }
+
+
+def _series(tasks, field, since):
+    rows = (
+        tasks.filter(**{f"{field}__gte": since})
+        .annotate(day=TruncDate(field))
+        .values("day")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    return {row["day"]: row["n"] for row in rows}
+
+
+def compute(project_id, days=DEFAULT_DAYS, now=None):
+    now = now or timezone.now()
+    tasks = Task.objects.filter(column__board_id=project_id)
+
+    columns = list(
+        Column.objects.filter(board_id=project_id)
+        .order_by("order", "id")
+        .values("id", "name")
+        .annotate(**_counts("tasks__", now))
+    )
+    priorities = {
+        row["priority"]: row
+        for row in tasks.values("priority").annotate(**_counts(now=now)).order_by()
+    }
+    assignees = list(
+        tasks.values(username=F("assignee__username"))
+        .annotate(**_counts(now=now))
+        .order_by("-total", "username")
+    )
+    labels = list(
+        Label.objects.filter(project_id=project_id)
+        .order_by("name", "id")
+        .values("id", "name", "color")
+        .annotate(**_counts("tasks__", now))
+    )
+
+    today = timezone.localdate(now)
+    first_day = today - timedelta(days=days - 1)
+    since = timezone.make_aware(datetime.combine(first_day, time.min))
+    created = _series(tasks, "created_at", since)
+    completed = _series(tasks, "completed_at", since)
+
+    # the totals are sums of the per-column groups: every task is in exactly one column
+    total = sum(column["total"] for column in columns)
+    done = sum(column["completed"] for column in columns)
+    return {
+        "project": project_id,
+        "generated_at": DateTimeField().to_representation(now),
+        "total": total,
+        "completed": done,
+        "open": total - done,
+        "overdue": sum(column["overdue"] for column in columns),
+        "completion_rate": round(done / total, 4) if total else 0.0,
+        "by_column": columns,
+        "by_priority": [
+            {"priority": value, **{key: priorities.get(value, {}).get(key, 0) for key in ("total", "completed", "overdue")}}
+            for value in Task.Priority.values
+        ],
+        "by_assignee": assignees,
+        "by_label": labels,
+        "series": [
+            {"date": day.isoformat(), "created": created.get(day, 0), "completed": completed.get(day, 0)}
+            for day in (first_day + timedelta(days=offset) for offset in range(days))
+        ],
+    }
+
+
+def _days(first_day, last_day):
+    return [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+
+
+def cumulative_flow(project_id, first_day, last_day):
+    """Tasks in each current column at the end of every day from ``first_day`` to ``last_day``."""
+    columns = list(Column.objects.filter(board_id=project_id).order_by("order", "id").values("id", "name"))
+    flow = FlowDay.objects.filter(project_id=project_id)
+    net = F("arrivals") - F("departures")
+    before = dict(
+        flow.filter(day__lt=first_day).values("column_id").annotate(n=Sum(net)).order_by().values_list("column_id", "n")
+    )
+    running = (
+        flow.filter(day__range=(first_day, last_day))
+        .annotate(n=Window(Sum(net), partition_by=[F("column_id")], order_by=F("day").asc()))
+        .values_list("day", "column_id", "n")
+    )
+    changed = {(day, column_id): n for day, column_id, n in running}
+
+    level = {column["id"]: before.get(column["id"], 0) for column in columns}
+    base = dict(level)
+    days = []
+    for day in _days(first_day, last_day):
+        for column_id in level:
+            if (day, column_id) in changed:
+                level[column_id] = base[column_id] + changed[day, column_id]
+        days.append({"date": day.isoformat(), "counts": list(level.values())})
+    return {
+        "project": project_id,
+        "from": first_day.isoformat(),
+        "to": last_day.isoformat(),
+        "columns": columns,
+        "days": days,
+    }
+
+
+def _percentiles(buckets, count):
+    """Percentiles interpolated within the ``[(bucket, tasks), ...]`` histogram (ascending buckets)."""
+    result = {f"p{p}": None for p in PERCENTILES}
+    seen = 0
+    for bucket, tasks in buckets:
+        if not tasks:
+            continue
+        lower, upper = history.bucket_bounds(bucket)
+        for p in PERCENTILES:
+            rank = p * count / 100
+            if result[f"p{p}"] is None and seen + tasks >= rank:
+                result[f"p{p}"] = round(lower + (upper - lower) * (rank - seen) / tasks)
+        seen += tasks
+    return result
+
+
+def _mean(total, tasks):
+    return round(total / tasks) if tasks else None
+
+
+def cycle_times(project_id, first_day, last_day):
+    """Lead and cycle time (seconds) of the tasks completed from ``first_day`` to ``last_day``."""
+    completed = CycleDay.objects.filter(project_id=project_id, day__range=(first_day, last_day))
+    per_day = {
+        row["day"]: row
+        for row in completed.values("day")
+        .annotate(tasks=Sum("lead_tasks"), lead=Sum("lead_seconds"), cycle=Sum("cycle_seconds"))
+        .order_by()
+    }
+    buckets = list(
+        completed.values("bucket").annotate(lead=Sum("lead_tasks"), cycle=Sum("cycle_tasks")).order_by("bucket")
+    )
+    count = sum(row["tasks"] for row in per_day.values())
+    lead = sum(row["lead"] for row in per_day.values())
+    cycle = sum(row["cycle"] for row in per_day.values())
+    empty = {"tasks": 0, "lead": 0, "cycle": 0}
+    return {
+        "project": project_id,
+        "from": first_day.isoformat(),
+        "to": last_day.isoformat(),
+        "completed": count,
+        "lead_time": {
+            "mean": _mean(lead, count), **_percentiles([(row["bucket"], row["lead"]) for row in buckets], count)
+        },
+        "cycle_time": {
+            "mean": _mean(cycle, count), **_percentiles([(row["bucket"], row["cycle"]) for row in buckets], count)
+        },
+        "days": [
+            {
+                "date": day.isoformat(),
+                "completed": row["tasks"],
+                "lead_time": _mean(row["lead"], row["tasks"]),
+                "cycle_time": _mean(row["cycle"], row["tasks"]),
+            }
+            for day in _days(first_day, last_day)
+            for row in [per_day.get(day, empty)]
+        ],
+    }
+
+
+def _cached(project_id, name, build):
+    return cached_for_project(project_id, name, build, getattr(settings, "PROJECT_STATS_CACHE_TIMEOUT", 60))
+
+
+def project_stats(project_id, days=DEFAULT_DAYS):
+    return _cached(project_id, f"stats:{days}", lambda: compute(project_id, days))
+
+
+def project_flow(project_id, first_day, last_day):
+    return _cached(project_id, f"flow:{first_day}:{last_day}", lambda: cumulative_flow(project_id, first_day, last_day))
+
+
+def project_cycle_times(project_id, first_day, last_day):
+    return _cached(
+        project_id, f"cycle:{first_day}:{last_day}", lambda: cycle_times(project_id, first_day, last_day)
+    )
@@ -1,32 +1,45 @@
 from django.urls import path
 
+from .async_views import AsyncBoardSnapshotView, AsyncLabelListView, AsyncTaskCommentListView, AsyncTaskListView
 from .views import (
     BoardListCreateView,
     BoardDetailView,
     ColumnListCreateView,
     ColumnDetailView,
-    TaskListCreateView,
     TaskDetailView,
-    TaskCommentListCreateView,
+    MyTaskListView,
     TaskCommentDetailView,
     ColumnReorderView,
     TaskReorderView,
-    LabelListCreateView,
+    TaskMoveView,
+    TaskBulkView,
+    ProjectChangesView,
+    ProjectStatsView,
+    ProjectFlowView,
+    ProjectCycleTimeView,
+    ProjectExportView,
+    ProjectImportView,
+    SearchView,
     LabelDetailView,
 )
 
+# GET of the hot read endpoints runs on the event loop (boards.async_views); other methods reach the DRF views
+
 urlpatterns = [
     path("boards/", BoardListCreateView.as_view(), name="board-list-create"),
     path("boards/<int:pk>/", BoardDetailView.as_view(), name="board-detail"),
+    path("boards/<int:pk>/snapshot/", AsyncBoardSnapshotView.as_view(), name="board-snapshot"),
 
     path("columns/", ColumnListCreateView.as_view(), name="column-list-create"),
     path("columns/<int:pk>/", ColumnDetailView.as_view(), name="column-detail"),
 
-    path("tasks/", TaskListCreateView.as_view(), name="task-list-create"),
+    path("tasks/", AsyncTaskListView.as_view(), name="task-list-create"),
+    path("me/tasks/", MyTaskListView.as_view(), name="my-tasks"),
+    path("tasks/bulk/", TaskBulkView.as_view(), name="task-bulk"),
     path("tasks/<int:pk>/", TaskDetailView.as_view(), name="task-detail"),
     path(
         "tasks/<int:task_id>/comments/",
-        TaskCommentListCreateView.as_view(),
+        AsyncTaskCommentListView.as_view(),
         name="task-comment-list-create",
     ),
     path(
@@ -44,6 +57,15 @@ urlpatterns = [
         TaskReorderView.as_view(),
         name="task-reorder",
     ),
-    path("labels/", LabelListCreateView.as_view(), name="label-list-create"),
+    path("tasks/<int:pk>/move/", TaskMoveView.as_view(), name="task-move"),
+    # /api/projects/<id>/changes/ (projects.urls has no pattern for it, so it falls through to here)
+    path("projects/<int:project_id>/changes/", ProjectChangesView.as_view(), name="project-changes"),
+    path("projects/<int:project_id>/stats/", ProjectStatsView.as_view(), name="project-stats"),
+    path("projects/<int:project_id>/flow/", ProjectFlowView.as_view(), name="project-flow"),
+    path("projects/<int:project_id>/cycle-time/", ProjectCycleTimeView.as_view(), name="project-cycle-time"),
+    path("projects/<int:project_id>/export/", ProjectExportView.as_view(), name="project-export"),
+    path("projects/import/", ProjectImportView.as_view(), name="project-import"),
+    path("search/", SearchView.as_view(), name="search"),
+    path("labels/", AsyncLabelListView.as_view(), name="label-list-create"),
     path("labels/<int:pk>/", LabelDetailView.as_view(), name="label-detail"),
 ]
@@ -1,32 +1,46 @@
+from datetime import datetime, time, timedelta
+
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Case, Count, Exists, OuterRef, Prefetch, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework import generics, permissions, status
-from rest_framework.exceptions import PermissionDenied
 from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 import projects
 from . import models
-from .models import Board, Column, Task, TaskComment, Label
-from .serializers import BoardSerializer, ColumnSerializer, TaskSerializer, TaskCommentSerializer,LabelSerializer
+from .models import Board, ChangeLog, Column, ProjectImport, Task, TaskComment, Label
+from .bulk import MAX_OPERATIONS, BulkTaskOperations
+from . import export, history, search, stats
+from .importer import ImportFailed, ProjectImporter, format_for, FORMATS as IMPORT_FORMATS
+from .ordering import rank_between, respace
+from .realtime import publish_board_event
+from .pagination import DueDatePagination, KeysetPagination
+from .serializers import BoardSerializer, ColumnSerializer, TaskSerializer, TaskCommentSerializer,LabelSerializer, \
+    BoardSnapshotSerializer, BulkTaskOperationSerializer, TASK_ROW_VALUES, serialize_task_rows
+from projects.access import get_project_access, user_project_ids
+from taskflow.conditional import ConditionalMixin, queryset_version
+from taskflow.metrics import query_budget
+from taskflow.response_cache import CachedListMixin
 from projects.models import Project, ProjectsMember
+from projects.serializers import ProjectsMemberSerializer
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 def user_projects_queryset(user:User):
-    return Project.objects.filter(
-        Q(owner=user) | Q(memberships__user=user)
-    ).distinct()
+    return Project.objects.filter(id__in=user_project_ids(user))
 
 class BoardListCreateView(generics.ListAPIView):
     serializer_class = BoardSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
-        user = self.request.user
-        projects = user_projects_queryset(user)
-        return Project.objects.filter(projects__in=projects)
+        return Board.objects.filter(project_id__in=user_project_ids(self.request.user))
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -39,9 +53,7 @@ class BoardDetailView(generics.RetrieveAPIView):
     serializer_class = BoardSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
-        user = self.request.user
-        projects = user_projects_queryset(user)
-        return Project.objects.filter(projects__in=projects)
+        return Board.objects.filter(project_id__in=user_project_ids(self.request.user))
     def perform_update(self, serializer):
         board = self.get_object()
         if board.project.owner != self.request.user:
@@ -53,97 +65,293 @@ class BoardDetailView(generics.RetrieveAPIView):
             raise PermissionDenied("You must be logged in to delete a board")
         instance.delete()
 
-class ColumnListCreateView(generics.ListAPIView):
+@query_budget(12)
+class BoardSnapshotView(ConditionalMixin, generics.RetrieveAPIView):
+    """
+    Whole board in one response. The number of queries is fixed
+    (board, columns, tasks, task labels, project labels) whatever the board size.
+    """
+    serializer_class = BoardSnapshotSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_queryset(self):
+        tasks = (
+            Task.objects.select_related("created_by", "assignee")
+            .prefetch_related("labels")
+            .annotate(comment_count=Count("comments"))
+            .order_by("order", "id")
+        )
+        return (
+            Board.objects.filter(project_id__in=user_project_ids(self.request.user))
+            .select_related("project")
+            .prefetch_related(
+                Prefetch("project__columns", queryset=Column.objects.order_by("order", "id")),
+                Prefetch("project__columns__tasks", queryset=tasks),
+                Prefetch("project__labels", queryset=Label.objects.order_by("name", "id")),
+            )
+        )
+
+    def get_board_version_queryset(self):
+        return (
+            Board.objects.filter(project_id__in=user_project_ids(self.request.user))
+            .values_list("id", "project_id", "name", "description", "is_default")
+        )
+
+    @staticmethod
+    def get_version_querysets(project_id):
+        """Columns, labels, tasks and comments of the project, in the order ``snapshot_validators`` takes them."""
+        return (
+            # column counters change whenever a task is added, moved, completed or removed
+            Column.objects.filter(board_id=project_id).order_by("id").values_list(),
+            Label.objects.filter(project_id=project_id).order_by("id").values_list("id", "name", "color"),
+            Task.objects.filter(column__board_id=project_id),
+            TaskComment.objects.filter(task__column__board_id=project_id),
+        )
+
+    @staticmethod
+    def snapshot_validators(board, columns, labels, tasks, comments):
+        # ETag only (see ConditionalMixin.get_validators)
+        return (board, columns, labels, tasks, comments), None
+
+    def get_validators(self):
+        board = get_object_or_404(self.get_board_version_queryset(), pk=self.kwargs["pk"])
+        columns, labels, tasks, comments = self.get_version_querysets(board[1])
+        return self.snapshot_validators(
+            board, list(columns), list(labels), queryset_version(tasks), queryset_version(comments)
+        )
+
+@query_budget(4)
+class ColumnListCreateView(CachedListMixin, generics.ListAPIView):
     serializer_class = ColumnSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        projects = user_projects_queryset(user)
-        return Column.objects.filter(projects__in=projects)
+        return Column.objects.filter(board_id__in=user_project_ids(self.request.user))
+
+    def get_cache_projects(self):
+        return user_project_ids(self.request.user)
 
 
     def perform_create(self, serializer):
         board = serializer.validated_data["board"]
-        user = self.request.user
-        projects = user_projects_queryset(user)
-        if board.project not in projects:
+        if not get_project_access(self.request.user).can_access(board):
             raise PermissionDenied("شما به این برد دسترسی ندارید.")
         serializer.save()
 class ColumnDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ColumnSerializer
     permission_classes = [permissions.IsAuthenticated]
     def get_queryset(self):
-        user = self.request.user
-        projects = user_projects_queryset(user)
-        return Column.objects.filter(projects__in=projects)
-
-class TaskListCreateView(generics.ListAPIView):
+        return Column.objects.filter(board_id__in=user_project_ids(self.request.user))
+
+def _parse_ids(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        return [int(v) for v in raw.split(",")]
+    except ValueError:
+        raise ValidationError({name: "باید شناسه عددی یا لیستی از شناسه‌ها با کاما باشد."})
+
+
+def _parse_moment(params, name, end_of_day=False):
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        day = parse_date(raw)
+        value = parse_datetime(raw) if day is None else datetime.combine(day, time.max if end_of_day else time.min)
+    except ValueError:
+        value = None
+    if value is None:
+        raise ValidationError({name: "فرمت تاریخ نامعتبر است."})
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
+def filter_tasks(qs, params):
+    """Apply the documented task list filters (project, column, assignee, ...)."""
+    project_ids = _parse_ids(params, "project")
+    if project_ids:
+        qs = qs.filter(column__board_id__in=project_ids)
+
+    column_ids = _parse_ids(params, "column")
+    if column_ids:
+        qs = qs.filter(column_id__in=column_ids)
+
+    assignee = params.get("assignee")
+    if assignee:
+        qs = qs.filter(assignee__username=assignee)
+
+    priority = params.get("priority")
+    if priority:
+        priorities = priority.split(",")
+        if not set(priorities) <= set(Task.Priority.values):
+            raise ValidationError({"priority": f"مقادیر مجاز: {', '.join(Task.Priority.values)}"})
+        qs = qs.filter(priority__in=priorities)
+
+    is_complete = params.get("is_complete")
+    if is_complete:
+        if is_complete.lower() not in ("true", "false"):
+            raise ValidationError({"is_complete": "باید true یا false باشد."})
+        qs = qs.filter(is_complete=is_complete.lower() == "true")
+
+    due_after = _parse_moment(params, "due_after")
+    if due_after:
+        qs = qs.filter(due_date__gte=due_after)
+    due_before = _parse_moment(params, "due_before", end_of_day=True)
+    if due_before:
+        qs = qs.filter(due_date__lte=due_before)
+
+    label_ids = _parse_ids(params, "labels")
+    if label_ids:
+        # EXISTS instead of a join so rows are not duplicated and no DISTINCT is needed
+        qs = qs.filter(Exists(
+            Task.labels.through.objects.filter(task_id=OuterRef("pk"), label_id__in=label_ids)
+        ))
+
+    q = params.get("q")
+    if q:
+        qs = qs.filter(Q(title__icontains=q) | Q(description__icontains=q))
+    return qs
+
+
+@query_budget(6)
+class TaskListCreateView(ConditionalMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        user = self.request.user
-        projects = user_projects_queryset(user)
-        return Task.objects.filter(column__board__project__in=projects)
+        qs = Task.objects.filter(column__board_id__in=user_project_ids(self.request.user))
+        return filter_tasks(qs, self.request.query_params)
+
+    def get_validators(self):
+        return queryset_version(self.get_queryset()), None
+
+    def list(self, request, *args, **kwargs):
+        # same payload as TaskSerializer, built from .values() rows
+        page = self.paginate_queryset(self.get_queryset().values(*TASK_ROW_VALUES))
+        return self.get_paginated_response(serialize_task_rows(page))
+
     def perform_create(self, serializer):
         user = self.request.user
         column = serializer.validated_data["column"]
-        project = user_projects_queryset(user)
-        if column.project not in projects:
+        if not get_project_access(user).can_access(column.board_id):
             raise PermissionDenied('شما به این ستون/برد دسترسی ندارید')
         serializer.save(created_by=user)
 
-class TaskDetailView(generics.RetrieveUpdateDestroyAPIView):
+@query_budget(8)
+class MyTaskListView(APIView):
+    """
+    Tasks assigned to the user across their projects, by due date (tasks
+    without one last), open ones unless ``is_complete=true``. ``projects``
+    lists the user's ``AssignmentSummary`` counts; only projects with
+    matching tasks are searched, through the ``task_assignee_due_idx`` index.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = DueDatePagination
+
+    def get(self, request):
+        user = request.user
+        is_complete = request.query_params.get("is_complete", "false").lower()
+        if is_complete not in ("true", "false"):
+            raise ValidationError({"is_complete": "باید true یا false باشد."})
+        is_complete = is_complete == "true"
+
+        summaries = list(
+            models.AssignmentSummary.objects.filter(user_id=user.pk, project_id__in=user_project_ids(user))
+            .order_by("project__name", "project_id")
+            .values("project_id", "project__name", "task_count", "completed_task_count")
+        )
+        projects = [
+            {
+                "id": row["project_id"],
+                "name": row["project__name"],
+                "open": row["task_count"] - row["completed_task_count"],
+                "completed": row["completed_task_count"],
+            }
+            for row in summaries
+        ]
+        project_ids = [project["id"] for project in projects if project["completed" if is_complete else "open"]]
+
+        tasks = Task.objects.none()
+        if project_ids:
+            # is_complete IN (...) rather than NOT is_complete, which SQLite cannot match against the index
+            tasks = Task.objects.filter(assignee_id=user.pk, is_complete__in=[is_complete], column__board_id__in=project_ids)
+        paginator = self.pagination_class()
+        rows = paginator.paginate_queryset(tasks.values(*TASK_ROW_VALUES, "column__board_id", "column__name"), request)
+        names = {project["id"]: project["name"] for project in projects}
+        results = [
+            {**task, "project": row["column__board_id"], "project_name": names[row["column__board_id"]],
+             "column_name": row["column__name"]}
+            for task, row in zip(serialize_task_rows(rows), rows)
+        ]
+        return Response({"next": paginator.get_next_link(), "projects": projects, "results": results})
+
+
+@query_budget(10)
+class TaskDetailView(ConditionalMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        projects = user_projects_queryset(user)
-        return Task.objects.filter(column__board__project__in=projects)
+        return (
+            Task.objects.filter(column__board_id__in=user_project_ids(self.request.user))
+            .select_related("created_by", "assignee")
+            .prefetch_related("labels")
+        )
+
+    def get_validators(self):
+        task = self.get_object()
+        return (task.pk, task.updated_at), task.updated_at
 
-class TaskCommentListCreateView(generics.ListCreateAPIView):
+@query_budget(6)
+class TaskCommentListCreateView(ConditionalMixin, generics.ListCreateAPIView):
     serializer_class = TaskCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
         task_id = self.kwargs["task_id"]
-        projects = user_projects_queryset(user)
         qs = TaskComment.objects.select_related(
             "author",
-            "task__column__board__project",
+            "task__column__board",
         ).filter(task_id=task_id)
         # فقط اعضای پروژه مربوط اجازه دسترسی دارن
-        return qs.filter(task__column__board__project__in=projects)
+        return qs.filter(task__column__board_id__in=user_project_ids(user))
+
+    def get_validators(self):
+        return queryset_version(self.get_queryset()), None
 
     def perform_create(self, serializer):
         user = self.request.user
         task_id = self.kwargs["task_id"]
         task = get_object_or_404(
-            Task.objects.select_related("column__board__project"),
+            Task.objects.select_related("column"),
             id=task_id,
         )
-        projects = user_projects_queryset(user)
-        if task.column.board.project not in projects:
+        if not get_project_access(user).can_access(task.column.board_id):
             raise PermissionDenied("شما به این تسک دسترسی ندارید.")
         serializer.save(author=user, task=task)
 
 
-class TaskCommentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TaskCommentDetailView(ConditionalMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TaskCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
         task_id = self.kwargs["task_id"]
-        projects = user_projects_queryset(user)
         qs = TaskComment.objects.select_related(
             "author",
-            "task__column__board__project",
+            "task__column__board",
         ).filter(task_id=task_id)
-        return qs.filter(task__column__board__project__in=projects)
+        return qs.filter(task__column__board_id__in=user_project_ids(user))
+
+    def get_validators(self):
+        comment = self.get_object()
+        return (comment.pk, comment.updated_at), comment.updated_at
 
     def perform_update(self, serializer):
         comment = self.get_object()
@@ -159,24 +367,45 @@ class TaskCommentDetailView(generics.RetrieveUpdateDestroyAPIView):
 def _ensure_user_in_project(user, project):
     if not user.is_authenticated:
         raise PermissionDenied("باید لاگین باشی.")
-    if project.owner == user:
-        return
-    if ProjectsMember.objects.filter(project=project, user=user).exists():
+    if get_project_access(user).can_access(project):
         return
     raise PermissionDenied("شما به این پروژه دسترسی ندارید.")
 
 
+def _apply_order(objects_by_id, ordered_ids):
+    """Set ``order`` from the position in ``ordered_ids`` and return only the rows that moved."""
+    return respace([objects_by_id[pk] for pk in ordered_ids])
+
+
+def _write_order(model, rows, **extra):
+    """Persist ``order`` of ``rows`` with a single ``UPDATE ... SET order = CASE id ...``."""
+    if not rows:
+        return
+    model.objects.filter(pk__in=[row.pk for row in rows]).update(
+        order=Case(
+            *[When(pk=row.pk, then=Value(row.order)) for row in rows],
+            output_field=model._meta.get_field("order"),
+        ),
+        **extra,
+    )
+
+
+def _write_task_order(tasks):
+    # order is part of the task representation (and its ETag), so updated_at moves with it
+    now = timezone.now()
+    for task in tasks:
+        task.updated_at = now
+    _write_order(Task, tasks, updated_at=now)
+
+
 class ColumnReorderView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, board_id):
         user = request.user
-        board = get_object_or_404(
-            Board.objects.select_related("project"),
-            id=board_id,
-        )
+        board = get_object_or_404(Board, id=board_id)
 
-        _ensure_user_in_project(user, board.project)
+        _ensure_user_in_project(user, board.project_id)
 
         column_ids = request.data.get("column_ids")
         if not isinstance(column_ids, list) or not column_ids:
@@ -186,7 +415,7 @@ class ColumnReorderView(APIView):
             )
 
         # ستون‌هایی که واقعاً متعلق به این برد هستند
-        columns = list(Column.objects.filter(board=board, id__in=column_ids))
+        columns = list(Column.objects.filter(board_id=board.project_id, id__in=column_ids))
 
         if len(columns) != len(column_ids):
             return Response(
@@ -194,18 +423,15 @@ class ColumnReorderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        columns_by_id = {c.id: c for c in columns}
-
-        with transaction.atomic():
-            for index, cid in enumerate(column_ids):
-                col = columns_by_id[cid]
-                col.order = index
-                col.save(update_fields=["order"])
+        changed = _apply_order({c.id: c for c in columns}, column_ids)
+        # یک UPDATE با CASE برای همه‌ی ستون‌های جابه‌جا شده
+        _write_order(Column, changed)
+        if changed:
+            ChangeLog.record(board.project_id, ChangeLog.Entity.COLUMN, ChangeLog.Action.UPDATED, [c.id for c in changed])
+            publish_board_event(board.project_id, "columns.reordered", orders=[[c.id, c.order] for c in changed])
 
-        serialized = ColumnSerializer(
-            Column.objects.filter(board=board).order_by("order", "id"),
-            many=True,
-        )
+        changed.sort(key=lambda c: c.order)
+        serialized = ColumnSerializer(changed, many=True)
         return Response(serialized.data, status=status.HTTP_200_OK)
 
 class TaskReorderView(APIView):
@@ -213,12 +439,9 @@ class TaskReorderView(APIView):
 
     def post(self, request, column_id):
         user = request.user
-        column = get_object_or_404(
-            Column.objects.select_related("board__project"),
-            id=column_id,
-        )
+        column = get_object_or_404(Column, id=column_id)
 
-        _ensure_user_in_project(user, column.board.project)
+        _ensure_user_in_project(user, column.board_id)
 
         task_ids = request.data.get("task_ids")
         if not isinstance(task_ids, list) or not task_ids:
@@ -227,7 +450,7 @@ class TaskReorderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        tasks = list(Task.objects.filter(column=column, id__in=task_ids))
+        tasks = list(Task.objects.filter(column=column, id__in=task_ids).only("id", "order", "updated_at"))
 
         if len(tasks) != len(task_ids):
             return Response(
@@ -235,21 +458,395 @@ class TaskReorderView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        tasks_by_id = {t.id: t for t in tasks}
-
+        changed = _apply_order({t.id: t for t in tasks}, task_ids)
+        if not changed:
+            return Response([], status=status.HTTP_200_OK)
         with transaction.atomic():
-            for index, tid in enumerate(task_ids):
-                task = tasks_by_id[tid]
-                task.order = index
-                task.save(update_fields=["order"])
+            _write_task_order(changed)
+            history.record(history.reordered_events(changed, column))
+        ChangeLog.record(column.board_id, ChangeLog.Entity.TASK, ChangeLog.Action.UPDATED, [t.id for t in changed])
+        publish_board_event(column.board_id, "tasks.reordered", column=column.id, orders=[[t.id, t.order] for t in changed])
 
         serialized = TaskSerializer(
-            Task.objects.filter(column=column).order_by("order", "id"),
+            Task.objects.filter(id__in=[t.id for t in changed])
+            .select_related("created_by", "assignee")
+            .prefetch_related("labels")
+            .order_by("order", "id"),
             many=True,
         )
         return Response(serialized.data, status=status.HTTP_200_OK)
 
-class LabelListCreateView(generics.ListCreateAPIView):
+def _optional_id(data, name):
+    value = data.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError({name: "باید شناسه عددی باشد."})
+
+
+@query_budget(20)
+class TaskMoveView(APIView):
+    """
+    Move one task to ``column`` (defaults to its current column) between the
+    ``after`` and ``before`` neighbour tasks. Only the moved row is written
+    unless the neighbours have no gap left, in which case the column is respaced.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, pk):
+        user = request.user
+        task = get_object_or_404(Task.objects.select_related("column"), id=pk)
+        _ensure_user_in_project(user, task.column.board_id)
+
+        column_id = _optional_id(request.data, "column") or task.column_id
+        column = task.column if column_id == task.column_id else get_object_or_404(Column, id=column_id)
+        if column.board_id != task.column.board_id:
+            raise ValidationError({"column": "ستون مقصد باید در همین پروژه باشد."})
+
+        after_id = _optional_id(request.data, "after")
+        before_id = _optional_id(request.data, "before")
+        if task.id in (after_id, before_id):
+            raise ValidationError({"detail": "تسک نمی‌تواند همسایه‌ی خودش باشد."})
+
+        siblings = Task.objects.filter(column=column).exclude(id=task.id).only("id", "order", "updated_at")
+        with transaction.atomic():
+            after = get_object_or_404(siblings, id=after_id) if after_id else None
+            before = get_object_or_404(siblings, id=before_id) if before_id else None
+
+            if after and not before:
+                before = siblings.filter(
+                    Q(order__gt=after.order) | Q(order=after.order, id__gt=after.id)
+                ).order_by("order", "id").first()
+            elif before and not after:
+                after = siblings.filter(
+                    Q(order__lt=before.order) | Q(order=before.order, id__lt=before.id)
+                ).order_by("-order", "-id").first()
+            elif not after and not before:
+                after = siblings.order_by("-order", "-id").first()
+
+            if after and before and (after.order, after.id) > (before.order, before.id):
+                raise ValidationError({"detail": "after باید قبل از before باشد."})
+
+            new_order = rank_between(after.order if after else None, before.order if before else None)
+            if new_order is None:
+                # فاصله‌ی بین همسایه‌ها تمام شده؛ کل ستون یک بار فاصله‌گذاری می‌شود
+                rows = list(siblings.order_by("order", "id"))
+                index = next(i for i, row in enumerate(rows) if row.id == after.id) + 1 if after else 0
+                rows.insert(index, task)
+                moved = [row for row in respace(rows) if row is not task]
+                _write_task_order(moved)
+                ChangeLog.record(column.board_id, ChangeLog.Entity.TASK, ChangeLog.Action.UPDATED, [t.id for t in moved])
+                publish_board_event(
+                    column.board_id, "tasks.reordered", column=column.id, orders=[[t.id, t.order] for t in moved]
+                )
+                new_order = task.order
+
+            task.column = column
+            task.order = new_order
+            task.save(update_fields=["column", "order", "updated_at"])
+
+        task = (
+            Task.objects.select_related("created_by", "assignee")
+            .prefetch_related("labels")
+            .get(id=task.id)
+        )
+        return Response(TaskSerializer(task).data, status=status.HTTP_200_OK)
+
+
+class TaskBulkView(APIView):
+    """
+    ``{"operations": [{"op": "create"|"update"|"delete", "id": .., "data": {..}}, ..]}``.
+    All operations are applied in one transaction, or none of them when any
+    row is invalid; the response lists one result per operation, in order.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        operations = request.data.get("operations") if isinstance(request.data, dict) else None
+        if not isinstance(operations, list) or not operations:
+            raise ValidationError({"operations": "لیستی از عملیات لازم است."})
+        if len(operations) > MAX_OPERATIONS:
+            raise ValidationError({"operations": f"حداکثر {MAX_OPERATIONS} عملیات در هر درخواست مجاز است."})
+
+        shapes = BulkTaskOperationSerializer(data=operations, many=True)
+        if not shapes.is_valid():
+            errors = shapes.errors
+            if isinstance(errors, list):
+                errors = {i: e for i, e in enumerate(errors) if e}
+            return self._rejected(operations, errors)
+
+        bulk = BulkTaskOperations(request.user, shapes.validated_data)
+        if not bulk.validate():
+            return self._rejected(operations, bulk.errors)
+
+        results = bulk.save()
+        written = {r["id"] for r in results if r["op"] != "delete"}
+        tasks = Task.objects.select_related("created_by", "assignee").prefetch_related("labels").in_bulk(written)
+        for result in results:
+            if result["op"] != "delete":
+                result["task"] = TaskSerializer(tasks[result["id"]]).data
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def _rejected(self, operations, errors):
+        results = [
+            {
+                "index": index,
+                "op": op.get("op") if isinstance(op, dict) else None,
+                "status": "error" if index in errors else "skipped",
+                **({"errors": errors[index]} if index in errors else {}),
+            }
+            for index, op in enumerate(operations)
+        ]
+        return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
+
+
+@query_budget(8)
+class ProjectStatsView(APIView):
+    """
+    Dashboard numbers of a project: tasks per column, priority, assignee and
+    label (total, completed, overdue), completion rate and tasks created and
+    completed per day over the last ``days`` days (default 30).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, project_id):
+        _ensure_user_in_project(request.user, project_id)
+        days = request.query_params.get("days", stats.DEFAULT_DAYS)
+        try:
+            days = int(days)
+        except (TypeError, ValueError):
+            raise ValidationError({"days": "باید عدد صحیح باشد."})
+        if not 1 <= days <= stats.MAX_DAYS:
+            raise ValidationError({"days": f"باید بین 1 و {stats.MAX_DAYS} باشد."})
+        return Response(stats.project_stats(project_id, days))
+
+
+def _parse_day_range(params):
+    """The ``from`` and ``to`` dates of the flow metrics, by default the last 30 days."""
+    days = {}
+    for name in ("from", "to"):
+        raw = params.get(name)
+        if not raw:
+            days[name] = None
+            continue
+        try:
+            days[name] = parse_date(raw)
+        except ValueError:
+            days[name] = None
+        if days[name] is None:
+            raise ValidationError({name: "فرمت تاریخ نامعتبر است."})
+    last = days["to"] or timezone.localdate()
+    first = days["from"] or last - timedelta(days=stats.DEFAULT_DAYS - 1)
+    if first > last:
+        raise ValidationError({"from": "باید قبل از to باشد."})
+    if (last - first).days >= stats.MAX_RANGE_DAYS:
+        raise ValidationError({"from": f"بازه حداکثر {stats.MAX_RANGE_DAYS} روز است."})
+    return first, last
+
+
+@query_budget(8)
+class ProjectFlowView(APIView):
+    """
+    Cumulative flow of a project: tasks in each column at the end of every
+    day from ``from`` to ``to`` (dates, default the last 30 days).
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, project_id):
+        _ensure_user_in_project(request.user, project_id)
+        return Response(stats.project_flow(project_id, *_parse_day_range(request.query_params)))
+
+
+@query_budget(8)
+class ProjectCycleTimeView(APIView):
+    """
+    Lead time (created to completed) and cycle time (first move to completed)
+    in seconds of the tasks completed from ``from`` to ``to``: mean and
+    percentiles over the range and means per day.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, project_id):
+        _ensure_user_in_project(request.user, project_id)
+        return Response(stats.project_cycle_times(project_id, *_parse_day_range(request.query_params)))
+
+
+@query_budget(10)
+class ProjectChangesView(APIView):
+    """
+    Rows of a project created, updated or deleted after ``since`` (a cursor
+    from a previous call). Without ``since`` only the current cursor is
+    returned, to be stored after a full fetch. Each call reads at most
+    ``page_size`` log entries; follow ``cursor`` while ``has_more`` is true.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 1000
+
+    def get(self, request, project_id):
+        _ensure_user_in_project(request.user, project_id)
+        log = ChangeLog.objects.filter(project_id=project_id)
+
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"cursor": log.order_by("-id").values_list("id", flat=True).first() or 0})
+        try:
+            since = int(since)
+        except ValueError:
+            raise ValidationError({"since": "cursor نامعتبر است."})
+
+        entries = list(
+            log.filter(id__gt=since).order_by("id").values_list("id", "entity", "object_id", "action")[: self.page_size + 1]
+        )
+        has_more = len(entries) > self.page_size
+        entries = entries[: self.page_size]
+
+        # only the last action per row matters
+        latest = {(entity, object_id): action for _, entity, object_id, action in entries}
+        changed, deleted = {}, {}
+        for (entity, object_id), action in latest.items():
+            target = deleted if action == ChangeLog.Action.DELETED else changed
+            target.setdefault(entity, []).append(object_id)
+
+        Entity = ChangeLog.Entity
+        querysets = {
+            Entity.TASK: (
+                Task.objects.filter(column__board_id=project_id)
+                .select_related("created_by", "assignee")
+                .prefetch_related("labels"),
+                TaskSerializer,
+            ),
+            Entity.COLUMN: (Column.objects.filter(board_id=project_id), ColumnSerializer),
+            Entity.LABEL: (Label.objects.filter(project_id=project_id), LabelSerializer),
+            Entity.COMMENT: (
+                TaskComment.objects.filter(task__column__board_id=project_id).select_related("author"),
+                TaskCommentSerializer,
+            ),
+            Entity.MEMBERSHIP: (
+                ProjectsMember.objects.filter(project_id=project_id).select_related("user"),
+                ProjectsMemberSerializer,
+            ),
+        }
+        data = {
+            "cursor": entries[-1][0] if entries else since,
+            "has_more": has_more,
+            "deleted": {},
+        }
+        for entity, (queryset, serializer_class) in querysets.items():
+            key = f"{entity.label}s"
+            ids = changed.get(entity)
+            data[key] = serializer_class(queryset.filter(id__in=ids), many=True).data if ids else []
+            data["deleted"][key] = deleted.get(entity, [])
+        return Response(data)
+
+
+class ProjectExportView(APIView):
+    """
+    Stream the whole project as ``?format=ndjson`` (default), ``csv`` or
+    ``json``; see ``boards.export`` for the layout.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= names the export format here, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, project_id):
+        _ensure_user_in_project(request.user, project_id)
+        fmt = request.query_params.get("format", "ndjson")
+        if fmt not in export.FORMATS:
+            raise ValidationError({"format": f"یکی از {', '.join(export.FORMATS)} باشد."})
+
+        encode, content_type = export.FORMATS[fmt]
+        chunks = export.buffered(encode(export.iter_sections(project_id)))
+        if isinstance(request._request, ASGIRequest):
+            chunks = export.AsyncChunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=f"{content_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="project-{project_id}.{fmt}"'
+        return response
+
+
+class ProjectImportView(APIView):
+    """
+    Multipart upload of an export (``file``, optional ``format``) into a new
+    project owned by the caller. ``resume=<import id>`` continues a failed
+    import of the same file from its last committed chunk.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise ValidationError({"file": "فایل خروجی پروژه را بفرستید."})
+
+        resume = _optional_id(request.data, "resume")
+        if resume:
+            job = get_object_or_404(
+                ProjectImport, id=resume, created_by=request.user, status=ProjectImport.Status.FAILED
+            )
+            job.status = ProjectImport.Status.RUNNING
+            job.save(update_fields=["status", "updated_at"])
+            importer = ProjectImporter(job, request.user)
+        else:
+            fmt = request.data.get("format") or format_for(upload.name)
+            if fmt not in IMPORT_FORMATS:
+                raise ValidationError({"format": f"یکی از {', '.join(IMPORT_FORMATS)} باشد."})
+            importer = ProjectImporter.start(request.user, upload.name, fmt)
+
+        job = importer.job
+        try:
+            rows, rate = importer.run(upload)
+        except ImportFailed as exc:
+            return Response(
+                {"import": job.id, "rows_done": job.rows_done, "detail": str(exc)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {"import": job.id, "project": job.project_id, "rows": rows, "rows_per_second": rate},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+@query_budget(4)
+class SearchView(APIView):
+    """
+    ``?q=`` over task titles/descriptions, comments and label names of the
+    caller's projects, best match first. Optional ``type`` (csv of task,
+    comment, label), ``project`` (csv of ids) and ``limit`` (max 100).
+    Matches are wrapped in ``<mark>``; the rest of the text is HTML-escaped.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_limit = 100
+
+    def get(self, request):
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            raise ValidationError({"q": "عبارت جستجو را وارد کنید."})
+
+        kinds = request.query_params.get("type")
+        kinds = kinds.split(",") if kinds else list(search.KIND_IDS)
+        if not set(kinds) <= search.KIND_IDS.keys():
+            raise ValidationError({"type": f"مقادیر مجاز: {', '.join(search.KIND_IDS)}"})
+
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), self.max_limit)
+        except ValueError:
+            raise ValidationError({"limit": "باید عدد باشد."})
+        if limit < 1:
+            raise ValidationError({"limit": "باید مثبت باشد."})
+
+        project_ids = user_project_ids(request.user)
+        requested = _parse_ids(request.query_params, "project")
+        if requested:
+            project_ids = project_ids & set(requested)
+
+        results = search.search(project_ids, q, [search.KIND_IDS[k] for k in kinds], limit)
+        return Response({"results": results})
+
+
+@query_budget(4)
+class LabelListCreateView(CachedListMixin, generics.ListCreateAPIView):
     serializer_class = LabelSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -261,13 +858,11 @@ class LabelListCreateView(generics.ListCreateAPIView):
         if project_id:
             qs = qs.filter(project_id=project_id)
 
-        # فقط لیبل‌هایی از پروژه‌هایی که کاربر توش عضوه:
-        # (مثل بقیه‌جاها، owner یا member) :contentReference[oaicite:12]{index=12}
-        allowed_projects = Project.objects.filter(
-                models.Q(owner=user) |
-            models.Q(membership__user=user)
-        ).distinct()
-        return qs.filter(project__in=allowed_projects)
+        # فقط لیبل‌هایی از پروژه‌هایی که کاربر توش عضوه (owner یا member)
+        return qs.filter(project_id__in=user_project_ids(user))
+
+    def get_cache_projects(self):
+        return user_project_ids(self.request.user)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -286,13 +881,7 @@ class LabelDetailView(generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-
-        allowed_projects = Project.objects.filter(
-            models.Q(owner=user) |
-            models.Q(membership__user=user)
-        ).distinct()
-        return Label.objects.filter(project__in=allowed_projects)
+        return Label.objects.filter(project_id__in=user_project_ids(self.request.user))
 
     def perform_update(self, serializer):
         label = self.get_object()
@@ -0,0 +1,89 @@
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Project, ProjectsMember
+
+CACHE_KEY = "project-access:{user_id}"
+
+# bumped on every local invalidation so memoized snapshots on user objects
+# (which can outlive a request, e.g. force_authenticate in tests) go stale
+_generation = count()
+_current_generation = next(_generation)
+
+
+def _cache():
+    return caches[getattr(settings, "PROJECT_ACCESS_CACHE", "default")]
+
+
+def _cache_timeout():
+    return getattr(settings, "PROJECT_ACCESS_CACHE_TIMEOUT", 300)
+
+
+def _project_id(project):
+    return project.pk if isinstance(project, Project) else int(project)
+
+
+class ProjectAccess:
+    """Snapshot of the projects a user can reach and their role in each."""
+
+    ADMIN_ROLES = (ProjectsMember.Role.OWNER, ProjectsMember.Role.ADMIN)
+
+    def __init__(self, user_id, roles):
+        self.user_id = user_id
+        self.roles = roles
+        self.project_ids = frozenset(roles)
+
+    def can_access(self, project):
+        return _project_id(project) in self.roles
+
+    def role_in(self, project):
+        return self.roles.get(_project_id(project))
+
+    def is_admin_or_owner(self, project):
+        return self.role_in(project) in self.ADMIN_ROLES
+
+
+def _load_roles(user_id):
+    roles = dict(
+        ProjectsMember.objects.filter(user_id=user_id).values_list("project_id", "role")
+    )
+    # owner همیشه نقش owner دارد، حتی اگر ردیف عضویت نداشته باشد
+    for project_id in Project.objects.filter(owner_id=user_id).values_list("id", flat=True):
+        roles[project_id] = ProjectsMember.Role.OWNER
+    return roles
+
+
+def get_project_access(user):
+    """
+    Resolve ``user``'s project access once: memoized on the user object for
+    the request, then the shared cache, then two small queries.
+    """
+    if not user.is_authenticated:
+        return ProjectAccess(None, {})
+
+    memo = getattr(user, "_project_access", None)
+    if memo is not None and memo[0] == _current_generation:
+        return memo[1]
+
+    key = CACHE_KEY.format(user_id=user.pk)
+    cache = _cache()
+    roles = cache.get(key)
+    if roles is None:
+        roles = _load_roles(user.pk)
+        cache.set(key, roles, _cache_timeout())
+
+    access = ProjectAccess(user.pk, roles)
+    user._project_access = (_current_generation, access)
+    return access
+
+
+def user_project_ids(user):
+    return get_project_access(user).project_ids
+
+
+def invalidate_project_access(*user_ids):
+    global _current_generation
+    _current_generation = next(_generation)
+    _cache().delete_many([CACHE_KEY.format(user_id=uid) for uid in user_ids if uid is not None])
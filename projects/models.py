@@ -1,5 +1,7 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+
+from taskflow.saving import saved_fields
 # Create your models here.
 
 User = get_user_model()
@@ -12,9 +14,21 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # maintained by boards.counters
+    task_count = models.IntegerField(default=0, editable=False)
+    completed_task_count = models.IntegerField(default=0, editable=False)
+    open_low_count = models.IntegerField(default=0, editable=False)
+    open_medium_count = models.IntegerField(default=0, editable=False)
+    open_high_count = models.IntegerField(default=0, editable=False)
+
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = saved_fields(self)
+        super().save(*args, **kwargs)
+
 class ProjectsMember(models.Model):
     class Role(models.TextChoices):
         OWNER = "owner", "Owner"
@@ -32,6 +46,10 @@ class ProjectsMember(models.Model):
 
     class Meta:
         unique_together = ("project", "user")
+        indexes = [
+            # covers the projects.access lookup (project ids and roles of a user)
+            models.Index(fields=["user", "project", "role"], name="member_user_project_idx"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} in {self.project.name} ({self.role})"
\ No newline at end of file
@@ -21,7 +21,10 @@ class ProjectSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('owner','id','created_at','updated_at')
     def get_members(self, obj):
-        memberships = obj.members.select_related('user')
+        if "membership" in getattr(obj, "_prefetched_objects_cache", {}):
+            memberships = obj.membership.all()
+        else:
+            memberships = obj.membership.select_related('user')
         return ProjectsMemberSerializer(memberships, many=True).data
 
 
@@ -36,7 +39,7 @@ class ProjectMemberWriteSerializer(serializers.ModelSerializer):
         read_only_fields = ("id", "project", "joined_at")
 
     def validate(self, attrs):
-        username = attrs.get("username")
+        username = attrs.pop("username", None)
         try:
             user = User.objects.get(username=username)
         except User.DoesNotExist:
@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from taskflow.response_cache import bump_project_generation
+from .access import invalidate_project_access
+from .models import Project, ProjectsMember
+
+
+def _invalidate(*user_ids):
+    invalidate_project_access(*user_ids)
+    # a concurrent request may have re-cached the pre-commit state
+    transaction.on_commit(lambda: invalidate_project_access(*user_ids))
+
+
+@receiver(pre_save, sender=Project)
+def remember_previous_owner(sender, instance, **kwargs):
+    instance._previous_owner_id = None
+    if instance.pk:
+        instance._previous_owner_id = (
+            Project.objects.filter(pk=instance.pk).values_list("owner_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Project)
+def project_saved(sender, instance, **kwargs):
+    _invalidate(instance.owner_id, getattr(instance, "_previous_owner_id", None))
+    bump_project_generation(instance.pk)
+
+
+@receiver(post_delete, sender=Project)
+def project_deleted(sender, instance, **kwargs):
+    # اعضای پروژه از طریق cascade حذف می‌شوند و سیگنال خودشان را دارند
+    _invalidate(instance.owner_id)
+    bump_project_generation(instance.pk)
+
+
+@receiver(pre_save, sender=ProjectsMember)
+def remember_previous_member(sender, instance, **kwargs):
+    instance._previous_user_id = None
+    if instance.pk:
+        instance._previous_user_id = (
+            ProjectsMember.objects.filter(pk=instance.pk).values_list("user_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=ProjectsMember)
+@receiver(post_delete, sender=ProjectsMember)
+def membership_changed(sender, instance, **kwargs):
+    _invalidate(instance.user_id, getattr(instance, "_previous_user_id", None))
+    bump_project_generation(instance.project_id)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def user_created(sender, instance, created, **kwargs):
+    # ids can be recycled (e.g. after a rolled-back transaction)
+    if created:
+        _invalidate(instance.pk)
@@ -1,3 +1,131 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from .access import get_project_access
+from .models import Project, ProjectsMember
+
+User = get_user_model()
+
+
+class ProjectAccessTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", email="owner@example.com", password="pw123456")
+        self.member = User.objects.create_user(username="member", email="member@example.com", password="pw123456")
+        self.project = Project.objects.create(name="Alpha", owner=self.owner)
+        ProjectsMember.objects.create(project=self.project, user=self.member, role=ProjectsMember.Role.MEMBER)
+
+    def test_roles_are_resolved_once_per_user(self):
+        with self.assertNumQueries(2):
+            access = get_project_access(self.member)
+        self.assertTrue(access.can_access(self.project))
+        self.assertEqual(access.role_in(self.project.id), ProjectsMember.Role.MEMBER)
+        self.assertFalse(access.is_admin_or_owner(self.project))
+
+        with self.assertNumQueries(0):
+            get_project_access(self.member)
+            get_project_access(User(pk=self.member.pk))
+
+    def test_owner_is_admin_without_membership_row(self):
+        self.assertTrue(get_project_access(self.owner).is_admin_or_owner(self.project))
+
+    def test_membership_changes_invalidate_cache(self):
+        outsider = User.objects.create_user(username="outsider", email="out@example.com", password="pw123456")
+        self.assertFalse(get_project_access(outsider).can_access(self.project))
+
+        membership = ProjectsMember.objects.create(project=self.project, user=outsider, role=ProjectsMember.Role.ADMIN)
+        self.assertTrue(get_project_access(outsider).is_admin_or_owner(self.project))
+
+        membership.delete()
+        self.assertFalse(get_project_access(outsider).can_access(self.project))
+
+    def test_project_delete_and_owner_change_invalidate_cache(self):
+        other = Project.objects.create(name="Beta", owner=self.owner)
+        self.assertTrue(get_project_access(self.owner).can_access(other))
+
+        other.owner = self.member
+        other.save()
+        self.assertFalse(get_project_access(self.owner).can_access(other))
+        self.assertTrue(get_project_access(self.member).is_admin_or_owner(other))
+
+        other_id = other.id
+        other.delete()
+        self.assertFalse(get_project_access(self.member).can_access(other_id))
+
+
+class ProjectViewsTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="owner", email="owner@example.com", password="pw123456")
+        self.member = User.objects.create_user(username="member", email="member@example.com", password="pw123456")
+        self.project = Project.objects.create(name="Alpha", owner=self.owner)
+        ProjectsMember.objects.create(project=self.project, user=self.owner, role=ProjectsMember.Role.OWNER)
+        ProjectsMember.objects.create(project=self.project, user=self.member, role=ProjectsMember.Role.MEMBER)
+        self.client = APIClient()
+
+    def test_member_lists_projects(self):
+        self.client.force_authenticate(self.member)
+        response = self.client.get("/api/projects/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["id"] for p in response.data], [self.project.id])
+
+    def test_only_admins_can_invite(self):
+        newcomer = User.objects.create_user(username="new", email="new@example.com", password="pw123456")
+        url = f"/api/projects/{self.project.id}/members/"
+
+        self.client.force_authenticate(self.member)
+        response = self.client.post(url, {"username": newcomer.username, "role": "member"}, format="json")
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(url, {"username": newcomer.username, "role": "member"}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        self.client.force_authenticate(newcomer)
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_cached_lists_follow_project_writes(self):
+        url = f"/api/projects/{self.project.id}/members/"
+        self.client.force_authenticate(self.member)
+        self.assertEqual(len(self.client.get(url).data), 2)
+        self.client.get("/api/projects/")
+
+        outsider = User.objects.create_user(username="outsider", email="o@example.com", password="pw123456")
+        self.client.force_authenticate(outsider)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        ProjectsMember.objects.create(project=self.project, user=outsider)
+        self.project.name = "Renamed"
+        self.project.save()
+        self.client.force_authenticate(self.member)
+        self.assertEqual(len(self.client.get(url).data), 3)
+        self.assertEqual(self.client.get("/api/projects/").data[0]["name"], "Renamed")
+
+    def test_project_etags_follow_counters_roles_and_renames(self):
+        from boards.models import Column, Task
+
+        self.client.force_authenticate(self.owner)
+        other = Project.objects.create(name="Beta", owner=self.owner)
+        column = Column.objects.create(board=self.project, name="Todo")
+        elsewhere = Column.objects.create(board=other, name="Todo")
+        task = Task.objects.create(column=column, title="a")
+
+        def unchanged(etag, url="/api/projects/"):
+            return self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+        etag = self.client.get("/api/projects/")["ETag"]
+        self.assertTrue(unchanged(etag))
+        task.column = elsewhere
+        task.save()
+        self.assertFalse(unchanged(etag))
+
+        url = f"/api/projects/{self.project.id}/"
+        etag = self.client.get(url)["ETag"]
+        ProjectsMember.objects.filter(user=self.member).update(role=ProjectsMember.Role.ADMIN)
+        self.assertFalse(unchanged(etag, url))
+
+        etag = self.client.get(url)["ETag"]
+        self.member.username = "renamed"
+        self.member.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("renamed", [m["user"] for m in response.data["members"]])
@@ -1,13 +1,46 @@
-from django.db.models import Q
+from django.db.models import Count, F, Max, Prefetch, Q, Sum
 from django.shortcuts import get_object_or_404
 from rest_framework import generics, permissions
 from rest_framework.exceptions import PermissionDenied
 
+from taskflow.conditional import ConditionalMixin
+from taskflow.metrics import query_budget
+from taskflow.response_cache import CachedListMixin
+from taskflow.saving import COUNTER_FIELDS
+from .access import get_project_access, user_project_ids
 from .models import Project, ProjectsMember
 from .serializers import ProjectSerializer, ProjectMemberWriteSerializer, ProjectsMemberSerializer
 
 
-class ProjectListCreateView(generics.ListCreateAPIView):
+def _projects_version(projects):
+    """
+    Validators for serialized projects from two aggregate queries; ETag only.
+    Task counters move by ``F()`` increments without touching ``updated_at``,
+    so they are summed weighted by project id (a task moving between two
+    listed projects still changes the sum); member roles likewise by id per role.
+    """
+    rows = projects.order_by().aggregate(
+        count=Count("pk"),
+        last=Max("updated_at"),
+        **{field: Sum(F("id") * F(field)) for field in COUNTER_FIELDS},
+    )
+    members = ProjectsMember.objects.filter(project__in=projects).order_by().aggregate(
+        count=Count("pk"),
+        last=Max("id"),
+        **{role: Sum("id", filter=Q(role=role)) for role in ProjectsMember.Role.values},
+    )
+    return (rows, members), None
+
+
+def _with_members(projects):
+    # everything ProjectSerializer reads, in three queries for any number of projects
+    return projects.select_related("owner").prefetch_related(
+        Prefetch("membership", queryset=ProjectsMember.objects.select_related("user"))
+    )
+
+
+@query_budget(8)
+class ProjectListCreateView(ConditionalMixin, CachedListMixin, generics.ListCreateAPIView):
 
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -19,9 +52,13 @@ class ProjectListCreateView(generics.ListCreateAPIView):
             return Project.objects.none()
 
 
-        return Project.objects.filter(
-            Q(owner=user) | Q(memberships__user=user)
-        ).distinct()
+        return _with_members(Project.objects.filter(id__in=user_project_ids(user)))
+
+    def get_validators(self):
+        return _projects_version(self.get_queryset())
+
+    def get_cache_projects(self):
+        return user_project_ids(self.request.user)
 
     def perform_create(self, serializer):
         user = self.request.user
@@ -38,7 +75,8 @@ class ProjectListCreateView(generics.ListCreateAPIView):
         )
 
 
-class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
+@query_budget(8)
+class ProjectDetailView(ConditionalMixin, generics.RetrieveUpdateDestroyAPIView):
 
     serializer_class = ProjectSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -49,9 +87,10 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
             return Project.objects.none()
 
 
-        return Project.objects.filter(
-            Q(owner=user) | Q(memberships__user=user)
-        ).distinct()
+        return _with_members(Project.objects.filter(id__in=user_project_ids(user)))
+
+    def get_validators(self):
+        return _projects_version(self.get_queryset().filter(pk=self.kwargs["pk"]))
 
     def perform_update(self, serializer):
         project = self.get_object()
@@ -66,18 +105,13 @@ class ProjectDetailView(generics.RetrieveUpdateDestroyAPIView):
 def _ensure_project_admin_or_owner(user, project: Project):
     if not user.is_authenticated:
         raise PermissionDenied("باید لاگین باشی.")
-    # owner همیشه دسترسی داره
-    if project.owner == user:
-        return
-    # بررسی اینکه توی پروژه admin هست یا نه
-    membership = ProjectsMember.objects.filter(project=project, user=user).first()
-    if not membership or membership.role not in (
-        ProjectsMember.Role.ADMIN,
-        ProjectsMember.Role.OWNER,
-    ):
+    # owner همیشه دسترسی داره و ادمین‌ها هم همین‌طور
+    if not get_project_access(user).is_admin_or_owner(project):
         raise PermissionDenied("فقط مالک یا ادمین‌های پروژه می‌توانند این عملیات را انجام دهند.")
 
-class ProjectMemberListCreateView(generics.ListCreateAPIView):
+
+@query_budget(6)
+class ProjectMemberListCreateView(CachedListMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -86,12 +120,18 @@ class ProjectMemberListCreateView(generics.ListCreateAPIView):
         project = get_object_or_404(Project, id=project_id)
 
         # هر عضوی از پروژه می‌تونه لیست اعضا رو ببینه
-        if not ProjectsMember.objects.filter(project=project, user=user).exists() and project.owner != user:
+        if not get_project_access(user).can_access(project):
             raise PermissionDenied("شما عضو این پروژه نیستید.")
 
         # فرض: related_name = 'memberships'
         return ProjectsMember.objects.filter(project=project)
 
+    def get_cache_projects(self):
+        project_id = self.kwargs["project_id"]
+        if not get_project_access(self.request.user).can_access(project_id):
+            self.get_queryset()  # 404 / 403 exactly like an uncached request
+        return [project_id]
+
     def get_serializer_class(self):
         if self.request.method == "POST":
             return ProjectMemberWriteSerializer
@@ -122,7 +162,7 @@ class ProjectMemberDetailView(generics.RetrieveUpdateDestroyAPIView):
         project = get_object_or_404(Project, id=project_id)
 
         # هر عضوی که دسترسی به پروژه دارد، می‌تواند جزئیات اعضا را ببیند
-        if not ProjectsMember.objects.filter(project=project, user=user).exists() and project.owner != user:
+        if not get_project_access(user).can_access(project):
             raise PermissionDenied("شما عضو این پروژه نیستید.")
 
         return ProjectsMember.objects.filter(project=project)
@@ -2,6 +2,7 @@
 ASGI config for taskflow project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP is served by Django; WebSocket connections go to the board change feed.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +14,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'taskflow.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from boards.realtime import BoardFeedConsumer  # noqa: E402  (needs the app registry)
+
+board_feed = BoardFeedConsumer()
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        return await board_feed(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,86 @@
+"""
+Async read views.
+
+``AsyncReadView`` serves GET on the event loop with Django's async ORM, on
+top of the DRF view of the same URL (``sync_view``). Authentication,
+permissions, content negotiation, querysets, serializers and error
+responses all come from that DRF view; only the queries are awaited. Other
+methods and the browsable API go to the DRF view itself, so a URL keeps its
+full behaviour. Querysets are built in the same thread as authentication
+(``prepare``), since they embed the user's project ids and looking those up
+may query.
+
+Under ASGI a GET then holds a thread only while one of its queries runs
+rather than for the whole request. Under WSGI the view still works, in a
+per-request event loop.
+"""
+from asgiref.sync import sync_to_async
+from rest_framework.renderers import JSONRenderer
+
+from taskflow.conditional import check_preconditions, make_etag, set_validator_headers
+
+
+class AsyncReadView:
+    sync_view = None
+
+    def __init__(self, sync_dispatch):
+        self.sync_dispatch = sync_dispatch
+
+    @classmethod
+    def as_view(cls):
+        sync_dispatch = cls.sync_view.as_view()
+
+        async def view(request, *args, **kwargs):
+            if request.method != "GET":
+                return await sync_to_async(sync_dispatch)(request, *args, **kwargs)
+            return await cls(sync_dispatch).dispatch(request, *args, **kwargs)
+
+        # the query budget (taskflow.metrics) and CSRF exemption are the DRF view's
+        view.view_class = cls.sync_view
+        view.csrf_exempt = True
+        view.sync_view = sync_dispatch
+        return view
+
+    async def get_validators(self):
+        """``(etag_parts, last_modified)`` as in ``ConditionalMixin``, or ``None`` for no conditional GET."""
+        return None
+
+    async def get(self):
+        """The DRF ``Response`` of the GET."""
+        raise NotImplementedError
+
+    def prepare(self):
+        """Build what ``get_validators`` and ``get`` query; runs in the ``initial`` thread."""
+        self.queryset = self.view.get_queryset()
+
+    def initial(self, request):
+        # runs in a thread: authentication and the access lookup may query on a cache miss
+        self.view.initial(request)
+        self.prepare()
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args, self.kwargs = args, kwargs
+        self.view = view = self.sync_view()
+        view.setup(request, *args, **kwargs)
+        self.request = view.request = view.initialize_request(request, *args, **kwargs)
+        view.headers = view.default_response_headers
+        try:
+            await sync_to_async(self.initial)(self.request)
+            if not isinstance(self.request.accepted_renderer, JSONRenderer):
+                # the browsable API renders forms, which query synchronously
+                return await sync_to_async(self.sync_dispatch)(request, *args, **kwargs)
+            response = await self.conditional_get()
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        return view.finalize_response(self.request, response)
+
+    async def conditional_get(self):
+        validators = await self.get_validators()
+        if validators is None:
+            return await self.get()
+        parts, last_modified = validators
+        etag = make_etag(self.request.user.pk, self.request.get_full_path(), parts)
+        response = check_preconditions(self.request, etag, last_modified)
+        if response is None:
+            response = await self.get()
+        return set_validator_headers(response, etag, last_modified)
@@ -0,0 +1,472 @@
+"""
+API benchmark used by ``manage.py bench_api``.
+
+``seed`` builds a deterministic synthetic dataset with bulk inserts;
+``run`` requests every URL of ``accounts.urls``, ``projects.urls`` and
+``boards.urls`` through the full middleware stack with a real JWT and
+reports p50/p95 latency and queries per request. Writes are rolled back
+after every iteration so each one sees the same data, and the caller is
+expected to roll back the seed as well.
+
+``run_concurrent`` (``manage.py bench_async``) loads the hot read endpoints
+through Django's ASGI handler from many concurrent connections, with their
+GET served either by the async views or by the DRF views behind them. The
+requests run in their own threads and connections, so that seed has to be
+committed (and ``unseed`` removes it).
+"""
+import asyncio
+import itertools
+import json
+import platform
+import random
+import re
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.handlers.asgi import ASGIHandler
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, URLResolver, get_resolver, path as url_path
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.authentication import access_token_for
+from boards import counters, history, search, urls as board_urls
+from boards.export import iter_sections, stream_ndjson
+from boards.models import AssignmentSummary, Board, Column, CycleDay, FlowDay, Label, Task, TaskComment, TaskCycle, TaskEvent
+from projects.access import invalidate_project_access
+from projects.models import Project, ProjectsMember
+from taskflow.metrics import record_requests
+from taskflow.response_cache import bump_project_generation
+
+User = get_user_model()
+
+PASSWORD = "bench-password"
+DEFAULT_SCALE = {
+    "users": 20,
+    "projects": 10,
+    "members": 5,
+    "columns": 5,
+    "labels": 8,
+    "tasks": 2000,
+    "comments": 2,
+}
+REPORTED_APPS = ("accounts", "projects", "boards")
+
+
+def seed(rng_seed=1, **scale):
+    """Create the dataset and return the objects the scenarios use. Tasks are skewed towards the first project."""
+    scale = {**DEFAULT_SCALE, **scale}
+    rng = random.Random(rng_seed)
+    now = timezone.now()
+
+    password = make_password(PASSWORD)
+    users = User.objects.bulk_create(
+        User(username=f"bench{i}", email=f"bench{i}@example.com", password=password)
+        for i in range(scale["users"])
+    )
+    owner = users[0]
+    projects = []
+    for i in range(scale["projects"]):
+        projects.append(Project(name=f"Project {i}", description="benchmark", owner=owner))
+    projects = Project.objects.bulk_create(projects)
+    Board.objects.bulk_create(Board(project=p, name=p.name, description="benchmark") for p in projects)
+
+    members = []
+    for project in projects:
+        others = rng.sample(users[1:], min(scale["members"], len(users) - 1))
+        members.append(ProjectsMember(project=project, user=owner, role=ProjectsMember.Role.OWNER))
+        members += [ProjectsMember(project=project, user=u, role=ProjectsMember.Role.MEMBER) for u in others]
+    ProjectsMember.objects.bulk_create(members)
+
+    columns = Column.objects.bulk_create(
+        Column(board=p, name=f"Column {c}", order=(c + 1) * 1024)
+        for p in projects for c in range(scale["columns"])
+    )
+    labels = Label.objects.bulk_create(
+        Label(project=p, name=f"label-{n}") for p in projects for n in range(scale["labels"])
+    )
+    labels_by_project = {}
+    for label in labels:
+        labels_by_project.setdefault(label.project_id, []).append(label.id)
+
+    # hot project first: weights 1, 1/2, 1/3, ...
+    weights = [1 / (rank + 1) for rank in range(len(columns))]
+    picked = rng.choices(columns, weights=weights, k=scale["tasks"])
+    priorities = Task.Priority.values
+
+    def make_task(i, column):
+        task = Task(
+            column=column, title=f"Task {i}", description="benchmark task " * 4, order=(i + 1) * 1024,
+            created_by=owner, assignee=rng.choice(users), priority=rng.choice(priorities),
+            is_complete=rng.random() < 0.3, due_date=now + timedelta(days=rng.randint(-30, 60)),
+        )
+        task.mark_completion(now)
+        return task
+
+    tasks = Task.objects.bulk_create((make_task(i, column) for i, column in enumerate(picked)), batch_size=1000)
+    through = Task.labels.through
+    through.objects.bulk_create(
+        (
+            through(task_id=task.id, label_id=label_id)
+            for task in tasks
+            for label_id in rng.sample(labels_by_project[task.column.board_id], 2)
+        ),
+        batch_size=1000,
+    )
+    TaskComment.objects.bulk_create(
+        (
+            TaskComment(task=task, author=rng.choice(users), content=f"comment on {task.title}")
+            for task in tasks
+            for _ in range(rng.choice((0, 0, 1, scale["comments"], scale["comments"] * 5)))
+        ),
+        batch_size=1000,
+    )
+
+    # bulk_create skipped the signals that maintain these
+    counters.recount(Column, Project, Task)
+    counters.recount_assignments(AssignmentSummary, Task, [u.id for u in users])
+    search.rebuild()
+    history.backfill(TaskEvent, Task.objects.filter(id__in=[t.id for t in tasks]))
+    history.rebuild(TaskEvent, FlowDay, TaskCycle, CycleDay, [p.id for p in projects])
+    invalidate_project_access(*(u.id for u in users))
+    bump_project_generation(*(p.id for p in projects))
+
+    project = projects[0]
+    hot_columns = [c for c in columns if c.board_id == project.id]
+    task = next(t for t in tasks if t.column_id == hot_columns[0].id)
+    return {
+        "users": users,
+        "user": owner,
+        "member": next(m for m in members if m.project_id == project.id and m.user_id != owner.id),
+        "project": project,
+        "small_project": projects[-1],
+        "board": Board.objects.get(project=project),
+        "columns": hot_columns,
+        "task": task,
+        "comment": TaskComment.objects.filter(task__column__board=project).first(),
+        "label": labels_by_project[project.id][0],
+    }
+
+
+def scenarios(data):
+    """``{url name: [(method, path, body or None), ...]}``; every body is replayed unchanged each iteration."""
+    project, board, task = data["project"], data["board"], data["task"]
+    columns, comment = data["columns"], data["comment"]
+    column_tasks = list(Task.objects.filter(column=columns[0]).order_by("order", "id").values_list("id", flat=True))
+    export = "".join(stream_ndjson(iter_sections(data["small_project"].id))).encode()
+    year_ago = (timezone.localdate() - timedelta(days=365)).isoformat()
+    return {
+        "register": [("post", "/api/auth/register/",
+                      {"username": "bench-new", "email": "bench-new@example.com", "password": PASSWORD})],
+        "token_obtain_pair": [("post", "/api/auth/login/", {"username": data["user"].username, "password": PASSWORD})],
+        "token_refresh": [("post", "/api/auth/refresh/", {"refresh": str(RefreshToken.for_user(data["user"]))})],
+        "me": [("get", "/api/auth/me/", None)],
+        "project-list-create": [("get", "/api/projects/", None), ("post", "/api/projects/", {"name": "New"})],
+        "project-detail": [("get", f"/api/projects/{project.id}/", None),
+                           ("patch", f"/api/projects/{project.id}/", {"description": "changed"})],
+        "project-members": [("get", f"/api/projects/{project.id}/members/", None)],
+        "project-member-detail": [("get", f"/api/projects/{project.id}/members/{data['member'].id}/", None)],
+        "board-list-create": [("get", "/api/boards/", None)],
+        "board-detail": [("get", f"/api/boards/{board.id}/", None)],
+        "board-snapshot": [("get", f"/api/boards/{board.id}/snapshot/", None)],
+        "column-list-create": [("get", "/api/columns/", None)],
+        "column-detail": [("get", f"/api/columns/{columns[0].id}/", None)],
+        "task-list-create": [
+            ("get", "/api/tasks/", None),
+            ("get", f"/api/tasks/?project={project.id}&is_complete=false", None),
+        ],
+        "my-tasks": [("get", "/api/me/tasks/", None), ("get", "/api/me/tasks/?is_complete=true", None)],
+        "task-bulk": [("post", "/api/tasks/bulk/", {"operations": [
+            {"op": "create", "data": {"column": columns[0].id, "title": f"Bulk {i}"}} for i in range(20)
+        ]})],
+        "task-detail": [("get", f"/api/tasks/{task.id}/", None),
+                        ("patch", f"/api/tasks/{task.id}/", {"title": "Renamed"})],
+        "task-comment-list-create": [("get", f"/api/tasks/{comment.task_id}/comments/", None),
+                                     ("post", f"/api/tasks/{task.id}/comments/", {"content": "benchmark"})],
+        "task-comment-detail": [("get", f"/api/tasks/{comment.task_id}/comments/{comment.id}/", None)],
+        "column-reorder": [("post", f"/api/boards/{board.id}/columns/reorder/",
+                            {"column_ids": [c.id for c in reversed(columns)]})],
+        "task-reorder": [("post", f"/api/columns/{columns[0].id}/tasks/reorder/", {"task_ids": column_tasks[::-1]})],
+        "task-move": [("post", f"/api/tasks/{task.id}/move/", {"column": columns[1].id})],
+        "project-changes": [("get", f"/api/projects/{project.id}/changes/", None),
+                            ("get", f"/api/projects/{project.id}/changes/?since=0", None)],
+        "project-stats": [("get", f"/api/projects/{project.id}/stats/", None),
+                          ("get", f"/api/projects/{project.id}/stats/?days=365", None)],
+        "project-flow": [("get", f"/api/projects/{project.id}/flow/", None),
+                         ("get", f"/api/projects/{project.id}/flow/?from={year_ago}", None)],
+        "project-cycle-time": [("get", f"/api/projects/{project.id}/cycle-time/", None),
+                               ("get", f"/api/projects/{project.id}/cycle-time/?from={year_ago}", None)],
+        "project-export": [("get", f"/api/projects/{project.id}/export/?format=ndjson", None)],
+        "project-import": [("upload", "/api/projects/import/", export)],
+        "search": [("get", "/api/search/?q=task", None)],
+        "label-list-create": [("get", "/api/labels/", None)],
+        "label-detail": [("get", f"/api/labels/{data['label']}/", None)],
+    }
+
+
+def url_names(apps=REPORTED_APPS):
+    """Names of the URL patterns the report has to cover."""
+    resolver = get_resolver()
+    names = set()
+
+    def walk(patterns, app):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                module = getattr(pattern.urlconf_module, "__name__", "")
+                walk(pattern.url_patterns, module.split(".")[0] if module else app)
+            elif isinstance(pattern, URLPattern) and app in apps and pattern.name:
+                names.add(pattern.name)
+
+    walk(resolver.url_patterns, None)
+    return names
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _request(client, method, path, body):
+    if method == "upload":
+        upload = SimpleUploadedFile("bench.ndjson", body, content_type="application/x-ndjson")
+        return client.post(path, {"file": upload}, format="multipart")
+    if method == "get":
+        # streaming responses only run their queries once consumed
+        response = client.get(path)
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+    return getattr(client, method)(path, body, format="json")
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def run(data, iterations=20, warmup=2):
+    """Time every scenario; returns ``{"METHOD route": stats}``."""
+    planned = scenarios(data)
+    missing = url_names() - set(planned)
+    if missing:
+        raise ValueError(f"no benchmark scenario for: {', '.join(sorted(missing))}")
+
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token_for(data['user'])}")
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        return _run(client, planned, iterations, warmup)
+
+
+def _run(client, planned, iterations, warmup):
+    endpoints = {}
+    for name, requests in sorted(planned.items()):
+        for method, path, body in requests:
+            timings, queries, statuses, route = [], [], set(), None
+            for i in range(warmup + iterations):
+                with record_requests() as samples:
+                    started = time.perf_counter()
+                    try:
+                        with transaction.atomic():
+                            # counted here rather than by the middleware so streamed bodies are included
+                            with CaptureQueriesContext(connection) as captured:
+                                response = _request(client, method, path, body)
+                            raise _Rollback
+                    except _Rollback:
+                        pass
+                    elapsed = time.perf_counter() - started
+                if i < warmup:
+                    continue
+                route = samples[-1].route
+                timings.append(elapsed * 1000)
+                queries.append(len(captured))
+                statuses.add(response.status_code)
+            key = f"{'POST' if method == 'upload' else method.upper()} /{route}"
+            if "?" in path:
+                # ids differ between databases; keep keys comparable across runs
+                key += "?" + re.sub(r"project=\d+", "project=<id>", path.split("?", 1)[1])
+            endpoints[key] = {
+                "name": name,
+                "p50_ms": round(_percentile(timings, 0.50), 3),
+                "p95_ms": round(_percentile(timings, 0.95), 3),
+                "mean_ms": round(statistics.fmean(timings), 3),
+                "queries": max(queries),
+                "status": sorted(statuses),
+            }
+    return endpoints
+
+
+def meta(scale, rng_seed, **extra):
+    return {
+        "scale": scale,
+        "seed": rng_seed,
+        **extra,
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+    }
+
+
+def report(endpoints, scale, iterations, rng_seed):
+    return {"meta": meta(scale, rng_seed, iterations=iterations), "endpoints": endpoints}
+
+
+def dumps(data):
+    # stable key order so two reports diff line by line
+    return json.dumps(data, indent=2, sort_keys=True) + "\n"
+
+
+def compare(baseline, current, metric="p50_ms"):
+    """Rows of (endpoint, before, after, change %) for endpoints present in both reports."""
+    rows = []
+    for key, stats in sorted(current["endpoints"].items()):
+        before = baseline["endpoints"].get(key)
+        if before is None:
+            continue
+        old, new = before[metric], stats[metric]
+        rows.append((key, old, new, (new - old) / old * 100 if old else 0.0))
+    return rows
+
+
+def unseed(data):
+    """Delete a committed ``seed``."""
+    user_ids = [user.pk for user in data["users"]]
+    # projects first: the signals skip the change log of objects deleted with their project
+    Project.objects.filter(owner_id__in=user_ids).delete()
+    User.objects.filter(pk__in=user_ids).delete()
+    invalidate_project_access(*user_ids)
+
+
+def read_paths(data):
+    """GETs of the endpoints ``boards.async_views`` serves."""
+    project, board, comment = data["project"], data["board"], data["comment"]
+    return [
+        f"/api/tasks/?project={project.id}",
+        f"/api/boards/{board.id}/snapshot/",
+        f"/api/tasks/{comment.task_id}/comments/",
+        "/api/labels/",
+    ]
+
+
+def read_urlconf(mode):
+    """A URLconf with only the async read endpoints, their GET served by the async (``"async"``) or DRF (``"sync"``) view."""
+    patterns = []
+    for pattern in board_urls.urlpatterns:
+        view = getattr(pattern.callback, "sync_view", None)
+        if view is not None:
+            patterns.append(url_path(f"api/{pattern.pattern}", pattern.callback if mode == "async" else view))
+    return type(f"ReadURLConf_{mode}", (), {"urlpatterns": patterns})
+
+
+class _Connection:
+    """One HTTP/1.1 keep-alive client: requests are sent one after another."""
+
+    def __init__(self, app, token):
+        self.app = app
+        self.headers = [
+            (b"host", b"testserver"),
+            (b"accept", b"application/json"),
+            (b"authorization", f"Bearer {token}".encode()),
+        ]
+
+    async def get(self, full_path):
+        path, _, query = full_path.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+            "root_path": "", "headers": self.headers, "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+        }
+        sent = asyncio.Event()
+        requested = False
+        status = None
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            # the handler listens for a disconnect while the view runs
+            await sent.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get("more_body"):
+                sent.set()
+
+        await self.app(scope, receive, send)
+        sent.set()
+        return status
+
+
+async def _load(app, token, paths, connections, requests):
+    numbers = itertools.count()
+    latencies, statuses = [], Counter()
+    peak_threads = threading.active_count()
+    running = True
+
+    async def client():
+        connection = _Connection(app, token)
+        while (number := next(numbers)) < requests:
+            started = time.perf_counter()
+            status = await connection.get(paths[number % len(paths)])
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+
+    async def watch_threads():
+        nonlocal peak_threads
+        while running:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.005)
+
+    watcher = asyncio.create_task(watch_threads())
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(connections)))
+    elapsed = time.perf_counter() - started
+    running = False
+    await watcher
+    return latencies, statuses, elapsed, peak_threads
+
+
+def run_concurrent(data, mode, connections=500, requests=5000):
+    """Throughput, latency, peak threads and peak Python heap of ``requests`` GETs over ``connections`` connections."""
+    paths = read_paths(data)
+    token = access_token_for(data["user"])
+    # outlives a long run
+    token.set_exp(lifetime=timedelta(days=1))
+    token = str(token)
+    with override_settings(ROOT_URLCONF=read_urlconf(mode), ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+        app = ASGIHandler()
+        # fills the response cache, the access cache and the principal LRU
+        asyncio.run(_load(app, token, paths, min(connections, len(paths)), len(paths)))
+        latencies, statuses, elapsed, peak_threads = asyncio.run(_load(app, token, paths, connections, requests))
+
+        # separate pass: tracing allocations slows everything down
+        tracemalloc.start()
+        try:
+            asyncio.run(_load(app, token, paths, connections, connections))
+            _, peak_memory = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "requests": len(latencies),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50), 3),
+        "p95_ms": round(_percentile(latencies, 0.95), 3),
+        "p99_ms": round(_percentile(latencies, 0.99), 3),
+        "status": {str(status): count for status, count in sorted(statuses.items())},
+        "peak_threads": peak_threads,
+        "peak_traced_kib": round(peak_memory / 1024, 1),
+    }
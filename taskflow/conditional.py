@@ -0,0 +1,89 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+def fingerprint(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def queryset_version(queryset, field="updated_at"):
+    """``(row count, newest field value)`` of ``queryset`` in one aggregate query."""
+    result = queryset.order_by().aggregate(count=Count("pk"), last=Max(field))
+    return result["count"], result["last"]
+
+
+async def aqueryset_version(queryset, field="updated_at"):
+    result = await queryset.order_by().aaggregate(count=Count("pk"), last=Max(field))
+    return result["count"], result["last"]
+
+
+def make_etag(user_id, path, parts):
+    return quote_etag(fingerprint(user_id, path, parts))
+
+
+def check_preconditions(request, etag, last_modified):
+    """The 304/412 response the request's conditional headers call for, or ``None``."""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+
+def set_validator_headers(response, etag, last_modified):
+    if response.status_code not in (200, 304):
+        return response
+    response.headers["ETag"] = etag
+    if last_modified:
+        response.headers["Last-Modified"] = http_date(last_modified.timestamp())
+    return response
+
+
+class ConditionalMixin:
+    """
+    ETag / Last-Modified on GET (304 when unchanged) and If-Match /
+    If-Unmodified-Since on PUT/PATCH (412 when stale). Views implement
+    ``get_validators`` from cheap queries so nothing is serialized before
+    the precondition is checked.
+    """
+
+    def get_validators(self):
+        """
+        Return ``(etag_parts, last_modified)``; ``etag_parts`` is any repr-able
+        value. Only give ``last_modified`` when a single row's ``updated_at``
+        covers the whole response: a list's newest ``updated_at`` does not move
+        when a row is deleted or a related object changes, so lists and
+        aggregates return ``None`` and rely on the ETag.
+        """
+        raise NotImplementedError
+
+    def get_object(self):
+        # validators and the handler share one lookup
+        if not hasattr(self, "_conditional_object"):
+            self._conditional_object = super().get_object()
+        return self._conditional_object
+
+    def _validators(self):
+        parts, last_modified = self.get_validators()
+        return make_etag(self.request.user.pk, self.request.get_full_path(), parts), last_modified
+
+    def _check_preconditions(self, request):
+        etag, last_modified = self._validators()
+        return etag, last_modified, check_preconditions(request, etag, last_modified)
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified, response = self._check_preconditions(request)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validator_headers(response, etag, last_modified)
+
+    def update(self, request, *args, **kwargs):
+        if "HTTP_IF_MATCH" in request.META or "HTTP_IF_UNMODIFIED_SINCE" in request.META:
+            _, _, response = self._check_preconditions(request)
+            if response is not None:
+                return response
+        response = super().update(request, *args, **kwargs)
+        if response.status_code == 200:
+            etag, last_modified = self._validators()
+            response = set_validator_headers(response, etag, last_modified)
+        return response
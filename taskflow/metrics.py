@@ -0,0 +1,241 @@
+"""
+Per-request instrumentation.
+
+``RequestMetricsMiddleware`` counts and times the SQL of every request,
+times DRF response rendering and measures the body size. Each response gets
+a ``Server-Timing`` header (``db``, ``app``, ``render``, ``total``), and the
+numbers are aggregated per route in this process for ``/api/_metrics``
+(Prometheus text format).
+
+Views declare how many queries they may use with ``@query_budget(n)``;
+tests decorated with ``@enforce_query_budgets`` fail when any request they
+make goes over the budget of its view.
+"""
+import functools
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class RequestSample:
+    __slots__ = ("method", "route", "status", "queries", "db", "render", "total", "size", "budget")
+
+    def __init__(self, method, route, budget):
+        self.method = method
+        self.route = route
+        self.budget = budget
+        self.status = None
+        self.queries = 0
+        self.db = 0.0
+        self.render = 0.0
+        self.total = 0.0
+        self.size = None
+
+    def execute(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db += time.perf_counter() - started
+            self.queries += 1
+
+    def server_timing(self):
+        app = max(self.total - self.db - self.render, 0.0)
+        return ", ".join([
+            f'db;dur={self.db * 1000:.1f};desc="{self.queries} queries"',
+            f"app;dur={app * 1000:.1f}",
+            f"render;dur={self.render * 1000:.1f}",
+            f"total;dur={self.total * 1000:.1f}",
+        ])
+
+
+class MetricsRegistry:
+    """Totals per (method, route, status) for the lifetime of the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, sample):
+        key = (sample.method, sample.route, str(sample.status))
+        with self._lock:
+            series = self._series.setdefault(key, {
+                "count": 0, "duration": 0.0, "queries": 0, "db": 0.0, "bytes": 0,
+                "buckets": [0] * len(LATENCY_BUCKETS),
+            })
+            series["count"] += 1
+            series["duration"] += sample.total
+            series["queries"] += sample.queries
+            series["db"] += sample.db
+            series["bytes"] += sample.size or 0
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if sample.total <= bound:
+                    series["buckets"][i] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            series = {key: {**value, "buckets": list(value["buckets"])} for key, value in self._series.items()}
+
+        def labels(key, **extra):
+            method, route, status = key
+            pairs = {"method": method, "route": route, "status": status, **extra}
+            return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs.items()) + "}"
+
+        lines = [
+            "# HELP taskflow_request_duration_seconds Request latency.",
+            "# TYPE taskflow_request_duration_seconds histogram",
+        ]
+        for key, value in sorted(series.items()):
+            for bound, count in zip(LATENCY_BUCKETS, value["buckets"]):
+                lines.append(f"taskflow_request_duration_seconds_bucket{labels(key, le=bound)} {count}")
+            lines.append(f'taskflow_request_duration_seconds_bucket{labels(key, le="+Inf")} {value["count"]}')
+            lines.append(f"taskflow_request_duration_seconds_sum{labels(key)} {value['duration']:.6f}")
+            lines.append(f"taskflow_request_duration_seconds_count{labels(key)} {value['count']}")
+        for name, field, kind, help_text in (
+            ("taskflow_db_queries_total", "queries", "counter", "SQL queries executed."),
+            ("taskflow_db_duration_seconds_total", "db", "counter", "Time spent in SQL."),
+            ("taskflow_response_bytes_total", "bytes", "counter", "Response body bytes (non-streaming)."),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for key, value in sorted(series.items()):
+                number = value[field]
+                lines.append(f"{name}{labels(key)} {number:.6f}" if isinstance(number, float) else f"{name}{labels(key)} {number}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+_recorders = []
+
+
+def _view_budget(resolver_match):
+    if resolver_match is None:
+        return None
+    func = resolver_match.func
+    view = getattr(func, "view_class", func)
+    return getattr(view, "query_budget", None)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        sample, started = self._start(request)
+        with self._instrument(sample):
+            response = self.get_response(request)
+        return self._finish(request, response, sample, started)
+
+    async def __acall__(self, request):
+        sample, started = self._start(request)
+        # the ORM of an async request runs in its own thread, with that thread's connections
+        stack = await sync_to_async(self._instrument)(sample)
+        with stack:
+            response = await self.get_response(request)
+        return self._finish(request, response, sample, started)
+
+    def _start(self, request):
+        sample = RequestSample(request.method, None, None)
+        request._metrics = sample
+        return sample, time.perf_counter()
+
+    def _instrument(self, sample):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(sample.execute))
+        return stack
+
+    def _finish(self, request, response, sample, started):
+        sample.total = time.perf_counter() - started
+
+        match = getattr(request, "resolver_match", None)
+        sample.route = match.route if match else "<unmatched>"
+        sample.budget = _view_budget(match)
+        sample.status = response.status_code
+        if not response.streaming:
+            sample.size = len(response.content)
+        response.headers["Server-Timing"] = sample.server_timing()
+
+        registry.observe(sample)
+        for recorder in _recorders:
+            recorder.append(sample)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook
+        sample = getattr(request, "_metrics", None)
+        if sample is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                sample.render += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape target for staff users, and for ``METRICS_ALLOWED_IPS`` when set."""
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", ())
+    user = getattr(request, "user", None)
+    if request.META.get("REMOTE_ADDR") not in allowed and not (user and user.is_staff):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def query_budget(limit):
+    """Declare the most queries one request to the decorated view may run."""
+
+    def decorate(view):
+        view.query_budget = limit
+        return view
+
+    return decorate
+
+
+@contextmanager
+def record_requests():
+    samples = []
+    _recorders.append(samples)
+    try:
+        yield samples
+    finally:
+        _recorders.remove(samples)
+
+
+def enforce_query_budgets(test):
+    """Fail the decorated test if a request it makes exceeds its view's ``query_budget``."""
+
+    @functools.wraps(test)
+    def wrapper(self, *args, **kwargs):
+        with record_requests() as samples:
+            result = test(self, *args, **kwargs)
+        over = [s for s in samples if s.budget is not None and s.queries > s.budget]
+        if over:
+            self.fail("; ".join(
+                f"{s.method} {s.route} ran {s.queries} queries (budget {s.budget})" for s in over
+            ))
+        return result
+
+    return wrapper
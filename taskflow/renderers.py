@@ -0,0 +1,26 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+orjson is an optional dependency: without it (or for ``indent`` requests,
+which only the browsable API sends) rendering falls back to DRF's own
+``JSONRenderer``. Values orjson cannot encode natively (Decimal, lazy
+strings, ...) go through DRF's encoder.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        return orjson.dumps(data, default=self._encoder.default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,116 @@
+"""
+Shared cache for read-heavy list responses.
+
+Every project has a generation number in the cache; any write to the project
+bumps it (``ChangeLog.record`` and the project signals do), which moves every
+cached response that depends on that project to a new key. Invalidation is a
+single ``incr`` and old entries simply expire. Keys also carry the user and
+the full path, so members never see each other's responses;
+``cached_for_project`` keeps data that is the same for every member once per
+project instead.
+
+The cache alias is ``RESPONSE_CACHE`` (any Django backend: local memory or
+files for development and tests, Redis in production).
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+GENERATION_KEY = "project-generation:{project_id}"
+RESPONSE_KEY = "response:{user_id}:{digest}"
+PROJECT_KEY = "project-data:{project_id}:{generation}:{name}"
+
+
+def _cache():
+    return caches[getattr(settings, "RESPONSE_CACHE", "default")]
+
+
+def _fresh_generation():
+    # a lost counter restarts at a value no cached key can have used
+    return time.time_ns()
+
+
+def project_generations(project_ids):
+    cache = _cache()
+    keys = {GENERATION_KEY.format(project_id=pid): pid for pid in project_ids}
+    found = cache.get_many(keys)
+    missing = {key: _fresh_generation() for key in keys.keys() - found.keys()}
+    for key, value in missing.items():
+        cache.add(key, value, timeout=None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return {keys[key]: value for key, value in found.items()}
+
+
+def _bump(project_ids):
+    cache = _cache()
+    for pid in project_ids:
+        key = GENERATION_KEY.format(project_id=pid)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _fresh_generation(), timeout=None)
+
+
+def bump_project_generation(*project_ids):
+    project_ids = [pid for pid in project_ids if pid is not None]
+    if not project_ids:
+        return
+    _bump(project_ids)
+    # again after commit, so a response read from the old rows in between is not kept
+    transaction.on_commit(lambda: _bump(project_ids))
+
+
+def response_cache_key(request, project_ids):
+    generations = project_generations(project_ids)
+    parts = (request.get_full_path(), sorted(generations.items()))
+    digest = hashlib.sha1(repr(parts).encode()).hexdigest()
+    return RESPONSE_KEY.format(user_id=request.user.pk, digest=digest)
+
+
+def cached_response_data(request, project_ids):
+    """``(key, cached data or None)`` of the response to ``request``."""
+    key = response_cache_key(request, set(project_ids))
+    return key, _cache().get(key)
+
+
+def cache_response_data(key, data):
+    _cache().set(key, data, getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+
+
+def cached_for_project(project_id, name, build, timeout=None):
+    """``build()``, shared by every user of the project until its next write (or ``timeout``)."""
+    cache = _cache()
+    generation = project_generations([project_id])[project_id]
+    key = PROJECT_KEY.format(project_id=project_id, generation=generation, name=name)
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, timeout if timeout is not None else getattr(settings, "RESPONSE_CACHE_TIMEOUT", 300))
+    return data
+
+
+class CachedListMixin:
+    """
+    Caches ``list()`` of a view for the request's user and path. Views
+    implement ``get_cache_projects`` (the projects the response is built
+    from), doing their access checks there since a hit skips ``get_queryset``.
+    """
+
+    def get_cache_projects(self):
+        raise NotImplementedError
+
+    def list(self, request, *args, **kwargs):
+        key, data = cached_response_data(request, self.get_cache_projects())
+        if data is not None:
+            return Response(data)
+
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            data = list(response.data) if isinstance(response.data, list) else dict(response.data)
+            cache_response_data(key, data)
+        return response
@@ -0,0 +1,21 @@
+"""
+Saves that leave the denormalized task counters alone.
+
+``Column`` and ``Project`` carry counters kept up to date with ``F()``
+increments (``boards.counters``); a plain ``save()`` of an instance read
+earlier in the request would write the stale values back. Both apps take
+the field list from here, so ``projects`` does not depend on ``boards``.
+"""
+
+COUNTER_FIELDS = (
+    "task_count",
+    "completed_task_count",
+    "open_low_count",
+    "open_medium_count",
+    "open_high_count",
+)
+
+
+def saved_fields(instance):
+    """The fields an ordinary save of an existing ``Column`` or ``Project`` writes."""
+    return [f.name for f in instance._meta.concrete_fields if not f.primary_key and f.name not in COUNTER_FIELDS]
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its query count and timings cover the whole stack
+    'taskflow.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +87,18 @@ DATABASES = {
     }
 }
 
+# SQLite production mode (taskflow.sqlite): WAL and tuned pragmas on every
+# connection, reused connections and IMMEDIATE transactions.
+# TASKFLOW_SQLITE_PRODUCTION=1 turns it on; SQLITE_PRAGMAS overrides pragmas.
+SQLITE_PRODUCTION = os.environ.get("TASKFLOW_SQLITE_PRODUCTION") == "1"
+SQLITE_PRAGMAS = {}
+if SQLITE_PRODUCTION:
+    DATABASES["default"].update(
+        CONN_MAX_AGE=600,
+        CONN_HEALTH_CHECKS=True,
+        OPTIONS={"transaction_mode": "IMMEDIATE"},
+    )
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -126,11 +141,50 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
+    # JWTAuthentication that serves current tokens without a user query
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.PrincipalJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # orjson when installed, DRF's JSON encoder otherwise
+    "DEFAULT_RENDERER_CLASSES": (
+        "taskflow.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
 }
 AUTH_USER_MODEL = "accounts.User"
+
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "accounts.serializers.PrincipalTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.PrincipalTokenRefreshSerializer",
+}
+# Current version of each user for accounts.authentication and the per-process
+# LRU of recently seen users. The query-free fast path needs AUTH_USER_CACHE to
+# be shared between processes (e.g. Redis); on the default local-memory cache it
+# stays off (AUTH_USER_FAST_PATH = None) and every request loads its user.
+AUTH_USER_CACHE = "default"
+AUTH_USER_CACHE_TIMEOUT = 3600
+AUTH_USER_FAST_PATH = None
+AUTH_USER_LRU_SIZE = 10000
+
+# Cache used by projects.access to memoize each user's project ids and roles
+PROJECT_ACCESS_CACHE = "default"
+PROJECT_ACCESS_CACHE_TIMEOUT = 300
+
+# Cached list responses (taskflow.response_cache), invalidated per project by
+# generation counters; point at a shared (e.g. Redis) cache alias in production
+RESPONSE_CACHE = "default"
+RESPONSE_CACHE_TIMEOUT = 300
+# project stats are retired by writes like cached responses, but overdue counts follow the clock
+PROJECT_STATS_CACHE_TIMEOUT = 60
+
+# Clients allowed to scrape /api/_metrics without a staff session. Empty by
+# default: behind a reverse proxy on the same host every request comes from
+# 127.0.0.1, so only list addresses that reach this process directly.
+METRICS_ALLOWED_IPS = ()
+
+# Fan-out used by the board change feed (boards.realtime); swap for a shared
+# broker when running more than one ASGI process
+REALTIME_BROKER = "boards.realtime.LocalBroker"
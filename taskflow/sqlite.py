@@ -0,0 +1,47 @@
+"""
+SQLite production mode (``SQLITE_PRODUCTION``).
+
+Every new SQLite connection is switched to WAL, so readers keep reading
+from their snapshot while a writer commits and only writers queue behind
+each other, with ``synchronous=NORMAL`` (no fsync per commit; a power loss
+can drop the last commits but not corrupt the file), a memory map, a larger
+page cache and a busy timeout so writers wait for the lock instead of
+failing with "database is locked".
+
+Settings add the rest: ``CONN_MAX_AGE`` so a connection and its pragmas are
+reused across requests, and ``IMMEDIATE`` transactions so a transaction
+that reads before it writes takes the write lock at ``BEGIN`` rather than
+failing to upgrade its read lock midway.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+PRAGMAS = {
+    # first, so the pragmas below wait for a busy database too
+    "busy_timeout": 5000,
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
+
+
+def pragmas():
+    """``PRAGMAS`` with the overrides of ``SQLITE_PRAGMAS``."""
+    return {**PRAGMAS, **getattr(settings, "SQLITE_PRAGMAS", {})}
+
+
+def configure(connection):
+    with connection.cursor() as cursor:
+        for name, value in pragmas().items():
+            if name == "journal_mode" and connection.is_in_memory_db():
+                continue
+            cursor.execute(f"PRAGMA {name} = {value}")
+
+
+@receiver(connection_created, dispatch_uid="taskflow.sqlite.configure")
+def configure_connection(sender, connection, **kwargs):
+    if connection.vendor == "sqlite" and getattr(settings, "SQLITE_PRODUCTION", False):
+        configure(connection)
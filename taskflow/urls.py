@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path,include
 
+from taskflow.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path("api/_metrics", metrics_view, name="metrics"),
     path("api/auth/", include("accounts.urls")),
     path("api/projects/", include("projects.urls")),
     path("api/", include("boards.urls")),